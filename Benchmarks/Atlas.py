@@ -0,0 +1,77 @@
+# Loads the game's sprites and tiles one file at a time and from the atlas (packing it, then from its cache),
+# and draws a screen's worth of them from their own surfaces, from the images the atlas hands out, from
+# subsurfaces of its pages and as regions of the pages with one Surface.blits call. Run from the project root with:
+# python -m Benchmarks.Atlas
+import os
+import random
+import shutil
+import tempfile
+import time
+import timeit
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import pygame
+from Main_Game import ATLAS_SOURCES
+from Scripts.Atlas import Atlas
+from Scripts.Utilities import BASE_IMAGE_PATH, LoadImage, LoadImages, Mirror
+
+
+def LoadFiles():
+    # What the game did before the atlas: every image loaded on its own, and mirrored for the sprites that face
+    # either way
+    images = {}
+    for source in ATLAS_SOURCES:
+        if os.path.isdir(BASE_IMAGE_PATH + source):
+            for path, image in zip(sorted(os.listdir(BASE_IMAGE_PATH + source)), LoadImages(source)):
+                images[source + '/' + path] = (image, Mirror(image))
+        else:
+            image = LoadImage(source)
+            images[source] = (image, Mirror(image))
+    return images
+
+
+def Run(sprites=2000, frames=30, repeats=5):
+    pygame.display.set_mode((533, 300))
+    cachePath = tempfile.mkdtemp()
+
+    def LoadAtlas():
+        atlas = Atlas(ATLAS_SOURCES)
+        atlas.cachePath = cachePath
+        atlas.Load()
+        return atlas
+
+    start = time.perf_counter()
+    files = LoadFiles()
+    print('loading {} images and their mirrors'.format(len(files)))
+    print('  {:7.1f} ms one file at a time'.format((time.perf_counter() - start) * 1000))
+    start = time.perf_counter()
+    atlas = LoadAtlas()
+    print('  {:7.1f} ms packing the atlas into {} page(s) and caching it'.format(
+        (time.perf_counter() - start) * 1000, len(atlas.pages)))
+    seconds = min(timeit.repeat(LoadAtlas, number=1, repeat=repeats))
+    print('  {:7.1f} ms from the cache'.format(seconds * 1000))
+    shutil.rmtree(cachePath)
+
+    display = pygame.display.get_surface()
+    random.seed(0)
+    paths = random.choices(sorted(files), k=sprites)
+    positions = [(random.randrange(display.get_width()), random.randrange(display.get_height())) for path in paths]
+    mirrored = [random.random() < 0.5 for path in paths]
+    separate = [(files[path][flip], position) for path, flip, position in zip(paths, mirrored, positions)]
+    images = [(atlas.Image(path, flip), position) for path, flip, position in zip(paths, mirrored, positions)]
+    subsurfaces = [(page.subsurface(area), position) for (page, area), position in
+                   zip((atlas.Region(path, flip) for path, flip in zip(paths, mirrored)), positions)]
+    regions = [(page, position, area) for (page, area), position in
+               zip((atlas.Region(path, flip) for path, flip in zip(paths, mirrored)), positions)]
+    print(sprites, 'sprites drawn per frame, best of', repeats)
+    for label, draw in (('own surfaces', lambda: [display.blit(*blit) for blit in separate]),
+                        ('atlas images', lambda: [display.blit(*blit) for blit in images]),
+                        ('atlas page subsurfaces', lambda: [display.blit(*blit) for blit in subsurfaces]),
+                        ('atlas regions, one blits call', lambda: display.blits(regions, doreturn=False))):
+        seconds = min(timeit.repeat(draw, number=frames, repeat=repeats)) / frames
+        print('  {:<30} {:7.2f} ms per frame'.format(label, seconds * 1000))
+
+
+if __name__ == '__main__':
+    Run()
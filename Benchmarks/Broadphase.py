@@ -0,0 +1,46 @@
+# Tests an attack hitbox against 10 to 10,000 enemies and projectiles spread over a large level, by scanning all of
+# them and with the Broadphase grid. Run from the project root with: python -m Benchmarks.Broadphase
+import random
+import timeit
+
+import pygame
+from Scripts.Broadphase import Broadphase
+
+
+def Run(counts=(10, 100, 1000, 10000), queries=1000, repeats=5):
+    print(queries, 'hitbox queries, best of', repeats)
+    for count in counts:
+        random.seed(0)
+        # A level about the size of level 2, with a projectile for every enemy
+        enemies = [pygame.Rect(random.randint(0, 20000), random.randint(0, 2000), 20, 25) for i in range(count)]
+        projectiles = [(random.random() * 20000, random.random() * 2000) for i in range(count)]
+        hitboxes = [pygame.Rect(random.randint(0, 20000), random.randint(0, 2000), 20, 25) for i in range(queries)]
+
+        def Scan():
+            for hitbox in hitboxes:
+                [enemy for enemy in enemies if hitbox.colliderect(enemy)]
+                [projectile for projectile in projectiles if hitbox.collidepoint(projectile)]
+
+        broadphases = (Broadphase(), Broadphase())
+
+        def Fill():
+            broadphases[0].Clear()
+            broadphases[1].Clear()
+            for enemy in enemies:
+                broadphases[0].Insert(enemy, enemy)
+            for projectile in projectiles:
+                broadphases[1].InsertPoint(projectile, projectile)
+
+        def Query():
+            for hitbox in hitboxes:
+                broadphases[0].Query(hitbox)
+                broadphases[1].Query(hitbox)
+
+        Fill()
+        results = [min(timeit.repeat(test, number=1, repeat=repeats)) * 1000 for test in (Scan, Query, Fill)]
+        print('  {:6} of each   {:9.3f} ms scanning   {:7.3f} ms with the grid   + {:7.3f} ms to fill it'.format(
+            count, *results))
+
+
+if __name__ == '__main__':
+    Run()
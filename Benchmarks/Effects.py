@@ -0,0 +1,221 @@
+# Spawns thousands of sparks, particles and projectiles and steps them until they are gone, with slotted classes and
+# with the same classes given a __dict__. Then plays a fight of enemy deaths with the effects as objects in lists and
+# in the array-backed Sparks and Particles, and draws a boss fight's 10,000 sparks and particles both ways. Spark and
+# Particle here are the smallest objects that do what Sparks and Particles do for one effect. Run from the project
+# root with:
+# python -m Benchmarks.Effects
+import gc
+import os
+import math
+import random
+import time
+import timeit
+import tracemalloc
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import pygame
+from Scripts.Utilities import AnimationClip, Animation
+from Scripts.Particles import Particles
+from Scripts.Sparks import Sparks
+from Scripts.Projectiles import Projectile, PROJECTILE_LIFETIME
+
+
+class Spark:
+    # One spark, stepped and drawn like a row of Sparks
+    __slots__ = ('position', 'angle', 'speed')
+
+    def __init__(self, position, angle, speed):
+        self.position = list(position)
+        self.angle = angle
+        self.speed = speed
+
+    def Update(self):
+        self.position[0] += math.cos(self.angle) * self.speed
+        self.position[1] += math.sin(self.angle) * self.speed
+        self.speed = max(0, self.speed - 0.1)
+        return not self.speed
+
+    def Render(self, surface, offset=(0, 0)):
+        x, y = self.position[0] - offset[0], self.position[1] - offset[1]
+        cos, sin = math.cos(self.angle), math.sin(self.angle)
+        length, width = self.speed * 3, self.speed * 0.5
+        pygame.draw.polygon(surface, (255, 255, 255), ((x + cos * length, y + sin * length),
+                                                       (x - sin * width, y + cos * width),
+                                                       (x - cos * length, y - sin * length),
+                                                       (x + sin * width, y - cos * width)))
+
+
+class Particle:
+    # One particle, stepped and drawn like a row of Particles
+    __slots__ = ('position', 'velocity', 'animation')
+
+    def __init__(self, game, particleType, position, velocity=(0, 0), frame=0):
+        self.position = list(position)
+        self.velocity = list(velocity)
+        self.animation = Animation(game.assets['particle_' + particleType], frame)
+
+    def Update(self):
+        done = self.animation.done
+        self.position[0] += self.velocity[0]
+        self.position[1] += self.velocity[1]
+        self.animation.Update()
+        return done
+
+    def Render(self, surface, offset=(0, 0)):
+        image = self.animation.Image()
+        surface.blit(image, (self.position[0] - offset[0] - image.get_width() // 2,
+                             self.position[1] - offset[1] - image.get_height() // 2))
+
+
+def Unslotted(cls):
+    # The same class without __slots__, so its instances get a __dict__
+    members = {name: value for name, value in vars(cls).items()
+               if name != '__slots__' and name not in cls.__slots__}
+    return type(cls.__name__, (), members)
+
+
+class BenchmarkGame:
+    def __init__(self):
+        frames = [pygame.Surface((8, 8)) for i in range(4)]
+        self.assets = {'particle_base': AnimationClip(frames, imageDuration=6, loop=False)}
+
+
+def Spawn(game, classes, count):
+    # One hit's worth of effects per count: five sparks and particles and a projectile
+    sparkClass, particleClass, projectileClass = classes
+    random.seed(0)
+    sparks, particles, projectiles = [], [], []
+    for i in range(count):
+        for j in range(5):
+            angle = random.random() * math.pi * 2
+            sparks.append(sparkClass((i, 0), angle, 2 + random.random()))
+            particles.append(particleClass(game, 'base', (i, 0), velocity=(math.cos(angle), math.sin(angle)),
+                                           frame=random.randint(0, 7)))
+        projectiles.append(projectileClass((i, 0), False, 1.5))
+    return sparks, particles, projectiles
+
+
+def Step(sparks, particles, projectiles):
+    # The finished effects are filtered out rather than removed one by one, so the time is spent in the effects
+    sparks[:] = [spark for spark in sparks if not spark.Update()]
+    particles[:] = [particle for particle in particles if not particle.Update()]
+    for projectile in projectiles:
+        projectile.Update()
+    projectiles[:] = [projectile for projectile in projectiles if projectile.timer <= PROJECTILE_LIFETIME]
+
+
+def Run(count=2000, repeats=9):
+    print(count, 'hits, each with 5 sparks, 5 particles and a projectile, best of', repeats)
+    game = BenchmarkGame()
+    for label, classes in (
+            ('__dict__', (Unslotted(Spark), Unslotted(Particle), Unslotted(Projectile))),
+            ('__slots__', (Spark, Particle, Projectile))):
+        tracemalloc.start()
+        effects = Spawn(game, classes, count)
+        memory = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del effects
+
+        # Like timeit, the garbage collector is kept out of the timings
+        gc.disable()
+        spawnSeconds = stepSeconds = math.inf
+        for i in range(repeats):
+            start = time.perf_counter()
+            effects = Spawn(game, classes, count)
+            spawnSeconds = min(spawnSeconds, time.perf_counter() - start)
+            start = time.perf_counter()
+            steps = 0
+            while any(effects):
+                Step(*effects)
+                steps += 1
+            stepSeconds = min(stepSeconds, time.perf_counter() - start)
+        gc.enable()
+        print('  {:<10} {:7.2f} ms to spawn   {:8.1f} KB   {:7.2f} ms for the {} steps until they are gone'.format(
+            label, spawnSeconds * 1000, memory / 1024, stepSeconds * 1000, steps))
+
+
+class ListEffects(list):
+    # Effect objects in a list, made as they spawn and dropped as they finish
+    def __init__(self, spawn):
+        super().__init__()
+        self.spawn = spawn
+
+    def Spawn(self, *args, **kwargs):
+        self.append(self.spawn(*args, **kwargs))
+
+    def Update(self):
+        self[:] = [effect for effect in self if not effect.Update()]
+
+    def Render(self, surface, offset=(0, 0)):
+        for effect in self:
+            effect.Render(surface, offset=offset)
+
+
+def Fight(sparks, particles, steps):
+    # An enemy dies every few steps, each death throwing out 30 sparks and particles like Enemy.Die
+    random.seed(0)
+    for step in range(steps):
+        if step % 4 == 0:
+            for i in range(30):
+                angle = random.random() * math.pi * 2
+                speed = random.random() * 5
+                sparks.Spawn((step, 0), angle, 2 + random.random())
+                particles.Spawn('base', (step, 0), velocity=[math.cos(angle + math.pi) * speed * 0.5,
+                                                             math.sin(angle + math.pi) * speed * 0.5],
+                                frame=random.randint(0, 7))
+        sparks.Update()
+        particles.Update()
+
+
+def ObjectEffects(game):
+    return ListEffects(Spark), ListEffects(lambda *args, **kwargs: Particle(game, *args, **kwargs))
+
+
+def RunFight(steps=2000, repeats=5):
+    print('a fight of', steps // 4, 'enemy deaths over', steps, 'steps, best of', repeats)
+    game = BenchmarkGame()
+    for label, (sparks, particles) in (('lists', ObjectEffects(game)),
+                                       ('arrays', (Sparks(256), Particles(game, 256)))):
+        Fight(sparks, particles, steps)     # Warms the arrays up
+        tracemalloc.start()
+        Fight(sparks, particles, steps)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        seconds = min(timeit.repeat(lambda: Fight(sparks, particles, steps), number=1, repeat=repeats))
+        print('  {:<6} {:8.2f} ms   {:7.1f} KB allocated at peak during the fight'.format(
+            label, seconds * 1000, peak / 1024))
+        if label == 'arrays':
+            print('         sparks:', sparks.Stats())
+
+
+def RunBossFight(count=10000, frames=30):
+    print(count, 'sparks and particles stepped and drawn for', frames, 'frames')
+    game = BenchmarkGame()
+    display = pygame.Surface((533, 300))
+    for label, (sparks, particles) in (('objects', ObjectEffects(game)),
+                                       ('arrays', (Sparks(count), Particles(game, count)))):
+        random.seed(0)
+        for i in range(count):
+            position = (random.random() * display.get_width(), random.random() * display.get_height())
+            sparks.Spawn(position, random.random() * math.pi * 2, 3 + random.random())
+            particles.Spawn('base', position, velocity=(random.random() - 0.5, random.random() - 0.5),
+                            frame=random.randint(0, 7))
+        updateSeconds = renderSeconds = 0
+        for frame in range(frames):
+            start = time.perf_counter()
+            sparks.Update()
+            particles.Update()
+            updateSeconds += time.perf_counter() - start
+            start = time.perf_counter()
+            sparks.Render(display)
+            particles.Render(display)
+            renderSeconds += time.perf_counter() - start
+        print('  {:<8} {:7.2f} ms to step   {:7.2f} ms to draw, per frame'.format(
+            label, updateSeconds / frames * 1000, renderSeconds / frames * 1000))
+
+
+if __name__ == '__main__':
+    Run()
+    RunFight()
+    RunBossFight()
@@ -0,0 +1,64 @@
+# Steps rooms of 6 to 1000 enemies on Data/Levels/0.json, moving them one object at a time with
+# PhysicsEntity.Update and with the EnemyStore, and times the store's whole enemy step going through the enemies
+# one by one (UpdateEach) and as arrays, with every enemy awake and with only the ones around the player's view
+# awake. The shipped levels have 6 to 10 enemies. Run from the project root with:
+# python -m Benchmarks.EnemyStep
+import os
+import random
+import timeit
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import numpy
+import pygame
+from Main_Game import Game
+from Scripts.Entities import PhysicsEntity
+from Scripts.Enemies import Enemy
+from Scripts.EnemyStore import BATCH_FROM
+
+
+def Spawn(game, count):
+    # Drops the enemies from random spots above solid ground, with two empty tiles above it
+    random.seed(0)
+    tilemap = game.tilemap
+    ground = [(x, y) for x, y, tileType, variant in tilemap.Tiles()
+              if tileType == 'ground_tiles' and not tilemap.GetTile(x, y - 1) and not tilemap.GetTile(x, y - 2)]
+    return [(x * tilemap.tileSize + 5, (y - 2) * tilemap.tileSize) for x, y in random.choices(ground, k=count)]
+
+
+def Run(counts=(6, 10, 24, 100, 300, 1000), steps=240, repeats=5):
+    game = Game(None, headless=True)
+    tilemap = game.tilemap
+    view = pygame.Rect(game.player.position[0] - 266, game.player.position[1] - 150, *game.display.get_size())
+    area = view.inflate(game.activeMargin * 2, game.activeMargin * 2)
+    print(steps, 'steps, best of', repeats)
+    for count in counts:
+        positions = Spawn(game, count)
+        entities = [PhysicsEntity(game, 'enemy', position, (20, 25)) for position in positions]
+        game.enemyStore.Clear()
+        for position in positions:
+            Enemy(game, position, (20, 25))
+        movement = numpy.full(count, -0.15)
+        moving = numpy.ones(count, dtype=bool)
+
+        def Objects():
+            for entity in entities:
+                entity.Update(tilemap, (-0.15, 0))
+
+        results = []
+        for step in (Objects, lambda: game.enemyStore.Move(tilemap, movement, moving)):
+            results.append(min(timeit.repeat(step, number=steps, repeat=repeats)) / steps * 1000)
+        for batchFrom in (count + 1, 0):
+            game.enemyStore.batchFrom = batchFrom
+            for step in (lambda: game.enemyStore.Update(tilemap), lambda: game.enemyStore.Update(tilemap, area)):
+                results.append(min(timeit.repeat(step, number=steps, repeat=repeats)) / steps * 1000)
+        game.enemyStore.batchFrom = BATCH_FROM
+        awake = numpy.count_nonzero(game.enemyStore.awake[:count])
+        print('  {:5} enemies   {:7.3f} ms per step one by one   {:7.3f} ms batched   whole enemy step: '
+              '{:7.3f} ms one by one, {:7.3f} ms with {} awake   {:7.3f} ms batched, {:7.3f} ms with {} awake'.format(
+                  count, *results[:4], awake, *results[4:], awake))
+    print('the store steps fewer than', BATCH_FROM, 'enemies one by one')
+
+
+if __name__ == '__main__':
+    Run()
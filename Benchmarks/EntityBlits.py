@@ -0,0 +1,62 @@
+# Draws rooms of 10 to 1000 players and enemies, half of them facing left, flipping their sprites when they are
+# drawn like before and with the mirrored frames made when the assets are loaded. Run from the project root with:
+# python -m Benchmarks.EntityBlits
+import os
+import random
+import timeit
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import pygame
+from Main_Game import Game
+from Scripts.Entities import PhysicsEntity
+from Scripts.Enemies import Enemy
+
+
+def FlipRender(entity, surface, offset):
+    # PhysicsEntity.Render, and Enemy.Render without its health bar, as they were: flipping the frame each time
+    image = entity.Image() if isinstance(entity, Enemy) else entity.animation.Image()
+    surface.blit(pygame.transform.flip(image, entity.flip, False),
+                 (entity.position[0] - offset[0] + entity.animationOffset[0],
+                  entity.position[1] - offset[1] + entity.animationOffset[1]))
+    if isinstance(entity, Enemy):
+        if entity.flip:
+            surface.blit(pygame.transform.flip(entity.game.assets['gun'], True, False),
+                         (entity.Rectangle().centerx - 16 - offset[0], entity.Rectangle().centery - offset[1] - 15))
+        else:
+            surface.blit(entity.game.assets['gun'], (entity.Rectangle().centerx - offset[0],
+                                                     entity.Rectangle().centery - offset[1] - 15))
+
+
+def Run(counts=(10, 100, 1000), frames=60, repeats=5):
+    # The sprites are converted to the display's format like in the game, which needs a display
+    pygame.display.set_mode((533, 300))
+    game = Game(None, headless=True)
+    display = game.display
+    print(frames, 'frames, best of', repeats)
+    for count in counts:
+        random.seed(0)
+        game.enemyStore.Clear()
+        entities = []
+        for i in range(count):
+            position = (random.random() * display.get_width(), random.random() * display.get_height())
+            entity = Enemy(game, position, (20, 25)) if i % 2 else PhysicsEntity(game, 'ronin', position, (20, 25))
+            entity.flip = i % 4 < 2
+            entities.append(entity)
+
+        def Flipped():
+            for entity in entities:
+                FlipRender(entity, display, (0, 0))
+
+        def Mirrored():
+            for entity in entities:
+                entity.Render(display, (0, 0))
+
+        results = [min(timeit.repeat(draw, number=frames, repeat=repeats)) / frames / count * 1000000
+                   for draw in (Flipped, Mirrored)]
+        print('  {:5} entities   {:6.2f} us per entity flipping each frame   {:6.2f} us with mirrored frames'.format(
+            count, *results))
+
+
+if __name__ == '__main__':
+    Run()
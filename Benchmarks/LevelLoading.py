@@ -0,0 +1,50 @@
+# Compares loading a level from its JSON source against loading the compiled, memory-mapped copy.
+# Run from the project root with: python -m Benchmarks.LevelLoading
+import os
+import timeit
+import tracemalloc
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+from Scripts.Tilemap import Tilemap
+from Scripts.LevelFormat import BuildLevel, SPAWNER_TILES
+
+
+def LoadJson(path):
+    tilemap = Tilemap(None)
+    tilemap.load(path)
+    spawners = tilemap.Extract(SPAWNER_TILES)
+    return tilemap, spawners
+
+
+def LoadCompiled(path):
+    tilemap = Tilemap(None)
+    spawners = tilemap.LoadCompiled(path)
+    return tilemap, spawners
+
+
+def Memory(load, path):
+    # Python heap still held by the loaded level, and the peak while loading it
+    tracemalloc.start()
+    level = load(path)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return current, peak
+
+
+def Run(repeats=20):
+    for name in sorted(os.listdir('Data/Levels')):
+        if not name.endswith('.json'):
+            continue
+        jsonPath = 'Data/Levels/' + name
+        levelPath = BuildLevel(jsonPath)
+        print(name, '(' + str(os.path.getsize(jsonPath)), 'bytes JSON,', os.path.getsize(levelPath), 'bytes compiled)')
+        for label, load, path in (('JSON + Extract', LoadJson, jsonPath), ('compiled (mmap)', LoadCompiled, levelPath)):
+            seconds = min(timeit.repeat(lambda: load(path), number=1, repeat=repeats))
+            current, peak = Memory(load, path)
+            print('  {:<16} {:7.3f} ms   retained {:8.1f} KB   peak {:8.1f} KB'.format(
+                label, seconds * 1000, current / 1024, peak / 1024))
+
+
+if __name__ == '__main__':
+    Run()
@@ -0,0 +1,75 @@
+# Generates a synthetic 10,000 x 1,000 tile level as a paged file, then pans the camera across all of it with a
+# PagedTilemap, printing how much memory is in use along the way. Run from the project root with:
+# python -m Benchmarks.PagedLevel
+import os
+import tempfile
+import time
+import tracemalloc
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import numpy
+import pygame
+pygame.display.set_mode((1, 1))
+
+from Scripts.Utilities import LoadImages
+from Scripts.LevelFormat import WritePaged, PAGE_SIZE
+from Scripts.PagedTilemap import PagedTilemap
+
+
+class BenchmarkGame:
+    def __init__(self):
+        self.assets = {
+            'ground_tiles': LoadImages('Tiles/Dungeon Tileset/Castle Tiles/Ground Tiles'),
+            'platform': LoadImages('Tiles/Dungeon Tileset/Castle Tiles/Platform'),
+        }
+
+
+def Generate(path, width, height):
+    # Rolling hills of ground with a platform floating above every so often, built one page at a time
+    def ReadPage(pageX, pageY):
+        x = numpy.arange(pageX * PAGE_SIZE, (pageX + 1) * PAGE_SIZE)
+        y = numpy.arange(pageY * PAGE_SIZE, (pageY + 1) * PAGE_SIZE)[:, None]
+        ground = (height // 2 + 40 * numpy.sin(x / 60) + 8 * numpy.sin(x / 7)).astype(numpy.int64)
+        types = numpy.where(y >= ground, 1, 0)
+        types[(y == ground - 4) & (x % 23 < 4)] = 2
+        types[(x >= width) | (y >= height)] = 0
+        variants = numpy.where(types == 1, numpy.where(y == ground, 1, 8), 1)
+        return types.astype(numpy.uint8).tobytes(), (variants * (types > 0)).astype(numpy.uint8).tobytes()
+
+    return WritePaged(path, 32, 0, 0, width, height, ['ground_tiles', 'platform'], ReadPage)
+
+
+def Run(width=10000, height=1000, frames=3000):
+    game = BenchmarkGame()
+    path = os.path.join(tempfile.gettempdir(), 'benchmark_level.plvl')
+    start = time.perf_counter()
+    Generate(path, width, height)
+    print('generated {} x {} tiles in {:.1f} s, {:.1f} MB on disk'.format(
+        width, height, time.perf_counter() - start, os.path.getsize(path) / 1024 / 1024))
+
+    display = pygame.Surface((533, 300))
+    tracemalloc.start()
+    tilemap = PagedTilemap(game)
+    tilemap.LoadPaged(path)
+    start = time.perf_counter()
+    for frame in range(frames):
+        # Pans from left to right along the hills, with a point falling through the tiles below the camera
+        cameraX = int(frame / frames * (width * 32 - display.get_width()))
+        cameraY = int((height // 2 + 40 * numpy.sin(cameraX / 32 / 60)) * 32) - display.get_height() // 2
+        tilemap.Render(display, (cameraX, cameraY))
+        tilemap.PhysicsRectsAround((cameraX + 266, cameraY + 150))
+        tilemap.SolidCheck((cameraX + 266, cameraY + 150))
+        if frame % (frames // 5) == 0 or frame == frames - 1:
+            current, peak = tracemalloc.get_traced_memory()
+            print('  frame {:5}   {:4} pages {:3} chunks resident   {:6.1f} KB traced ({:6.1f} KB peak)'.format(
+                frame, len(tilemap.pages), len(tilemap.chunks), current / 1024, peak / 1024))
+    seconds = time.perf_counter() - start
+    tracemalloc.stop()
+    print('  {:.3f} ms per frame, {} pages read'.format(seconds / frames * 1000, tilemap.pageReads))
+    tilemap.Close()
+    os.remove(path)
+
+
+if __name__ == '__main__':
+    Run()
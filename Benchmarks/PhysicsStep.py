@@ -0,0 +1,105 @@
+# Steps 200 physics entities on Data/Levels/0.json, with the merged collision rectangles and with the old
+# per-call rectangles, and counts what a step allocates. Run from the project root with:
+# python -m Benchmarks.PhysicsStep
+import os
+import random
+import timeit
+import tracemalloc
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import pygame
+from Scripts.Utilities import AnimationClip
+from Scripts.Tilemap import Tilemap, NEIGHBOUR_OFFSETS, PHYSICS_TILES
+from Scripts.Entities import PhysicsEntity
+
+
+class UncachedTilemap(Tilemap):
+    # Builds new rectangles and lists on every call, like PhysicsRectsAround did before the cache
+    def PhysicsRectsAround(self, position, offset=(0, 0)):
+        rectangles = []
+        tile_types = []
+        tileX, tileY = int(position[0] // self.tileSize), int(position[1] // self.tileSize)
+        for offsetX, offsetY in NEIGHBOUR_OFFSETS:
+            index = self.Index(tileX + offsetX, tileY + offsetY)
+            if index >= 0 and self.physicsTypes[self.tileTypes[index]]:
+                rectangles.append(pygame.Rect((tileX + offsetX) * self.tileSize - offset[0],
+                                              (tileY + offsetY) * self.tileSize - offset[1],
+                                              self.tileSize, self.tileSize))
+                tile_types.append(self.typeNames[self.tileTypes[index]])
+        return rectangles, tile_types
+
+
+class BenchmarkGame:
+    def __init__(self):
+        frame = pygame.Surface((20, 25))
+        self.assets = {'enemy_idle': AnimationClip([frame])}
+        self.enemies = []
+        self.changeLevel = False
+
+
+def Spawn(game, tilemap, count):
+    # Drops the entities from random spots above solid ground, with two empty tiles above it
+    random.seed(0)
+    ground = [(x, y) for x, y, tileType, variant in tilemap.Tiles()
+              if tileType == 'ground_tiles' and not tilemap.GetTile(x, y - 1) and not tilemap.GetTile(x, y - 2)]
+    entities = []
+    for x, y in random.choices(ground, k=count):
+        entities.append(PhysicsEntity(game, 'enemy', (x * tilemap.tileSize + 5, (y - 2) * tilemap.tileSize), (20, 25)))
+    return entities
+
+
+def Step(tilemap, entities):
+    for entity in entities:
+        entity.Update(tilemap, (0.15 if entity.flip else -0.15, 0))
+
+
+def Allocations(tilemap, entities, steps=50):
+    # What a step allocates, from tracemalloc. Memory that is freed again within the step is never in a snapshot,
+    # so every entity's Update is measured on its own: the most it had allocated at once, summed over the entities,
+    # is a lower bound on the bytes a step allocates. The blocks still allocated after steps steps, compared to
+    # before them, are the ones kept per step. The steps are run once first, so the values they replace (positions,
+    # velocities) were also allocated while tracing and their freeing is counted
+    ignored = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__)]
+    tracemalloc.start()
+    for step in range(steps):
+        Step(tilemap, entities)
+    before = tracemalloc.take_snapshot().filter_traces(ignored)
+    allocated = 0
+    for step in range(steps):
+        for entity in entities:
+            start = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            entity.Update(tilemap, (0.15 if entity.flip else -0.15, 0))
+            allocated += tracemalloc.get_traced_memory()[1] - start
+    after = tracemalloc.take_snapshot().filter_traces(ignored)
+    tracemalloc.stop()
+    kept = sum(statistic.count_diff for statistic in after.compare_to(before, 'lineno'))
+    return allocated / steps, kept / steps
+
+
+def Run(count=200, steps=240, repeats=5):
+    game = BenchmarkGame()
+    print(count, 'entities,', steps, 'steps, best of', repeats)
+    for label, tilemapClass in (('per-call rects', UncachedTilemap), ('merged rects', Tilemap)):
+        tilemap = tilemapClass(game)
+        tilemap.LoadLevel('Data/Levels/0.json')
+        entities = Spawn(game, tilemap, count)
+        Step(tilemap, entities)     # Warms the cache up
+
+        seconds = min(timeit.repeat(lambda: Step(tilemap, entities), number=steps, repeat=repeats)) / steps
+        allocated, kept = Allocations(tilemap, entities)
+        print('  {:<16} {:7.3f} ms per step   {:8.1f} KB allocated per step   {:6.1f} blocks kept per step'.format(
+            label, seconds * 1000, allocated / 1024, kept))
+
+    # What is left can't be preallocated from Python: ints above 256 are new objects every time one is worked out,
+    # and pixel coordinates nearly always are, and every for loop makes an iterator. Floats and small tuples come
+    # from Python's free lists and don't show up at all
+    print('  what a step still allocates is short lived ints for pixel coordinates and loop iterators')
+    tilemap.MergePhysics()
+    solidTiles = sum(1 for x, y, tileType, variant in tilemap.Tiles() if tileType in PHYSICS_TILES)
+    print('  {} solid tiles merged into {} collision rectangles'.format(solidTiles, len(tilemap.physicsRects)))
+
+
+if __name__ == '__main__':
+    Run()
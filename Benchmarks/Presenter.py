@@ -0,0 +1,47 @@
+# Scales the game's 533x300 display and the menus' 640x360 one up to 720p, 1080p and 4K windows, with
+# pygame.transform.scale making a new surface every frame like before and with the Presenter, still and shaking.
+# 640x360 is an exact fraction of all three window sizes, 533x300 of none of them. Run from the project root with:
+# python -m Benchmarks.Presenter
+import os
+import random
+import timeit
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import pygame
+from Scripts.Presenter import Presenter
+
+
+def Display(size):
+    # A display with some detail on it, so nothing is faster for being one colour
+    random.seed(0)
+    display = pygame.Surface(size)
+    for i in range(500):
+        pygame.draw.rect(display, [random.randrange(256) for channel in range(3)],
+                         (random.randrange(size[0]), random.randrange(size[1]), 12, 8))
+    return display
+
+
+def Run(windows=((1280, 720), (1920, 1080), (3840, 2160)), displays=((533, 300), (640, 360)), frames=60, repeats=5):
+    print(frames, 'frames, best of', repeats)
+    for window in windows:
+        screen = pygame.display.set_mode(window)
+        presenter = Presenter(screen)
+        for size in displays:
+            display = Display(size)
+
+            def Scaled():
+                screen.blit(pygame.transform.scale(display, screen.get_size()), (0, 0))
+
+            results = [min(timeit.repeat(present, number=frames, repeat=repeats)) / frames * 1000
+                       for present in (Scaled, lambda: presenter.Present(display),
+                                       lambda: presenter.Present(display, (2, -3)))]
+            scale = presenter.Layout(display)[0]
+            print('  {:>9} window {:>7} display {:>7}   {:6.3f} ms per frame scaling a new surface   '
+                  '{:6.3f} ms with the Presenter   {:6.3f} ms shaking'.format(
+                      '{}x{}'.format(*window), '{}x{}'.format(*size), 'x{}'.format(scale) if scale else 'fitted',
+                      *results))
+
+
+if __name__ == '__main__':
+    Run()
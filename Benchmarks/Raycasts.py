@@ -0,0 +1,63 @@
+# Times line-of-sight queries one by one against the batched LinesOfSight, and projectiles polling SolidCheck every
+# frame against working out their impact frame once. Run from the project root with: python -m Benchmarks.Raycasts
+import os
+import random
+import timeit
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+from Scripts.Tilemap import Tilemap
+from Scripts.Enemies import Enemy, PROJECTILE_LIFETIME
+
+
+class BenchmarkGame:
+    def __init__(self):
+        self.assets = {}
+        self.tilemap = Tilemap(self)
+        self.tilemap.LoadLevel('Data/Levels/0.json')
+
+
+def RandomPositions(tilemap, count):
+    # Anywhere over the level's grid, which starts at its origin tile
+    random.seed(0)
+    left, top = tilemap.originX * tilemap.tileSize, tilemap.originY * tilemap.tileSize
+    return [(left + random.uniform(0, tilemap.width * tilemap.tileSize),
+             top + random.uniform(0, tilemap.height * tilemap.tileSize)) for i in range(count)]
+
+
+def PollProjectile(tilemap, position, speed):
+    # What the game loop did before, moves the projectile and checks the tile under it every frame
+    x = position[0]
+    for frame in range(1, PROJECTILE_LIFETIME + 2):
+        x += speed
+        if tilemap.SolidCheck((x, position[1])):
+            return frame
+
+
+def Run(count=1000, repeats=5):
+    game = BenchmarkGame()
+    tilemap = game.tilemap
+    enemy = Enemy.__new__(Enemy)
+    enemy.game = game
+    starts = RandomPositions(tilemap, count)
+    ends = [(x + random.uniform(-300, 300), y + random.uniform(-300, 300)) for x, y in starts]
+    speeds = [random.choice((-1.5, 1.5)) for i in range(count)]
+
+    print(count, 'queries, best of', repeats)
+    timings = (
+        ('LineOfSight', lambda: [tilemap.LineOfSight(start, end) for start, end in zip(starts, ends)]),
+        ('LinesOfSight', lambda: tilemap.LinesOfSight(starts, ends)),
+        ('polled projectiles', lambda: [PollProjectile(tilemap, start, speed) for start, speed in zip(starts, speeds)]),
+        ('impact frames', lambda: [enemy.ImpactFrame(start, speed) for start, speed in zip(starts, speeds)]),
+    )
+    for label, function in timings:
+        seconds = min(timeit.repeat(function, number=1, repeat=repeats))
+        print('  {:<20} {:8.3f} ms'.format(label, seconds * 1000))
+    # The impact frames have to be the frames polling finds, or the game would play differently
+    different = sum(PollProjectile(tilemap, start, speed) != enemy.ImpactFrame(start, speed)
+                    for start, speed in zip(starts, speeds))
+    print('  impact frames different from polling:', different, 'of', count)
+
+
+if __name__ == '__main__':
+    Run()
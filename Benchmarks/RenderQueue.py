@@ -0,0 +1,97 @@
+# Draws frames of Data/Levels/0.json with 10 to 300 enemies, as many projectiles and 5 particles per enemy in view,
+# blitting every sprite on its own like before and through a RenderQueue, a Surface.blits call per layer, and
+# with Game.Render, which also interpolates every sprite's position. Run from the project root with:
+# python -m Benchmarks.RenderQueue
+import os
+import random
+import timeit
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import pygame
+from Main_Game import Game
+from Scripts.Enemies import Enemy
+from Scripts.Projectiles import Projectile
+
+
+def ImmediateRender(game, surface):
+    # Game.Render as it was, a Surface.blit call for every tile chunk, sprite, gun, projectile and particle
+    scroll = (int(game.scroll[0]), int(game.scroll[1]))
+    surface.blit(game.assets['background'], (0, 0))
+    for chunk, position in game.tilemap.VisibleChunks(surface.get_size(), scroll):
+        surface.blit(chunk, position)
+    for enemy in game.enemies:
+        if enemy.awake:
+            enemy.Render(surface, scroll)
+    game.player.Render(surface, scroll)
+    images = (game.assets['projectile1'], game.assets['projectile1_flipped'])
+    for projectile in game.projectiles:
+        surface.blit(images[projectile.flip], (projectile.position[0] - 32 / 2 - scroll[0],
+                                               projectile.position[1] - 28 / 2 - scroll[1]))
+    game.sparks.Render(surface, offset=scroll)
+    for image, position in game.particles.Sprites(scroll):
+        surface.blit(image, position)
+    game.player.HealthBar(surface)
+
+
+def QueuedRender(game, surface):
+    # The same frame, queued by layer and drawn by a Surface.blits call per layer like Game.Render does
+    scroll = (int(game.scroll[0]), int(game.scroll[1]))
+    queue = game.renderQueue
+    queue.Begin()
+    queue.Add('background', game.assets['background'], (0, 0))
+    queue.Extend('tiles', game.tilemap.VisibleChunks(surface.get_size(), scroll))
+    for enemy in game.enemies:
+        if enemy.awake:
+            queue.Add('enemies', *enemy.Sprite(scroll))
+            queue.Add('guns', *enemy.GunSprite(scroll))
+    queue.Add('player', *game.player.Sprite(scroll))
+    images = (game.assets['projectile1'], game.assets['projectile1_flipped'])
+    for projectile in game.projectiles:
+        queue.Add('projectiles', images[projectile.flip], (projectile.position[0] - 32 / 2 - scroll[0],
+                                                           projectile.position[1] - 28 / 2 - scroll[1]))
+    queue.Submit(surface)
+    game.sparks.Render(surface, offset=scroll)
+    queue.Extend('particles', game.particles.Sprites(scroll))
+    queue.Submit(surface)
+    game.player.HealthBar(surface)
+
+
+def Populate(game, count):
+    # Scatters the enemies, projectiles and particles over the camera's view
+    random.seed(0)
+    width, height = game.display.get_size()
+    game.enemyStore.Clear()
+    game.projectiles = []
+    game.particles.Clear()
+    for i in range(count):
+        position = (game.scroll[0] + random.random() * width, game.scroll[1] + random.random() * height)
+        enemy = Enemy(game, position, (20, 25))
+        enemy.flip = i % 2 == 0
+        game.projectiles.append(Projectile(position, i % 2 == 0, 1.5))
+        for j in range(5):
+            game.particles.Spawn('base', position, frame=random.randint(0, 20))
+    game.enemyStore.Wake(game.ActiveArea())
+    game.transition = 0     # The level's opening transition isn't part of what's measured
+
+
+def Run(counts=(10, 100, 300), frames=60, repeats=5):
+    # The sprites are converted to the display's format like in the game, which needs a display
+    pygame.display.set_mode((533, 300))
+    game = Game(None, headless=True)
+    display = game.display
+    print(frames, 'frames, best of', repeats)
+    for count in counts:
+        Populate(game, count)
+        game.renderQueue.Reset()
+        results = [min(timeit.repeat(draw, number=frames, repeat=repeats)) / frames * 1000
+                   for draw in (lambda: ImmediateRender(game, display), lambda: QueuedRender(game, display),
+                                lambda: game.Render(display))]
+        stats = game.renderQueue.Stats()
+        print('  {:5} enemies   {:6.3f} ms per frame a blit at a time   {:6.3f} ms queued   '
+              '{:6.3f} ms for Game.Render   {:.0f} sprites in {:.0f} blits calls'.format(
+                  count, *results, sum(stats[layer] for layer in game.renderQueue.layers), stats['blitsCalls']))
+
+
+if __name__ == '__main__':
+    Run()
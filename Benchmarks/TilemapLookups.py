@@ -0,0 +1,106 @@
+# Compares the integer-keyed Tilemap grid against the old "x;y" string-keyed dictionary lookups.
+# Run from the project root with: python -m Benchmarks.TilemapLookups
+import os
+import json
+import random
+import timeit
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import pygame
+from Scripts.Tilemap import Tilemap, NEIGHBOUR_OFFSETS, PHYSICS_TILES
+
+
+class LegacyTilemap:
+    # The string-keyed lookups the Tilemap used before the grid storage, kept here as the baseline
+    def __init__(self, path):
+        f = open(path, 'r')
+        map_data = json.load(f)
+        f.close()
+        self.tilemap = map_data['tilemap']
+        self.tileSize = map_data['tile_size']
+
+    def TilesAround(self, position):
+        tiles = []
+        tileLocation = ((int(position[0] // self.tileSize)), (int(position[1] // self.tileSize)))
+        for offset in NEIGHBOUR_OFFSETS:
+            checkLocation = str(tileLocation[0] + offset[0]) + ';' + str(tileLocation[1] + offset[1])
+            if checkLocation in self.tilemap:
+                tiles.append(self.tilemap[checkLocation])
+        return tiles
+
+    def SolidCheck(self, position):
+        tileLocation = str(int(position[0] // self.tileSize)) + ';' + str(int(position[1] // self.tileSize))
+        if tileLocation in self.tilemap:
+            if self.tilemap[tileLocation]['type'] in PHYSICS_TILES:
+                return self.tilemap[tileLocation]
+
+    def PhysicsRectsAround(self, position):
+        rectangles = []
+        tile_types = []
+        for tile in self.TilesAround(position):
+            if tile['type'] in PHYSICS_TILES:
+                rectangles.append(pygame.Rect(tile['position'][0] * self.tileSize,
+                                              tile['position'][1] * self.tileSize,
+                                              self.tileSize, self.tileSize))
+                tile_types.append(tile['type'])
+        return rectangles, tile_types
+
+    def RenderLookups(self, offset, size):
+        found = 0
+        for x in range(offset[0] // self.tileSize, (offset[0] + size[0]) // self.tileSize + 1):
+            for y in range(offset[1] // self.tileSize, (offset[1] + size[1]) // self.tileSize + 1):
+                loc = str(x) + ';' + str(y)
+                if loc in self.tilemap:
+                    found += 1
+        return found
+
+
+def RenderLookups(tilemap, offset, size):
+    # The lookup part of Tilemap.Render without the blits
+    found = 0
+    startX = max(offset[0] // tilemap.tileSize, tilemap.originX)
+    endX = min((offset[0] + size[0]) // tilemap.tileSize + 1, tilemap.originX + tilemap.width)
+    startY = max(offset[1] // tilemap.tileSize, tilemap.originY)
+    endY = min((offset[1] + size[1]) // tilemap.tileSize + 1, tilemap.originY + tilemap.height)
+    for y in range(startY, endY):
+        rowStart = (y - tilemap.originY) * tilemap.width - tilemap.originX
+        for x in range(startX, endX):
+            if tilemap.tileTypes[rowStart + x]:
+                found += 1
+    return found
+
+
+def Run(path='Data/Levels/0.json', lookups=20000, repeats=5):
+    tilemap = Tilemap(None)
+    tilemap.load(path)
+    legacy = LegacyTilemap(path)
+
+    # Random sample positions spread over the level, the same for both implementations
+    random.seed(0)
+    ts = tilemap.tileSize
+    positions = [(random.uniform(tilemap.originX * ts, (tilemap.originX + tilemap.width) * ts),
+                  random.uniform(tilemap.originY * ts, (tilemap.originY + tilemap.height) * ts))
+                 for i in range(lookups)]
+    offsets = [(int(x), int(y)) for x, y in positions[:200]]
+
+    cases = [
+        ('TilesAround', lambda m: [m.TilesAround(p) for p in positions]),
+        ('SolidCheck', lambda m: [m.SolidCheck(p) for p in positions]),
+        ('PhysicsRectsAround', lambda m: [m.PhysicsRectsAround(p) for p in positions]),
+    ]
+    print('Level:', path, '(' + str(lookups), 'lookups per case, best of', str(repeats) + ')')
+    for name, case in cases:
+        old = min(timeit.repeat(lambda: case(legacy), number=1, repeat=repeats))
+        new = min(timeit.repeat(lambda: case(tilemap), number=1, repeat=repeats))
+        print('  {:<20} string keys {:8.2f} ms   grid {:8.2f} ms   speedup {:5.2f}x'.format(
+            name, old * 1000, new * 1000, old / new))
+
+    old = min(timeit.repeat(lambda: [legacy.RenderLookups(o, (533, 300)) for o in offsets], number=1, repeat=repeats))
+    new = min(timeit.repeat(lambda: [RenderLookups(tilemap, o, (533, 300)) for o in offsets], number=1, repeat=repeats))
+    print('  {:<20} string keys {:8.2f} ms   grid {:8.2f} ms   speedup {:5.2f}x'.format(
+        'Render lookups', old * 1000, new * 1000, old / new))
+
+
+if __name__ == '__main__':
+    Run()
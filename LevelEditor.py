@@ -3,7 +3,8 @@ import pygame
 import json
 import math
 from Scripts.Utilities import LoadImages, LoadImage
-from Scripts.Tilemap import Tilemap
+from Scripts.Tilemap import Tilemap, AUTOTILE_TYPES
+from Scripts.Presenter import Presenter
 
 RENDER_SCALE = 2
 
@@ -15,6 +16,7 @@ class Editor:
         pygame.display.set_caption('editor')
         self.screen = pygame.display.set_mode((1280, 720), pygame.RESIZABLE)
         self.display = pygame.Surface((648, 405))
+        self.presenter = Presenter(self.screen)
 
         self.clock = pygame.time.Clock()
         
@@ -110,17 +112,21 @@ class Editor:
             else:
                 self.display.blit(current_tile_img, mousePosition)
             
+            # Holding a button down over a tile only changes it once, the tile and its neighbours aren't set and
+            # autotiled again every frame. Autotiled tiles choose their own variant, so only their type is compared
             if self.clicking and self.ongrid:
-                self.tilemap.tilemap[str(tile_pos[0]) + ';' + str(tile_pos[1])] = {'type': self.tile_list[self.tile_group], 'variant': self.tile_variant, 'position': tile_pos}
+                tileType = self.tile_list[self.tile_group]
+                current = self.tilemap.GetTile(tile_pos[0], tile_pos[1])
+                if (current is None or current[0] != tileType or
+                        (current[1] != self.tile_variant and tileType not in AUTOTILE_TYPES)):
+                    self.tilemap.SetTile(tile_pos[0], tile_pos[1], tileType, self.tile_variant)
+                    self.tilemap.AutotileAt(tile_pos[0], tile_pos[1])
             if self.right_clicking:
-                tile_loc = str(tile_pos[0]) + ';' + str(tile_pos[1])
-                if tile_loc in self.tilemap.tilemap:
-                    del self.tilemap.tilemap[tile_loc]
-                for tile in self.tilemap.offGridTiles.copy():
-                    tile_img = self.assets[tile['type']][tile['variant']]
-                    tile_r = pygame.Rect(tile['position'][0] - self.scroll[0], tile['position'][1] - self.scroll[1], tile_img.get_width(), tile_img.get_height())
-                    if tile_r.collidepoint(mousePosition):
-                        self.tilemap.offGridTiles.remove(tile)
+                if self.tilemap.GetTile(tile_pos[0], tile_pos[1]) is not None:
+                    self.tilemap.RemoveTile(tile_pos[0], tile_pos[1])
+                    self.tilemap.AutotileAt(tile_pos[0], tile_pos[1])
+                for tile in self.tilemap.OffGridInRect(pygame.Rect(mousePosition[0] + self.scroll[0], mousePosition[1] + self.scroll[1], 1, 1)):
+                    self.tilemap.RemoveOffGrid(tile)
             
             self.display.blit(current_tile_img, (5, 5))
             
@@ -128,12 +134,14 @@ class Editor:
                 if event.type == pygame.QUIT:
                     pygame.quit()
                     sys.exit()
+                if event.type == pygame.VIDEORESIZE:
+                    self.presenter.Resize()
                     
                 if event.type == pygame.MOUSEBUTTONDOWN:
                     if event.button == 1:
                         self.clicking = True
                         if not self.ongrid:
-                            self.tilemap.offGridTiles.append({'type': self.tile_list[self.tile_group], 'variant': self.tile_variant, 'pos': (mousePosition[0] + self.scroll[0], mousePosition[1] + self.scroll[1])})
+                            self.tilemap.AddOffGrid({'type': self.tile_list[self.tile_group], 'variant': self.tile_variant, 'position': (mousePosition[0] + self.scroll[0], mousePosition[1] + self.scroll[1])})
                     if event.button == 3:
                         self.right_clicking = True
                     if self.shift:
@@ -193,7 +201,7 @@ class Editor:
                     if event.key == pygame.K_LCTRL:
                         increaseScrollSpeed = 5
             
-            self.screen.blit(pygame.transform.scale(self.display, self.screen.get_size()), (0, 0))
+            self.presenter.Present(self.display)
             pygame.display.update()
             self.clock.tick(120)
 
@@ -1,14 +1,21 @@
-import random
 import pygame
 import math
 import time
 
-from Scripts.Utilities import LoadImage, LoadImages, Animation
+from Scripts.Utilities import LoadImage, AnimationClip, Animation, SilentSound
+from Scripts.Atlas import Atlas
 from Scripts.Tilemap import Tilemap
-from Scripts.Particles import Particle
-from Scripts.Sparks import Spark
+from Scripts.LevelCache import LevelCache
+from Scripts.Particles import Particles
+from Scripts.Sparks import Sparks
 from Scripts.Player import Player
 from Scripts.Enemies import Enemy
+from Scripts.Projectiles import PROJECTILE_LIFETIME, PROJECTILE_SPEED
+from Scripts.EnemyStore import EnemyStore
+from Scripts.Broadphase import Broadphase
+from Scripts.RandomStreams import RandomStreams
+from Scripts.RenderQueue import RenderQueue
+from Scripts.Presenter import Presenter
 from Scripts.States.StateManager import State
 from Scripts.States.TitleMenu import TitleMenu
 from Scripts.States.OptionsMenu import OptionsMenu
@@ -16,18 +23,24 @@ from Scripts.States.EndScreen import EndScreen
 
 
 class Game(State):
-    def __init__(self, game):
+    def __init__(self, game, headless=False, seed=None):
         pygame.init()
         super().__init__(game)
+        # Seeded random numbers, a headless game given the same seed and inputs plays out exactly the same
+        self.random = RandomStreams(seed)
 
         self.Fullscreen = False
+        # A headless game never opens a window or plays a sound, it is stepped by Scripts/Headless.py instead of Run
+        self.headless = headless
 
         # Screen represents the window of the game, while the display is the surface we render on
-        self.screen = game.screen
+        self.screen = None if headless else game.screen
+        self.presenter = None if headless else game.presenter   # Scales the display up onto the screen
         # Set the size of the surface based on the amount the pixel art will scale up(for display)
         self.display = pygame.Surface((533, 300))
         self.opacityDisplay = pygame.Surface(self.display.get_size(), pygame.SRCALPHA)
-        pygame.display.set_caption("Dystopia")
+        if not headless:
+            pygame.display.set_caption("Dystopia")
 
         # To set the frame rate later on in Run()
         self.clock = pygame.time.Clock()
@@ -38,49 +51,47 @@ class Game(State):
             'health_bar': LoadImage('UI/health_bar.png', colorkey=(255, 255, 255))
         }
 
+        # The sprites and tiles are packed into a few big surfaces, cached in Data/Atlas (see Scripts/Atlas.py)
+        self.atlas = Atlas(ATLAS_SOURCES)
+        self.atlas.Load()
+        atlas = self.atlas
         self.assets = {
             'logo': pygame.image.load('Data/Logo/Logo.png'),
-            'ground_tiles': LoadImages('Tiles/Dungeon Tileset/Castle Tiles/Ground Tiles'),
-            'wall_tiles': LoadImages('Tiles/Dungeon Tileset/Castle Tiles/Wall Tiles'),
-            'platform': LoadImages('Tiles/Dungeon Tileset/Castle Tiles/Platform'),
-            'props': LoadImages('Tiles/Dungeon Tileset/Castle Tiles/Props'),
-            'healers': LoadImages('Tiles/mushroom caves assets/foreground/Healers'),
-            'level_transition': LoadImages('Tiles/mushroom caves assets/foreground/Level Transition'),
-            'extra_props': LoadImages('Tiles/Dungeon Tileset/Extra Props'),
-            'entities': LoadImages('Tiles/mushroom caves assets/foreground/Entities'),
-            'ronin': LoadImage('Animation Sprites/Ronin/Player.png'),
-            'ronin_idle': Animation(LoadImages('Animation Sprites/Ronin/Idle'), imageDuration=25),
-            'ronin_run': Animation(LoadImages('Animation Sprites/Ronin/Running'), imageDuration=8),
-            'ronin_jump': Animation(LoadImages('Animation Sprites/Ronin/Jump'), imageDuration=25, loop=False),
-            'ronin_wall_slide': Animation(LoadImages('Animation Sprites/Ronin/Wall Slide')),
-            'ronin_dash': Animation(LoadImages('Animation Sprites/Ronin/Dash'), imageDuration=5, loop=False),
-            'ronin_attack1': Animation(LoadImages('Animation Sprites/Ronin/Attack/Attack 1'), imageDuration=7,
-                                       loop=False),
-            'ronin_attack2': Animation(LoadImages('Animation Sprites/Ronin/Attack/Attack 2'), imageDuration=7,
-                                       loop=False),
-            'enemy_idle': Animation(LoadImages('Animation Sprites/Ghost Enemy/Idle'), imageDuration=30),
-            'enemy_run': Animation(LoadImages('Animation Sprites/Ghost Enemy/Running'), imageDuration=30),
-            'enemy_attack': Animation(LoadImages('Animation Sprites/Ghost Enemy/Attack'), imageDuration=15, loop=False),
-            'particle_base': Animation(LoadImages('Particles/particle'), imageDuration=6, loop=False),
+            'ground_tiles': atlas.Images('Tiles/Dungeon Tileset/Castle Tiles/Ground Tiles'),
+            'wall_tiles': atlas.Images('Tiles/Dungeon Tileset/Castle Tiles/Wall Tiles'),
+            'platform': atlas.Images('Tiles/Dungeon Tileset/Castle Tiles/Platform'),
+            'props': atlas.Images('Tiles/Dungeon Tileset/Castle Tiles/Props'),
+            'healers': atlas.Images('Tiles/mushroom caves assets/foreground/Healers'),
+            'level_transition': atlas.Images('Tiles/mushroom caves assets/foreground/Level Transition'),
+            'extra_props': atlas.Images('Tiles/Dungeon Tileset/Extra Props'),
+            'entities': atlas.Images('Tiles/mushroom caves assets/foreground/Entities'),
+            'ronin': atlas.Image('Animation Sprites/Ronin/Player.PNG'),
+            'ronin_idle': atlas.Clip('Animation Sprites/Ronin/Idle', imageDuration=25),
+            'ronin_run': atlas.Clip('Animation Sprites/Ronin/Running', imageDuration=8),
+            'ronin_jump': atlas.Clip('Animation Sprites/Ronin/Jump', imageDuration=25, loop=False),
+            'ronin_wall_slide': atlas.Clip('Animation Sprites/Ronin/Wall Slide'),
+            'ronin_dash': atlas.Clip('Animation Sprites/Ronin/Dash', imageDuration=5, loop=False),
+            'ronin_attack1': atlas.Clip('Animation Sprites/Ronin/Attack/Attack 1', imageDuration=7, loop=False),
+            'ronin_attack2': atlas.Clip('Animation Sprites/Ronin/Attack/Attack 2', imageDuration=7, loop=False),
+            'enemy_idle': atlas.Clip('Animation Sprites/Ghost Enemy/Idle', imageDuration=30),
+            'enemy_run': atlas.Clip('Animation Sprites/Ghost Enemy/Running', imageDuration=30),
+            'enemy_attack': atlas.Clip('Animation Sprites/Ghost Enemy/Attack', imageDuration=15, loop=False),
+            'particle_base': atlas.Clip('Particles/particle', imageDuration=6, loop=False),
             'background': LoadImage('Backgrounds/Dungeon Background.png'),
-            'projectile1': LoadImage('Animation Sprites/Projectiles/Type 1/tile046.png'),
-            'projectile_dissipate': Animation(LoadImages('Animation Sprites/Projectiles/Type 1'), imageDuration=1,
-                                              loop=False),
-            'gun': LoadImage('Weapons/Ghost Weapon.png')
+            'projectile1': atlas.Image('Animation Sprites/Projectiles/Type 1/tile046.png'),
+            'projectile1_flipped': atlas.Image('Animation Sprites/Projectiles/Type 1/tile046.png', mirrored=True),
+            'projectile_dissipate': atlas.Clip('Animation Sprites/Projectiles/Type 1', imageDuration=1, loop=False),
+            'gun': atlas.Image('Weapons/Ghost Weapon.PNG'),
+            'gun_flipped': atlas.Image('Weapons/Ghost Weapon.PNG', mirrored=True)
         }
+        # Every animation clip by name, entities and particles play them through Animations of their own
+        self.clips = {name: asset for name, asset in self.assets.items() if isinstance(asset, AnimationClip)}
+        self.dissipation = Animation(self.assets['projectile_dissipate'])   # Shared by the dissipating projectiles
 
-        self.sfx = {
-            'jump': pygame.mixer.Sound('Data/SFX/jump.wav'),
-            'dash': pygame.mixer.Sound('Data/SFX/dash.wav'),
-            'player_hit': pygame.mixer.Sound('Data/SFX/hit.wav'),
-            'enemy_hit': pygame.mixer.Sound('Data/SFX/sword_hit.mp3'),
-            'shoot': pygame.mixer.Sound('Data/SFX/enemy_shoot.mp3'),
-            'ambience': pygame.mixer.Sound('Data/SFX/ambience.wav'),
-            'sword': pygame.mixer.Sound('Data/SFX/sword.wav'),
-            'player_death': pygame.mixer.Sound('Data/SFX/death.mp3'),
-            'low_health': pygame.mixer.Sound('Data/SFX/low_health.mp3'),
-            'running': pygame.mixer.Sound('Data/SFX/running.mp3'),
-        }
+        if headless:
+            self.sfx = {name: SilentSound() for name in SOUNDS}
+        else:
+            self.sfx = {name: pygame.mixer.Sound(path) for name, path in SOUNDS.items()}
 
         self.sfx['ambience'].set_volume(0.05)
         self.sfx['shoot'].set_volume(0.4)
@@ -103,24 +114,36 @@ class Game(State):
         #     self.assets['background'][i] = pygame.transform.scale(self.assets['background'][i], self.display.get_size())
         self.assets['background'] = pygame.transform.scale(self.assets['background'], self.display.get_size())
 
-        # Setting up the particles
-        self.particles = []
+        # Setting up the particles, kept in arrays and stepped all at once (see Scripts/Particles.py)
+        self.particles = Particles(self, PARTICLE_CAPACITY)
 
         # Setting up the enemy projectiles
         self.projectiles = []
+        self.dissipating = []   # Projectiles that ran out of time on the last step, until they are drawn
 
         # The spark visual effects for hits
-        self.sparks = []
+        self.sparks = Sparks(SPARK_CAPACITY)
+
+        # Sets up all the enemies, their state is kept in the store's arrays and updated all at once
+        self.enemyStore = EnemyStore(self)
+        self.enemies = self.enemyStore.enemies
+        # Uniform grids for finding the enemies and projectiles that overlap a hitbox (see Scripts/Broadphase.py)
+        self.enemyBroadphase = Broadphase()
+        self.projectileBroadphase = Broadphase()
 
-        # Sets up all the enemies
-        self.enemies = []
+        # Each frame's sprites are drawn a layer at a time (see Scripts/RenderQueue.py)
+        self.renderQueue = RenderQueue(RENDER_LAYERS)
 
         # For setting up the camera
         self.scroll = [0, 0]
+        self.previousScroll = [0, 0]    # Scroll at the previous step, for interpolating between steps
         self.backgroundScroll = 0
+        # Enemies further than this many pixels outside the camera's view sleep
+        self.activeMargin = ACTIVE_MARGIN
 
         # Setting up the tile system for the level design
         self.tilemap = Tilemap(self, tileSize=25)
+        self.levelCache = LevelCache(self)
         self.level = 0
         self.transition = -30   # Sets the screen to black at initial state of transition
         self.LoadLevel(self.level)
@@ -129,6 +152,9 @@ class Game(State):
 
         # Adding screenshake for visual effect:
         self.screenshake = 0
+        self.hitFlash = False   # Set when the player is hit, the next frame is drawn with a red flash
+        self.hitstop = 0    # Steps left of the freeze after the player is hit
+        self.running = False
 
         # Frame rate Independence
         self.deltaTime = 0
@@ -141,23 +167,32 @@ class Game(State):
 
     def LoadLevel(self, level):
         self.changeLevel = False
-        self.tilemap.load('Data/Levels/' + str(level) + '.json')
+        # Levels are only read from disk the first time, respawning restores the cached level
+        spawners = self.levelCache.Load(level, self.tilemap)
 
         # Resetting the following things for the new level
         self.player = Player(self, position=(200, 50), size=(20, 25))
         self.movement = [False, False]
-        self.enemies = []
-        for spawner in self.tilemap.Extract([('entities', 0), ('entities', 1)]):
+        self.enemyStore.Clear()
+        for spawner in spawners:
             if spawner['variant'] == 0:
                 self.player.position = spawner['position']
                 self.player.airtime = 0
             else:
-                self.enemies.append(Enemy(self, spawner['position'], (20, 25)))
+                Enemy(self, spawner['position'], (20, 25))   # Adds itself to the enemy store
+        # The first frame interpolates from the previous positions, so they start at the spawns too
+        self.player.SavePosition()
+        self.enemyStore.SavePositions()
+        self.enemyStore.FillBroadphase(self.enemyBroadphase)
+        # Reads the next level in the background while this one is played
+        self.levelCache.Preload(level + 1)
 
         self.projectiles = []
+        self.dissipating = []
         self.scroll = [0, 0]
-        self.sparks = []
-        self.particles = []
+        self.previousScroll = [0, 0]
+        self.sparks.Clear()
+        self.particles.Clear()
         self.dead = 0
         self.transition = -50
         self.backgroundScroll = 0
@@ -170,224 +205,297 @@ class Game(State):
         pygame.mixer.music.set_volume(0.05)
         pygame.mixer.music.play(-1)
 
-        running = True
-        while running:
-            # Keeping frame rate independence:
+        # The game is simulated in fixed steps of 1 / STEP_RATE seconds, however long each rendered frame takes, so
+        # the game plays at the same speed at any frame rate. The accumulator holds the time not simulated yet
+        self.running = True
+        self.GetDeltaTime()
+        accumulator = 0
+        while self.running:
             self.GetDeltaTime()
+            # If the machine can't keep up, the game slows down instead of trying to catch up forever
+            accumulator = min(accumulator + self.deltaTime, MAX_STEPS_PER_FRAME / STEP_RATE)
 
-            # Finds how far away the player is from the display and sets the scroll value (takes 1/30th of the distance)
-            self.scroll[0] += (self.player.Rectangle().centerx - self.display.get_width() / 2 - self.scroll[0]) / 10
-            self.scroll[1] += (self.player.Rectangle().centery - self.display.get_width() / 3 - self.scroll[1]) / 10
-            # To prevent sub-pixel collisions
-            renderScroll = (int(self.scroll[0]), int(self.scroll[1]))
-
-            # backgroundTiles = math.ceil(self.display.get_width() / self.assets['background'][0].get_width()) + 1
-            # for i in range(0, backgroundTiles):
-            #     speed = 1
-            #     for background in self.assets['background']:
-            #         self.display.blit(background,
-            #                           ((i * background.get_width()) - self.backgroundScroll * speed, 0))
-            #         speed += 0.25
-            # if backgroundScrollLeft and self.backgroundScroll > 0:
-            #     self.backgroundScroll -= 0.25
-            # if backgroundScrollRight:
-            #     self.backgroundScroll += 0.25
-            # self.opacityDisplay.fill((0, 0, 0, 100))
-            # self.display.blit(self.opacityDisplay, (0, 0))
-
-            self.display.blit(self.assets['background'], (0, 0))
-
-            # Setting all the possible values for the screenshake
-            self.screenshake = max(0, self.screenshake - 1)  # Minimum value goes until 0
-
-            if self.changeLevel:       # The base condition for level change
-                self.transition += 1
-                if self.transition > 30:
-                    self.level += 1
-                    if self.level < 3:
-                        self.LoadLevel(self.level)
-                    else:
-                        self.gameFinish = True
-                        running = False
-            # Automatically raises the transition from -10 to 0 each frame, giving a transition effect from black
-            if self.transition < 0:
-                self.transition += 1
+            self.HandleEvents()
+            while accumulator >= 1 / STEP_RATE and self.running:
+                self.Step()
+                accumulator -= 1 / STEP_RATE
 
-            # If the player has started dying
-            if self.dead:
-                self.sfx['player_death'].play()
-                self.dead += 1      # At every frame add one more to the timer for the players death
-                self.sfx['player_death'].set_volume(1 - (self.dead * 0.01))
-                if self.dead > 100:          # Once timer reaches 40 frames, reload the level
-                    self.transition += 1
-                    if self.transition > 50:
-                        self.LoadLevel(self.level)
-
-            # Render in the tilemap so with camera scroll
-            self.tilemap.Render(self.display, offset=renderScroll)
-
-            # Rendering in and updating the enemy movement
-            for enemy in self.enemies.copy():
-                hit = enemy.Update(self.tilemap, (0, 0))
-                enemy.Render(self.display, offset=renderScroll)
-                if hit:
-                    enemy.GetDamage(25)
-                    if enemy.targetHealth <= 0:
-                        self.enemies.remove(enemy)
-
-            # We call the functions from PhysicalEntity to update the players movement and then render them on screen
-            if not self.dead:
-                self.player.Update(self.tilemap, (self.movement[1] - self.movement[0], 0))
-                self.player.Render(self.display, offset=renderScroll)
-
-            # The projectile list is arranged as [[x, y]], flip, direction, timer]
-            for projectile in self.projectiles.copy():
-                projectile[0][0] += projectile[2]
-                projectile[3] += 1
-                image = self.assets['projectile1']
-                self.display.blit(pygame.transform.flip(image, projectile[1], False),
-                                  (projectile[0][0] - 32 / 2 - renderScroll[0],
-                                   projectile[0][1] - 28 / 2 - renderScroll[1]))
-                if self.tilemap.SolidCheck(projectile[0]):
-                    self.projectiles.remove(projectile)     # Removes the projectiles if they hit the wall
-                    for i in range(0, 4):
-                        self.sparks.append(
-                            Spark(projectile[0], random.random() - 0.5 + (math.pi if projectile[2] > 0 else 0),
-                                  2 + random.random())
-                        )
-                elif projectile[3] > 200:
-                    for i in range(0, len(self.assets['projectile_dissipate'].images)):
-                        self.display.blit(pygame.transform.flip(self.assets['projectile_dissipate'].Image(),
-                                                                projectile[1], False),
-                                          (projectile[0][0] - 32 / 2 - renderScroll[0],
-                                           projectile[0][1] - 32 / 2 - renderScroll[1]))
-                        self.assets['projectile_dissipate'].Update()
-                    self.projectiles.remove(
-                        projectile)  # Removes the projectiles if they last longer than 6 seconds
-                elif abs(self.player.dashing) < 50:     # Checks if the player is not dashing
-                    if self.player.Rectangle().collidepoint(projectile[0]):     # If projectile and player collide
-                        self.sfx['player_hit'].play()
-                        self.projectiles.remove(projectile)
-                        self.display.fill((200, 0, 0, 100))
-                        pygame.time.wait(50)
-                        isDead = self.player.GetDamage(25)
-                        if self.player.targetHealth <= 25 and not isDead:
-                            self.sfx['low_health'].play()
-                        if isDead:
-                            self.sfx['low_health'].set_volume(0)
-                            self.dead += 1
-                            self.screenshake = max(20, self.screenshake)  # Shakes the screen when the player gets hit
-                            if self.dead == 1:
-                                for i in range(0, 30):
-                                    angle = random.random() * math.pi * 2
-                                    speed = random.random() * 5
-                                    self.sparks.append(
-                                        Spark(self.player.Rectangle().center, angle, 2 + random.random()))
-                                    self.particles.append(Particle(self, 'base', self.player.Rectangle().center,
-                                                                   velocity=[math.cos(angle + math.pi) * speed * 0.5,
-                                                                             math.sin(angle + math.pi) * speed * 0.5],
-                                                                   frame=random.randint(0, 7)))
-                        self.screenshake = max(16, self.screenshake)    # Shakes the screen when the player gets hit
-                        for i in range(0, 5):
-                            angle = random.random() * math.pi * 2
-                            speed = random.random() * 5
-                            self.sparks.append(Spark(self.player.Rectangle().center, angle, 2 + random.random()))
-                            self.particles.append(Particle(self, 'base', self.player.Rectangle().center,
-                                                           velocity=[math.cos(angle + math.pi) * speed * 0.5,
-                                                                     math.sin(angle + math.pi) * speed * 0.5],
-                                                           frame=random.randint(0, 7)))
-
-            for spark in self.sparks.copy():
-                kill = spark.Update()
-                spark.Render(self.display, offset=renderScroll)
-                if kill:
-                    self.sparks.remove(spark)
-
-            for particle in self.particles.copy():
-                kill = particle.Update()
-                particle.Render(self.display, offset=renderScroll)
-                if kill:
-                    self.particles.remove(particle)
-
-            # The event handler
-            for event in pygame.event.get():
-                # if event.type == pygame.VIDEORESIZE:
-                #     if not self.Fullscreen:
-                #         self.screen = pygame.display.set_mode((event.w, event.h), pygame.RESIZABLE)
-                if event.type == pygame.QUIT:
-                    pygame.quit()
-                if event.type == pygame.KEYDOWN:
-                    # if event.key == pygame.K_F11:
-                    #     self.Fullscreen = not self.Fullscreen
-                    #     if self.Fullscreen:
-                    #         self.screen = pygame.display.set_mode((self.screen.get_width(),
-                    #                                                self.screen.get_height()), pygame.FULLSCREEN)
-                    #     else:
-                    #         self.screen = pygame.display.set_mode((self.screen.get_width(),
-                    #                                                self.screen.get_height()), pygame.RESIZABLE)
-                    # if not self.player.attacking:
-                    if event.key == pygame.K_a or event.key == pygame.K_LEFT:
-                        self.movement[0] = True
-                        backgroundScrollLeft = True
-                    if event.key == pygame.K_d or event.key == pygame.K_RIGHT:
-                        self.movement[1] = True
-                        backgroundScrollRight = True
-                    if event.key == pygame.K_SPACE or event.key == pygame.K_w or event.key == pygame.K_UP:
-                        if self.player.Jump():
-                            self.sfx['jump'].play()
-                    if event.key == pygame.K_l:
-                        self.player.Dash()
-                    if event.key == pygame.K_ESCAPE:
-                        running = False
-                    if event.key == pygame.K_j:
-                        if not self.dead:
-                            self.player.attackCount += 1
-                            thisAttackHitbox = self.player.Attack()
-                            for enemy in self.enemies:
-                                enemy.TakeDamage(thisAttackHitbox)
-                    if event.key == pygame.K_ESCAPE:
-                        running = False
-                    if event.key == pygame.K_n:
-                        if not self.changeLevel:
-                            self.changeLevel = True
-                        else:
-                            self.changeLevel = False
-                    if event.key == pygame.K_b:
-                        if not self.changeLevel:
-                            self.level -= 1
-                            self.changeLevel = True
-                        else:
-                            self.changeLevel = False
-                if event.type == pygame.KEYUP:
-                    if event.key == pygame.K_a or event.key == pygame.K_LEFT:
-                        self.movement[0] = False
-                        backgroundScrollLeft = False
-                    if event.key == pygame.K_d or event.key == pygame.K_RIGHT:
-                        self.movement[1] = False
-                        backgroundScrollRight = False
-
-            # Setting up all the UI
-            # self.display.blit(self.assetsUI['health_bar'], (20, 10))
-
-            # self.display.blit(pygame.transform.scale_by(self.assetsUI['health_bar'], 2), (0, 0))
-
-            # Sets up the transition effect for the death and changing levels
-            if self.transition:
-                transitionSurface = pygame.Surface(self.display.get_size())
-                pygame.draw.circle(transitionSurface, (255, 255, 255), (self.display.get_width() // 2,
-                                                                        self.display.get_height() // 2),
-                                   (50 - abs(self.transition)) * 8)
-                transitionSurface.set_colorkey((255, 255, 255))
-                self.display.blit(transitionSurface, (0, 0))
-
-            screenshakeOffset = (random.random() * self.screenshake - self.screenshake / 2,
-                                 random.random() * self.screenshake - self.screenshake / 2)
+            # Draws the world part of the way between the last two steps, by how much of a step is left over
+            self.Render(self.display, accumulator * STEP_RATE)
+            cosmetic = self.random.cosmetic
+            screenshakeOffset = (cosmetic.random() * self.screenshake - self.screenshake / 2,
+                                 cosmetic.random() * self.screenshake - self.screenshake / 2)
 
             # Pastes the display onto the window(screen) and ticks the clock at the appropriate FPS
-            self.screen.blit(pygame.transform.scale(self.display, self.screen.get_size()), screenshakeOffset)
+            self.presenter.Present(self.display, screenshakeOffset)
             self.clock.tick(self.fps)
             pygame.display.update()
 
+    def HandleEvents(self):
+        # The event handler
+        for event in pygame.event.get():
+            if event.type == pygame.VIDEORESIZE:
+                self.presenter.Resize()
+            # if event.type == pygame.VIDEORESIZE:
+            #     if not self.Fullscreen:
+            #         self.screen = pygame.display.set_mode((event.w, event.h), pygame.RESIZABLE)
+            if event.type == pygame.QUIT:
+                pygame.quit()
+            if event.type == pygame.KEYDOWN:
+                # if event.key == pygame.K_F11:
+                #     self.Fullscreen = not self.Fullscreen
+                #     if self.Fullscreen:
+                #         self.screen = pygame.display.set_mode((self.screen.get_width(),
+                #                                                self.screen.get_height()), pygame.FULLSCREEN)
+                #     else:
+                #         self.screen = pygame.display.set_mode((self.screen.get_width(),
+                #                                                self.screen.get_height()), pygame.RESIZABLE)
+                if event.key in KEY_ACTIONS:
+                    self.Press(KEY_ACTIONS[event.key])
+            if event.type == pygame.KEYUP:
+                if event.key in KEY_ACTIONS:
+                    self.Release(KEY_ACTIONS[event.key])
+
+    def Press(self, action):
+        # Keys are turned into actions (see KEY_ACTIONS) so a script can play the game the same way a player does
+        # if not self.player.attacking:
+        if action == 'left':
+            self.movement[0] = True
+        if action == 'right':
+            self.movement[1] = True
+        if action == 'jump':
+            if self.player.Jump():
+                self.sfx['jump'].play()
+        if action == 'dash':
+            self.player.Dash()
+        if action == 'quit':
+            self.running = False
+        if action == 'attack':
+            if not self.dead:
+                self.player.attackCount += 1
+                thisAttackHitbox = self.player.Attack()
+                for enemy in self.enemyBroadphase.Query(thisAttackHitbox):
+                    enemy.TakeDamage(thisAttackHitbox)
+        if action == 'next_level':
+            if not self.changeLevel:
+                self.changeLevel = True
+            else:
+                self.changeLevel = False
+        if action == 'previous_level':
+            if not self.changeLevel:
+                self.level -= 1
+                self.changeLevel = True
+            else:
+                self.changeLevel = False
+
+    def Release(self, action):
+        if action == 'left':
+            self.movement[0] = False
+        if action == 'right':
+            self.movement[1] = False
+
+    def ActiveArea(self):
+        # The part of the level where enemies are awake: the camera's view and activeMargin pixels around it
+        return pygame.Rect(self.scroll[0], self.scroll[1], *self.display.get_size()).inflate(
+            self.activeMargin * 2, self.activeMargin * 2)
+
+    def Step(self):
+        # Advances the game by one fixed step. Nothing is drawn here, see Render
+        # Remembers where everything was so Render can draw them between this step and the next
+        self.previousScroll = list(self.scroll)
+        self.player.SavePosition()
+        self.enemyStore.SavePositions()
+        # Only the projectiles that run out of time this step are drawn fading out, so the list can't grow when
+        # nothing is drawn (headless runs)
+        self.dissipating.clear()
+
+        # A hitstop freezes the game for a few steps when the player is hit
+        if self.hitstop:
+            self.hitstop -= 1
+            return
+
+        # Finds how far away the player is from the display and sets the scroll value (takes 1/30th of the distance)
+        self.scroll[0] += (self.player.Bounds().centerx - self.display.get_width() / 2 - self.scroll[0]) / 10
+        self.scroll[1] += (self.player.Bounds().centery - self.display.get_width() / 3 - self.scroll[1]) / 10
+
+        # Setting all the possible values for the screenshake
+        self.screenshake = max(0, self.screenshake - 1)  # Minimum value goes until 0
+
+        if self.changeLevel:       # The base condition for level change
+            self.transition += 1
+            if self.transition > 30:
+                self.level += 1
+                if self.level < 3:
+                    self.LoadLevel(self.level)
+                else:
+                    self.gameFinish = True
+                    self.running = False
+        # Automatically raises the transition from -10 to 0 each frame, giving a transition effect from black
+        if self.transition < 0:
+            self.transition += 1
+
+        # If the player has started dying
+        if self.dead:
+            self.sfx['player_death'].play()
+            self.dead += 1      # At every frame add one more to the timer for the players death
+            self.sfx['player_death'].set_volume(1 - (self.dead * 0.01))
+            if self.dead > 100:          # Once timer reaches 40 frames, reload the level
+                self.transition += 1
+                if self.transition > 50:
+                    self.LoadLevel(self.level)
+
+        # Updating the enemy movement, every enemy near the camera at once
+        for enemy in self.enemyStore.Update(self.tilemap, self.ActiveArea()):
+            enemy.GetDamage(25)
+            if enemy.targetHealth <= 0:
+                self.enemyStore.Remove(enemy)
+        # The attacks and dashes until the next step are tested against where the enemies are now
+        self.enemyStore.FillBroadphase(self.enemyBroadphase)
+
+        # We call the functions from PhysicalEntity to update the players movement
+        if not self.dead:
+            self.player.Update(self.tilemap, (self.movement[1] - self.movement[0], 0))
+
+        # A projectile's impact frame is worked out with a raycast when it is fired (see Enemy.ImpactFrame)
+        # instead of checking the tilemap every frame. The ones still flying go in the broadphase to find the ones
+        # that hit the player
+        self.projectileBroadphase.Clear()
+        cosmetic = self.random.cosmetic
+        for projectile in self.projectiles.copy():
+            projectile.Update()
+            if projectile.timer == projectile.impactFrame:
+                self.projectiles.remove(projectile)     # Removes the projectiles if they hit the wall
+                for i in range(0, 4):
+                    self.sparks.Spawn(projectile.position,
+                                      cosmetic.random() - 0.5 + (math.pi if projectile.direction > 0 else 0),
+                                      2 + cosmetic.random())
+            elif projectile.timer > PROJECTILE_LIFETIME:
+                self.dissipating.append(projectile)     # Drawn fading out by the next Render, if there is one
+                self.projectiles.remove(
+                    projectile)  # Removes the projectiles if they last longer than 6 seconds
+            else:
+                self.projectileBroadphase.InsertPoint(projectile, projectile.position)
+        if abs(self.player.dashing) < 50:     # Checks if the player is not dashing
+            for projectile in self.projectileBroadphase.Query(self.player.Bounds()):    # The ones hitting the player
+                self.sfx['player_hit'].play()
+                self.projectiles.remove(projectile)
+                self.hitFlash = True
+                self.hitstop = HITSTOP_STEPS
+                isDead = self.player.GetDamage(25)
+                if self.player.targetHealth <= 25 and not isDead:
+                    self.sfx['low_health'].play()
+                if isDead:
+                    self.sfx['low_health'].set_volume(0)
+                    self.dead += 1
+                    self.screenshake = max(20, self.screenshake)  # Shakes the screen when the player gets hit
+                    if self.dead == 1:
+                        for i in range(0, 30):
+                            angle = cosmetic.random() * math.pi * 2
+                            speed = cosmetic.random() * 5
+                            self.sparks.Spawn(self.player.Rectangle().center, angle, 2 + cosmetic.random())
+                            self.particles.Spawn('base', self.player.Rectangle().center,
+                                                 velocity=[math.cos(angle + math.pi) * speed * 0.5,
+                                                           math.sin(angle + math.pi) * speed * 0.5],
+                                                 frame=cosmetic.randint(0, 7))
+                self.screenshake = max(16, self.screenshake)    # Shakes the screen when the player gets hit
+                for i in range(0, 5):
+                    angle = cosmetic.random() * math.pi * 2
+                    speed = cosmetic.random() * 5
+                    self.sparks.Spawn(self.player.Rectangle().center, angle, 2 + cosmetic.random())
+                    self.particles.Spawn('base', self.player.Rectangle().center,
+                                         velocity=[math.cos(angle + math.pi) * speed * 0.5,
+                                                   math.sin(angle + math.pi) * speed * 0.5],
+                                         frame=cosmetic.randint(0, 7))
+
+        self.sparks.Update()
+        self.particles.Update()
+
+    def Render(self, surface, interpolation=1):
+        # Draws the game as it was interpolation of the way from the previous step to the current one
+        scroll = (self.previousScroll[0] + (self.scroll[0] - self.previousScroll[0]) * interpolation,
+                  self.previousScroll[1] + (self.scroll[1] - self.previousScroll[1]) * interpolation)
+        # To prevent sub-pixel collisions
+        renderScroll = (int(scroll[0]), int(scroll[1]))
+
+        # backgroundTiles = math.ceil(self.display.get_width() / self.assets['background'][0].get_width()) + 1
+        # for i in range(0, backgroundTiles):
+        #     speed = 1
+        #     for background in self.assets['background']:
+        #         self.display.blit(background,
+        #                           ((i * background.get_width()) - self.backgroundScroll * speed, 0))
+        #         speed += 0.25
+        # if backgroundScrollLeft and self.backgroundScroll > 0:
+        #     self.backgroundScroll -= 0.25
+        # if backgroundScrollRight:
+        #     self.backgroundScroll += 0.25
+        # self.opacityDisplay.fill((0, 0, 0, 100))
+        # self.display.blit(self.opacityDisplay, (0, 0))
+
+        # The sprites are queued by layer and drawn a layer at a time when the queue is submitted
+        queue = self.renderQueue
+        queue.Begin()
+        queue.Add('background', self.assets['background'], (0, 0))
+
+        # Render in the tilemap so with camera scroll
+        queue.Extend('tiles', self.tilemap.VisibleChunks(surface.get_size(), renderScroll))
+
+        showingHealth = []
+        for enemy in self.enemies:
+            if enemy.awake:     # Sleeping enemies are out of view
+                enemyOffset = enemy.InterpolatedOffset(renderScroll, interpolation)
+                queue.Add('enemies', *enemy.Sprite(enemyOffset))
+                queue.Add('guns', *enemy.GunSprite(enemyOffset))
+                if enemy.showingHealth:
+                    showingHealth.append((enemy, enemyOffset))
+
+        if not self.dead:
+            queue.Add('player', *self.player.Sprite(self.player.InterpolatedOffset(renderScroll, interpolation)))
+
+        images = (self.assets['projectile1'], self.assets['projectile1_flipped'])  # Indexed by projectile.flip
+        for projectile in self.projectiles:
+            queue.Add('projectiles', images[projectile.flip],
+                      (projectile.position[0] - projectile.direction * (1 - interpolation) - 32 / 2 -
+                       renderScroll[0],
+                       projectile.position[1] - 28 / 2 - renderScroll[1]))
+        for projectile in self.dissipating:
+            for i in range(0, len(self.dissipation.clip.images)):
+                queue.Add('projectiles', self.dissipation.Image(projectile.flip),
+                          (projectile.position[0] - 32 / 2 - renderScroll[0],
+                           projectile.position[1] - 32 / 2 - renderScroll[1]))
+                self.dissipation.Update()
+        self.dissipating.clear()
+        queue.Submit(surface)
+
+        # The health bars go over every enemy
+        for enemy, enemyOffset in showingHealth:
+            enemy.HealthBar(surface, enemyOffset)
+
+        if self.hitFlash:
+            surface.fill((200, 0, 0, 100))
+            self.hitFlash = False
+
+        self.sparks.Render(surface, offset=renderScroll)
+        queue.Extend('particles', self.particles.Sprites(renderScroll))
+        queue.Submit(surface)
+
+        # The player's health bar goes over everything but the transition
+        if not self.dead:
+            self.player.HealthBar(surface)
+
+        # Setting up all the UI
+        # self.display.blit(self.assetsUI['health_bar'], (20, 10))
+
+        # self.display.blit(pygame.transform.scale_by(self.assetsUI['health_bar'], 2), (0, 0))
+
+        # Sets up the transition effect for the death and changing levels
+        if self.transition:
+            transitionSurface = pygame.Surface(surface.get_size())
+            pygame.draw.circle(transitionSurface, (255, 255, 255), (surface.get_width() // 2,
+                                                                    surface.get_height() // 2),
+                               (50 - abs(self.transition)) * 8)
+            transitionSurface.set_colorkey((255, 255, 255))
+            surface.blit(transitionSurface, (0, 0))
+
 
 class GameLoop:
     def __init__(self):
@@ -395,6 +503,7 @@ class GameLoop:
         self.clock = pygame.time.Clock()
         self.screen = pygame.display.set_mode((1280, 720), pygame.RESIZABLE)
         self.display = pygame.Surface((640, 360))
+        self.presenter = Presenter(self.screen)
         self.Fullscreen = False
 
         self.running, self.playing = True, True
@@ -429,7 +538,7 @@ class GameLoop:
                 self.actions["Start_Game"] = True
             elif self.actions['End_Screen']:
                 self.states[2].Render(self.display)
-        self.screen.blit(pygame.transform.scale(self.display, self.screen.get_size(), ), (0, 0))
+        self.presenter.Present(self.display)
 
     def Run(self):
         pygame.display.set_icon(self.mainGame.assets['logo'])
@@ -447,6 +556,7 @@ class GameLoop:
                 if event.type == pygame.VIDEORESIZE:
                     if not self.Fullscreen:
                         self.screen = pygame.display.set_mode((event.w, event.h), pygame.RESIZABLE)
+                    self.presenter.Resize(self.screen)
                 if event.type == pygame.QUIT:
                     self.playing = False
                 if event.type == pygame.KEYDOWN:
@@ -458,6 +568,7 @@ class GameLoop:
                         else:
                             self.screen = pygame.display.set_mode((self.screen.get_width(),
                                                                    self.screen.get_height()), pygame.RESIZABLE)
+                        self.presenter.Resize(self.screen)
                     if event.key == pygame.K_RETURN:
                         if not self.actions['End_Screen']:
                             self.actions["Main_Menu"] = False
@@ -489,5 +600,63 @@ class GameLoop:
 
 
 # main
-game = GameLoop()
-game.Run()
+SOUNDS = {
+    'jump': 'Data/SFX/jump.wav',
+    'dash': 'Data/SFX/dash.wav',
+    'player_hit': 'Data/SFX/hit.wav',
+    'enemy_hit': 'Data/SFX/sword_hit.mp3',
+    'shoot': 'Data/SFX/enemy_shoot.mp3',
+    'ambience': 'Data/SFX/ambience.wav',
+    'sword': 'Data/SFX/sword.wav',
+    'player_death': 'Data/SFX/death.mp3',
+    'low_health': 'Data/SFX/low_health.mp3',
+    'running': 'Data/SFX/running.mp3',
+}
+# Keys -> the actions they do in Game.Press and Game.Release
+KEY_ACTIONS = {
+    pygame.K_a: 'left', pygame.K_LEFT: 'left',
+    pygame.K_d: 'right', pygame.K_RIGHT: 'right',
+    pygame.K_SPACE: 'jump', pygame.K_w: 'jump', pygame.K_UP: 'jump',
+    pygame.K_l: 'dash',
+    pygame.K_j: 'attack',
+    pygame.K_ESCAPE: 'quit',
+    pygame.K_n: 'next_level',
+    pygame.K_b: 'previous_level',
+}
+STEP_RATE = 120     # Simulation steps per second, the game was tuned for one step per frame at 120 FPS
+MAX_STEPS_PER_FRAME = 8     # Most steps simulated before a frame is drawn
+HITSTOP_STEPS = 6   # Steps the game freezes for when the player is hit (50 ms)
+PARTICLE_CAPACITY = 256    # Room for effects made up front, the arrays double when a burst needs more
+SPARK_CAPACITY = 256
+RENDER_LAYERS = ('background', 'tiles', 'enemies', 'guns', 'player', 'projectiles', 'particles')   # Back to front
+# Pixels around the view where enemies stay awake. It is as far as a projectile flies, so a shot from an enemy asleep
+# further out would have dissipated before it reached the view
+ACTIVE_MARGIN = int(PROJECTILE_LIFETIME * PROJECTILE_SPEED)
+ATLAS_SOURCES = [    # Folders and images under Data/Images packed into the atlas
+    'Tiles/Dungeon Tileset/Castle Tiles/Ground Tiles',
+    'Tiles/Dungeon Tileset/Castle Tiles/Wall Tiles',
+    'Tiles/Dungeon Tileset/Castle Tiles/Platform',
+    'Tiles/Dungeon Tileset/Castle Tiles/Props',
+    'Tiles/Dungeon Tileset/Extra Props',
+    'Tiles/mushroom caves assets/foreground/Healers',
+    'Tiles/mushroom caves assets/foreground/Level Transition',
+    'Tiles/mushroom caves assets/foreground/Entities',
+    'Animation Sprites/Ronin/Player.PNG',
+    'Animation Sprites/Ronin/Idle',
+    'Animation Sprites/Ronin/Running',
+    'Animation Sprites/Ronin/Jump',
+    'Animation Sprites/Ronin/Wall Slide',
+    'Animation Sprites/Ronin/Dash',
+    'Animation Sprites/Ronin/Attack/Attack 1',
+    'Animation Sprites/Ronin/Attack/Attack 2',
+    'Animation Sprites/Ghost Enemy/Idle',
+    'Animation Sprites/Ghost Enemy/Running',
+    'Animation Sprites/Ghost Enemy/Attack',
+    'Animation Sprites/Projectiles/Type 1',
+    'Particles/particle',
+    'Weapons/Ghost Weapon.PNG',
+]
+
+if __name__ == '__main__':
+    game = GameLoop()
+    game.Run()
@@ -0,0 +1,168 @@
+import os
+import json
+
+import pygame
+
+from Scripts.Utilities import BASE_IMAGE_PATH, LoadImage, LoadImages, Mirror, AnimationClip
+
+
+class Atlas:
+    # Packs the game's sprites and tiles, and a mirrored copy of each, into a few big page surfaces, so loading the
+    # game reads a few files instead of hundreds. The images handed out are copied out of the pages (see Copy), the
+    # pages themselves are only drawn from through Region. The pages and the region table are cached on disk and
+    # only packed again when a source image changes, see Load
+    def __init__(self, sources):
+        self.sources = sources  # Folders and files under BASE_IMAGE_PATH
+        self.cachePath = CACHE_PATH
+        self.pageSize = PAGE_SIZE
+        self.pages = []
+        self.folders = {}   # Folder -> its image paths, sorted like LoadImages
+        self.regions = {}   # Image path -> (page, x, y, width, height), the mirrored image is right of it
+        self.images = {}    # Image path -> (image, mirrored image)
+        self.signature = []
+
+    def Load(self):
+        # Loads the atlas from the cache, or packs it and caches it if the cache is missing or out of date
+        self.signature = self.Signature()
+        if not self.LoadCache():
+            self.Pack()
+            self.SaveCache()
+        for path, (page, x, y, width, height) in self.regions.items():
+            self.images[path] = (self.Copy(page, (x, y, width, height)),
+                                 self.Copy(page, (x + width, y, width, height)))
+
+    def Copy(self, page, area):
+        # Blitting a subsurface of a page is about half as fast as blitting a surface of its own, so each image is
+        # copied out of the page. Run-length encoding the colour key makes the copies quicker still to draw
+        image = self.pages[page].subsurface(area).copy()
+        image.set_colorkey((0, 0, 0), pygame.RLEACCEL)
+        return image
+
+    def Signature(self):
+        # The image paths with their sizes and modification times, the cache is only used while they all match
+        self.folders = {}
+        signature = []
+        for source in self.sources:
+            if os.path.isdir(BASE_IMAGE_PATH + source):
+                paths = [source + '/' + name for name in sorted(os.listdir(BASE_IMAGE_PATH + source))]
+                self.folders[source] = paths
+            else:
+                paths = [source]
+            for path in paths:
+                stat = os.stat(BASE_IMAGE_PATH + path)
+                signature.append([path, stat.st_size, stat.st_mtime_ns])
+        return signature
+
+    def Pack(self):
+        # Shelf packing: the images go tallest first, left to right along shelves as tall as their first image,
+        # and a new page is started once a shelf doesn't fit. Each image takes twice its width, for its mirror
+        images = {}
+        for path, size, modified in self.signature:
+            if path not in images:
+                image = pygame.image.load(BASE_IMAGE_PATH + path)
+                image.set_alpha(None)   # Copies the pixels as they are, like LoadImage's convert
+                images[path] = image
+        self.pages = []
+        self.regions = {}
+        page = x = y = shelfHeight = 0
+        for path in sorted(images, key=lambda path: -images[path].get_height()):
+            image = images[path]
+            width, height = image.get_size()
+            if width * 2 > self.pageSize or height > self.pageSize:
+                raise ValueError(path + ' is too big for an atlas page')
+            if x + width * 2 > self.pageSize:
+                x, y, shelfHeight = 0, y + shelfHeight, 0
+            if not self.pages or y + height > self.pageSize:
+                self.pages.append(self.NewPage())
+                page, x, y, shelfHeight = len(self.pages) - 1, 0, 0, 0
+            self.pages[page].blit(image, (x, y))
+            self.pages[page].blit(Mirror(self.pages[page].subsurface((x, y, width, height))), (x + width, y))
+            self.regions[path] = (page, x, y, width, height)
+            x += width * 2
+            shelfHeight = max(shelfHeight, height)
+        # The last page is cut down to its last shelf, there's no point loading and keeping the empty rows
+        if self.pages:
+            self.pages[-1] = self.pages[-1].subsurface((0, 0, self.pageSize, y + shelfHeight)).copy()
+        self.Prepare()
+
+    def NewPage(self):
+        # Black is the colour key of every image in the atlas, so the unused parts of a page are black too
+        page = pygame.Surface((self.pageSize, self.pageSize))
+        page.fill((0, 0, 0))
+        return page
+
+    def Prepare(self):
+        # Converts the pages to the screen's format once there is a screen, and sets the colour key LoadImage sets
+        for i, page in enumerate(self.pages):
+            if pygame.display.get_surface():
+                page = page.convert()
+            page.set_colorkey((0, 0, 0))
+            self.pages[i] = page
+
+    def LoadCache(self):
+        # Returns whether the atlas could be loaded from a cache made from the same images
+        try:
+            f = open(os.path.join(self.cachePath, CACHE_FILE), 'r')
+            cache = json.load(f)
+            f.close()
+        except (OSError, ValueError):
+            return False
+        if cache.get('version') != CACHE_VERSION or cache['pageSize'] != self.pageSize or \
+                cache['signature'] != self.signature:
+            return False
+        try:
+            self.pages = [pygame.image.load(os.path.join(self.cachePath, PAGE_FILE.format(i)))
+                          for i in range(cache['pages'])]
+        except (OSError, pygame.error):
+            return False
+        self.regions = {path: tuple(region) for path, region in cache['regions'].items()}
+        self.Prepare()
+        return True
+
+    def SaveCache(self):
+        # Returns whether the cache could be written. The cache only speeds up the next start, so the game carries
+        # on without it on a read-only install or a full disk. The pages are written before the file listing them,
+        # so a cache that is only partly written is never loaded
+        try:
+            os.makedirs(self.cachePath, exist_ok=True)
+            for i, page in enumerate(self.pages):
+                pygame.image.save(page, os.path.join(self.cachePath, PAGE_FILE.format(i)))
+            f = open(os.path.join(self.cachePath, CACHE_FILE), 'w')
+            try:
+                json.dump({'version': CACHE_VERSION, 'pageSize': self.pageSize, 'signature': self.signature,
+                           'pages': len(self.pages), 'regions': self.regions}, f)
+            finally:
+                f.close()
+        except (OSError, pygame.error):
+            return False
+        return True
+
+    def Region(self, path, mirrored=False):
+        # The page surface and the rectangle of the image on it, for drawing with Surface.blits
+        page, x, y, width, height = self.regions[path]
+        return self.pages[page], pygame.Rect(x + width if mirrored else x, y, width, height)
+
+    def Image(self, path, mirrored=False):
+        # Images that aren't in the atlas are loaded on their own
+        if path in self.images:
+            return self.images[path][mirrored]
+        image = LoadImage(path)
+        return Mirror(image) if mirrored else image
+
+    def Images(self, folder, mirrored=False):
+        if folder in self.folders:
+            return [self.images[path][mirrored] for path in self.folders[folder]]
+        images = LoadImages(folder)
+        return [Mirror(image) for image in images] if mirrored else images
+
+    def Clip(self, folder, imageDuration=5, loop=True):
+        # An AnimationClip of the folder's images, with its mirrored frames from the atlas
+        return AnimationClip(self.Images(folder), imageDuration, loop, flippedImages=self.Images(folder, True))
+
+
+# main
+CACHE_PATH = 'Data/Atlas'
+CACHE_FILE = 'atlas.json'
+PAGE_FILE = 'page{}.png'
+CACHE_VERSION = 1
+PAGE_SIZE = 1024
@@ -0,0 +1,51 @@
+import pygame
+
+
+class Broadphase:
+    # A uniform grid for finding what overlaps a rectangle without testing everything. Items go in with Insert
+    # (for rectangles) or InsertPoint, and Query returns the ones overlapping a rectangle, in the order they were
+    # put in. Everything in the game moves every step, so the grid is cleared and filled again each step rather
+    # than items being moved between cells
+    def __init__(self):
+        self.cellSize = CELL_SIZE
+        self.cells = {}     # (cellX, cellY) -> indices into items
+        self.items = []     # (item, pygame.Rect or (x, y) point)
+
+    def Clear(self):
+        self.cells.clear()
+        self.items.clear()
+
+    def Insert(self, item, rectangle):
+        index = len(self.items)
+        self.items.append((item, rectangle))
+        cellSize = self.cellSize
+        for cellX in range(rectangle.left // cellSize, (rectangle.right - 1) // cellSize + 1):
+            for cellY in range(rectangle.top // cellSize, (rectangle.bottom - 1) // cellSize + 1):
+                self.cells.setdefault((cellX, cellY), []).append(index)
+
+    def InsertPoint(self, item, point):
+        # The point is copied, so it is where the item was when it went in
+        index = len(self.items)
+        self.items.append((item, (point[0], point[1])))
+        self.cells.setdefault((int(point[0] // self.cellSize), int(point[1] // self.cellSize)), []).append(index)
+
+    def Query(self, rectangle):
+        # Overlapping is decided like pygame.Rect.colliderect for rectangles and collidepoint for points
+        cellSize = self.cellSize
+        found = set()
+        for cellX in range(rectangle.left // cellSize, (rectangle.right - 1) // cellSize + 1):
+            for cellY in range(rectangle.top // cellSize, (rectangle.bottom - 1) // cellSize + 1):
+                found.update(self.cells.get((cellX, cellY), ()))
+        overlapping = []
+        for index in sorted(found):
+            item, shape = self.items[index]
+            if rectangle.colliderect(shape) if isinstance(shape, pygame.Rect) else rectangle.collidepoint(shape):
+                overlapping.append(item)
+        return overlapping
+
+    def __len__(self):
+        return len(self.items)
+
+
+# main
+CELL_SIZE = 64  # Pixels, a bit more than an entity so most of them only cover one to four cells
@@ -1,84 +1,103 @@
 import pygame
 import math
-import random
-from Scripts.Particles import Particle
-from Scripts.Sparks import Spark
+from Scripts.Projectiles import Projectile, PROJECTILE_LIFETIME, PROJECTILE_SPEED
 
 from Scripts.Entities import PhysicsEntity
+from Scripts.EnemyStore import ACTIONS, COLLISION_UP, COLLISION_DOWN, COLLISION_RIGHT, COLLISION_LEFT
+
+def StoreField(name, kind=None):
+    # A property that reads and writes the enemy's row of the game's EnemyStore, converting single values to kind
+    if kind:
+        return property(lambda self: kind(getattr(self.game.enemyStore, name)[self.row]),
+                        lambda self, value: getattr(self.game.enemyStore, name).__setitem__(self.row, value))
+    return property(lambda self: getattr(self.game.enemyStore, name)[self.row],
+                    lambda self, value: getattr(self.game.enemyStore, name).__setitem__(self.row, value))
+
 
 class Enemy(PhysicsEntity):
+    # Enemies are updated all at once by the game's EnemyStore (see Scripts/EnemyStore.py), an Enemy is a view of
+    # its row there and only handles the things that happen to one enemy at a time: shooting, being hit and dying
+    __slots__ = ('row', 'loadAttack', 'attackTimer', 'stillAttacking', 'healthBarLength', 'healthRatio')
+    position = StoreField('position')
+    previousPosition = StoreField('previousPosition')
+    velocity = StoreField('velocity')
+    flip = StoreField('flip', bool)
+    walking = StoreField('walking', int)    # Timer for how long the enemy will walk for
+    targetHealth = StoreField('targetHealth', float)
+    currentHealth = StoreField('currentHealth', float)
+    showingHealth = StoreField('showingHealth', bool)
+    dead = StoreField('dead', bool)
+    awake = StoreField('awake', bool)  # Sleeping enemies are out of the game's active area (see EnemyStore.Update)
+
     def __init__(self, game, position, size, hp=100):
+        self.row = game.enemyStore.Add(self)
         super().__init__(game=game, entityType='enemy', position=position, size=size, hp=hp)
-        self.walking = 0    # Timer for how long the enemy will walk for
+        game.enemyStore.size[self.row] = size
+        self.walking = 0
         self.loadAttack = False
         self.attackTimer = 0
         self.stillAttacking = False
         self.showingHealth = False
+        self.awake = True
 
         self.currentHealth = hp
         self.healthBarLength = 50
         self.healthRatio = hp / self.healthBarLength
-        self.healthChangeSpeed = 0.5
 
         self.dead = False
 
-    def Update(self, tilemap, movement=(0, 0)):
-        if self.walking:    # If the characters walking for more than 0 seconds
-            if tilemap.SolidCheck((self.Rectangle().centerx + (-7 if self.flip else 7), self.position[1] + 25)):
-                if self.collisions['right'] or self.collisions['left']:
-                    self.flip = not self.flip
-                else:
-                    if self.flip:
-                        movement = (movement[0] - 0.15, movement[1])
-                    else:
-                        movement = (movement[0] + 0.15, movement[1])
-            else:
-                self.flip = not self.flip
-            self.walking = max(0, self.walking - 1)
-            if not self.walking:
-                distance = (self.game.player.position[0] - self.position[0],
-                            self.game.player.position[1] - self.position[1])
-                self.Attack(distance)
-        elif random.random() < 0.005:
-            self.walking = random.randint(30, 120)
-
-        if abs(self.game.player.dashing):
-            if self.Rectangle().colliderect(self.game.player.Rectangle()):
-                self.game.sfx['player_hit'].play()
-                self.GetDamage(3)
-                self.game.screenshake = max(10, self.game.screenshake)
-                self.showingHealth = True
-                for i in range(0, 5):
-                    angle = random.random() * math.pi * 2
-                    speed = random.random() * 5
-                    self.game.sparks.append(Spark(self.Rectangle().center, angle, 2 + random.random()))
-                    self.game.particles.append(Particle(self.game, 'base', self.Rectangle().center,
-                                                        velocity=[math.cos(angle + math.pi) * speed * 0.5,
-                                                                  math.sin(angle + math.pi) * speed * 0.5],
-                                                        frame=random.randint(0, 7)))
-        if self.currentHealth == 0:
-            self.dead = True
-        if self.dead:
-            for i in range(0, 30):
-                angle = random.random() * math.pi * 2
-                speed = random.random() * 5
-                self.game.sparks.append(Spark(self.Rectangle().center, angle, 2 + random.random()))
-                self.game.particles.append(Particle(self.game, 'base', self.Rectangle().center,
-                                                    velocity=[math.cos(angle + math.pi) * speed * 0.5,
-                                                              math.sin(angle + math.pi) * speed * 0.5],
-                                                    frame=random.randint(0, 7)))
-            self.game.sparks.append(Spark(self.Rectangle().center, 0, 5 + random.random()))
-            self.game.sparks.append(Spark(self.Rectangle().center, math.pi, 5 + random.random()))
-            return True
-
-        super().Update(tilemap, movement=movement)
-
-        if movement[0] != 0:
-            self.SetAction('run')
-        else:
-            self.SetAction('idle')
+    @property
+    def collisions(self):
+        row = self.game.enemyStore.collisions[self.row]
+        return {'up': bool(row[COLLISION_UP]), 'down': bool(row[COLLISION_DOWN]),
+                'right': bool(row[COLLISION_RIGHT]), 'left': bool(row[COLLISION_LEFT])}
+
+    @collisions.setter
+    def collisions(self, collisions):
+        self.game.enemyStore.collisions[self.row] = (collisions['up'], collisions['down'],
+                                                     collisions['right'], collisions['left'])
+
+    def SetAction(self, action):
+        self.game.enemyStore.action[self.row] = ACTIONS.index(action)
+        self.game.enemyStore.frame[self.row] = 0
+
+    def Image(self, flip=False):
+        # The current frame of the enemy's animation, the store keeps its action and frame
+        clip = self.game.assets['enemy_' + ACTIONS[self.game.enemyStore.action[self.row]]]
+        return (clip.flippedImages if flip else clip.images)[clip.frameIndex[self.game.enemyStore.frame[self.row]]]
+
+    def DashHit(self):
+        # Called by the store when the dashing player runs into the enemy
+        cosmetic = self.game.random.cosmetic
+        self.game.sfx['player_hit'].play()
+        self.GetDamage(3)
+        self.game.screenshake = max(10, self.game.screenshake)
+        self.showingHealth = True
+        for i in range(0, 5):
+            angle = cosmetic.random() * math.pi * 2
+            speed = cosmetic.random() * 5
+            self.game.sparks.Spawn(self.Rectangle().center, angle, 2 + cosmetic.random())
+            self.game.particles.Spawn('base', self.Rectangle().center,
+                                      velocity=[math.cos(angle + math.pi) * speed * 0.5,
+                                                math.sin(angle + math.pi) * speed * 0.5],
+                                      frame=cosmetic.randint(0, 7))
+
+    def Die(self):
+        # Called by the store on every step the enemy is dead, until the game removes it
+        cosmetic = self.game.random.cosmetic
+        for i in range(0, 30):
+            angle = cosmetic.random() * math.pi * 2
+            speed = cosmetic.random() * 5
+            self.game.sparks.Spawn(self.Rectangle().center, angle, 2 + cosmetic.random())
+            self.game.particles.Spawn('base', self.Rectangle().center,
+                                      velocity=[math.cos(angle + math.pi) * speed * 0.5,
+                                                math.sin(angle + math.pi) * speed * 0.5],
+                                      frame=cosmetic.randint(0, 7))
+        self.game.sparks.Spawn(self.Rectangle().center, 0, 5 + cosmetic.random())
+        self.game.sparks.Spawn(self.Rectangle().center, math.pi, 5 + cosmetic.random())
 
     def TakeDamage(self, playerAttackHitbox):
+        cosmetic = self.game.random.cosmetic
         if self.game.player.hit:
             if playerAttackHitbox.colliderect(self.Rectangle()):
                 self.game.sfx['enemy_hit'].play()
@@ -87,47 +106,69 @@ class Enemy(PhysicsEntity):
                 self.showingHealth = True
                 self.game.screenshake = max(10, self.game.screenshake)
                 for i in range(0, 5):
-                    angle = random.random() * math.pi * 2
-                    speed = random.random() * 5
-                    self.game.sparks.append(Spark(self.Rectangle().center, angle, 2 + random.random()))
-                    self.game.particles.append(Particle(self.game, 'base', self.Rectangle().center,
-                                                        velocity=[math.cos(angle + math.pi) * speed * 0.5,
-                                                                  math.sin(angle + math.pi) * speed * 0.5],
-                                                        frame=random.randint(0, 7)))
+                    angle = cosmetic.random() * math.pi * 2
+                    speed = cosmetic.random() * 5
+                    self.game.sparks.Spawn(self.Rectangle().center, angle, 2 + cosmetic.random())
+                    self.game.particles.Spawn('base', self.Rectangle().center,
+                                              velocity=[math.cos(angle + math.pi) * speed * 0.5,
+                                                        math.sin(angle + math.pi) * speed * 0.5],
+                                              frame=cosmetic.randint(0, 7))
 
     def Attack(self, distance):
-        if abs(distance[1]) < 16:
+        # Only shoots when there is no wall between the gun and the player
+        cosmetic = self.game.random.cosmetic
+        if abs(distance[1]) < 16 and self.game.tilemap.LineOfSight(
+                (self.Rectangle().centerx - 7, self.Rectangle().centery + 7), self.game.player.Rectangle().center):
             if self.flip and distance[0] < 0:
                 self.game.sfx['shoot'].play()
+                projectilePosition = [self.Rectangle().centerx - 7, self.Rectangle().centery + 7]
                 self.game.projectiles.append(
-                    [[self.Rectangle().centerx - 7, self.Rectangle().centery + 7], self.flip, -1.5, 0])
+                    Projectile(projectilePosition, self.flip, -PROJECTILE_SPEED,
+                               self.ImpactFrame(projectilePosition, -PROJECTILE_SPEED)))
                 for i in range(0, 4):
-                    self.game.sparks.append(
-                        Spark(self.game.projectiles[-1][0], random.random() - 0.5 + math.pi,
-                              2 + random.random())
-                    )
+                    self.game.sparks.Spawn(self.game.projectiles[-1].position, cosmetic.random() - 0.5 + math.pi,
+                                           2 + cosmetic.random())
             if not self.flip and distance[0] > 0:
                 self.game.sfx['shoot'].play()
+                projectilePosition = [self.Rectangle().centerx - 7, self.Rectangle().centery + 7]
                 self.game.projectiles.append(
-                    [[self.Rectangle().centerx - 7, self.Rectangle().centery + 7], self.flip, 1.5, 0])
+                    Projectile(projectilePosition, self.flip, PROJECTILE_SPEED,
+                               self.ImpactFrame(projectilePosition, PROJECTILE_SPEED)))
                 for i in range(0, 4):
-                    self.game.sparks.append(
-                        Spark(self.game.projectiles[-1][0], random.random() - 0.5 + math.pi,
-                              2 + random.random())
-                    )
+                    self.game.sparks.Spawn(self.game.projectiles[-1].position, cosmetic.random() - 0.5 + math.pi,
+                                           2 + cosmetic.random())
                     
 
 
+    def ImpactFrame(self, position, speed):
+        # Works out the frame a projectile moving along x by speed each frame will hit a wall on, or None if it
+        # dissipates first. The ray starts from where the projectile is after its first frame, since that is the
+        # first position the game checks
+        tilemap = self.game.tilemap
+        start = position[0] + speed
+        hit = tilemap.Raycast((start, position[1]), (speed, 0), PROJECTILE_LIFETIME * abs(speed))
+        if hit is None:
+            return None
+        distance, tileX = hit[0], hit[1][0]
+        if speed > 0:
+            frame = 1 + math.ceil(distance / speed)
+        elif tileX == start // tilemap.tileSize:
+            frame = 1   # It starts inside the wall
+        else:
+            # A projectile moving left is only inside the wall once it has gone past its right edge, so one that
+            # lands on the edge needs another frame. The ray reaches the edge at distance 0 when it starts on it
+            frame = 2 + math.floor(distance / -speed)
+        if frame <= PROJECTILE_LIFETIME + 1:
+            return frame
+
     def HealthBar(self, surface, offset=(0, 0)):
         transitionWidth = 0
         transitionColour = (255, 0, 0)
 
         if self.currentHealth < self.targetHealth:
-            self.currentHealth += self.healthChangeSpeed
             transitionWidth = int((self.targetHealth - self.currentHealth) / self.healthRatio)
             transitionColour = (0, 255, 0)
         if self.currentHealth > self.targetHealth:
-            self.currentHealth -= self.healthChangeSpeed
             transitionWidth = int((self.targetHealth - self.currentHealth) / self.healthRatio)
             transitionColour = (255, 255, 0)
 
@@ -143,15 +184,20 @@ class Enemy(PhysicsEntity):
                                                     self.position[1] - offset[1] - 32,
                                                     self.healthBarLength, 5), 1)
 
+    def Sprite(self, offset=(0, 0)):
+        return (self.Image(self.flip), (self.position[0] - offset[0] + self.animationOffset[0],
+                                        self.position[1] - offset[1] + self.animationOffset[1]))
+
+    def GunSprite(self, offset=(0, 0)):
+        # The enemy's gun and where it goes on the screen, held in front of the enemy
+        rectangle = self.Rectangle()
+        if self.flip:
+            return self.game.assets['gun_flipped'], (rectangle.centerx - 16 - offset[0],
+                                                     rectangle.centery - offset[1] - 15)
+        return self.game.assets['gun'], (rectangle.centerx - offset[0], rectangle.centery - offset[1] - 15)
+
     def Render(self, surface, offset=(0, 0)):
         if self.showingHealth:
             self.HealthBar(surface, offset)
-        super().Render(surface, offset)
-
-        if self.flip:
-            surface.blit(pygame.transform.flip(self.game.assets['gun'], True, False),
-                         (self.Rectangle().centerx - 16 - offset[0],
-                          self.Rectangle().centery - offset[1] - 15))
-        else:
-            surface.blit(self.game.assets['gun'], (self.Rectangle().centerx - offset[0],
-                                                   self.Rectangle().centery - offset[1] - 15))
+        surface.blit(*self.Sprite(offset))
+        surface.blit(*self.GunSprite(offset))
@@ -0,0 +1,402 @@
+import math
+import numpy
+import pygame
+
+
+class EnemyStore:
+    # Keeps the state of every enemy in NumPy arrays, one row per enemy, so a step updates all of them with a
+    # handful of array operations instead of a Python call per enemy. Enemy objects are views of their row (see
+    # Scripts/Enemies.py), the store only calls back into them for the rare things like shooting and dying
+    def __init__(self, game):
+        self.game = game
+        self.enemies = []   # Row -> Enemy
+        # Frames in each of the ACTIONS animations
+        self.animationLengths = numpy.array([game.assets['enemy_' + action].length for action in ACTIONS])
+        # Below this many enemies the array operations cost more than they save, so Update goes through the enemies
+        # one by one instead (see UpdateEach). Both ways give exactly the same results
+        self.batchFrom = BATCH_FROM
+        self.Allocate(STARTING_CAPACITY)
+
+    def Allocate(self, capacity):
+        # (Re)creates the arrays with room for capacity enemies, keeping the rows already in use
+        for name, (columns, dtype) in FIELDS.items():
+            array = numpy.zeros((capacity, columns) if columns else capacity, dtype=dtype)
+            if hasattr(self, name):
+                array[:len(self.enemies)] = getattr(self, name)[:len(self.enemies)]
+            setattr(self, name, array)
+        self.capacity = capacity
+
+    def Clear(self):
+        self.enemies.clear()
+
+    def Add(self, enemy):
+        # Returns the row of the new enemy, its fields are filled in through the Enemy's properties
+        if len(self.enemies) == self.capacity:
+            self.Allocate(self.capacity * 2)
+        row = len(self.enemies)
+        for name, (columns, dtype) in FIELDS.items():
+            getattr(self, name)[row] = 0
+        self.enemies.append(enemy)
+        return row
+
+    def Remove(self, enemy):
+        # Moves the enemies after the removed one down a row, so the rows in use stay packed at the start and in
+        # the order the enemies were added. Enemies are stepped, hit and drawn in row order, so it stays the same
+        # whichever enemies die
+        row = enemy.row
+        count = len(self.enemies)
+        if row != count - 1:
+            for name in FIELDS:
+                array = getattr(self, name)
+                array[row:count - 1] = array[row + 1:count]
+        del self.enemies[row]
+        for later in range(row, count - 1):
+            self.enemies[later].row = later
+        enemy.row = None
+
+    def SavePositions(self):
+        count = len(self.enemies)
+        self.previousPosition[:count] = self.position[:count]
+
+    def Wake(self, area):
+        # Wakes the enemies whose rectangles overlap area, a pygame.Rect, and puts the rest to sleep. Returns the
+        # mask of the awake enemies
+        count = len(self.enemies)
+        position, size = self.position[:count], self.size[:count]
+        awake = self.awake[:count]
+        awake[:] = ((position[:, 0] < area.right) & (position[:, 0] + size[:, 0] > area.left) &
+                    (position[:, 1] < area.bottom) & (position[:, 1] + size[:, 1] > area.top))
+        return awake
+
+    def Update(self, tilemap, area=None):
+        # Does one step of Enemy behaviour for every enemy and returns the enemies that died. Only the enemies
+        # overlapping area are woken up for it, the others sleep: they don't move, think or animate, and carry on
+        # from exactly where they stopped once they are back in the area. Everyone is awake without an area
+        count = len(self.enemies)
+        if not count:
+            return []
+        if count < self.batchFrom:
+            return self.UpdateEach(tilemap, area)
+        if area is None:
+            awake = self.awake[:count]
+            awake[:] = True
+        else:
+            awake = self.Wake(area)
+        position, velocity, size = self.position[:count], self.velocity[:count], self.size[:count]
+        flip, walking, collisions = self.flip[:count], self.walking[:count], self.collisions[:count]
+        player = self.game.player
+        gameplay = self.game.random.gameplay
+
+        # Eases the awake enemies' health bars towards their health, a sleeping enemy's bar stays where it was
+        showing = self.showingHealth[:count] & awake
+        currentHealth, targetHealth = self.currentHealth[:count], self.targetHealth[:count]
+        currentHealth += numpy.where(showing & (currentHealth < targetHealth), HEALTH_CHANGE_SPEED, 0)
+        currentHealth -= numpy.where(showing & (currentHealth > targetHealth), HEALTH_CHANGE_SPEED, 0)
+
+        # Walking enemies keep going while there is ground ahead of them and no wall, and turn around otherwise
+        movement = numpy.zeros(count)
+        isWalking = awake & (walking > 0)
+        left = numpy.trunc(position[:, 0])
+        aheadX = left + size[:, 0] // 2 + numpy.where(flip, -7, 7)
+        groundAhead = self.Solid(tilemap, aheadX, position[:, 1] + 25)
+        walkingOn = isWalking & groundAhead & ~(collisions[:, COLLISION_RIGHT] | collisions[:, COLLISION_LEFT])
+        movement[walkingOn] = numpy.where(flip[walkingOn], -0.15, 0.15)
+        flip ^= isWalking & ~walkingOn
+        walking[isWalking] -= 1
+        for row in numpy.nonzero(isWalking & (walking == 0))[0]:
+            enemy = self.enemies[row]
+            enemy.Attack((player.position[0] - position[row, 0], player.position[1] - position[row, 1]))
+        starting = awake & ~isWalking & (gameplay.random(count) < 0.005)
+        walking[starting] = gameplay.integers(30, 121, numpy.count_nonzero(starting))
+
+        if abs(player.dashing):
+            for enemy in self.game.enemyBroadphase.Query(player.Bounds()):
+                enemy.DashHit()
+
+        dead = self.dead[:count]
+        dead |= currentHealth == 0
+        died = [self.enemies[row] for row in numpy.nonzero(dead)[0]]
+        for enemy in died:
+            enemy.Die()
+
+        alive = ~dead
+        self.Move(tilemap, movement, alive & awake)
+        flip[alive & (movement > 0)] = False
+        flip[alive & (movement < 0)] = True
+
+        # Steps the animations, an enemy that changes between idle and running starts its new animation over
+        action, frame = self.action[:count], self.frame[:count]
+        animating = alive & awake
+        frame[animating] = (frame[animating] + 1) % self.animationLengths[action[animating]]
+        newAction = numpy.where(movement != 0, ACTIONS.index('run'), ACTIONS.index('idle'))
+        changed = animating & (newAction != action)
+        action[changed] = newAction[changed]
+        frame[changed] = 0
+        return died
+
+    def UpdateEach(self, tilemap, area=None):
+        # Update for a few enemies: the same step, an enemy at a time on lists of the rows, which are written back
+        # to the arrays. The gameplay random numbers are drawn in the same amounts as Update draws them
+        count = len(self.enemies)
+        player = self.game.player
+        gameplay = self.game.random.gameplay
+        positions, sizes = self.position[:count].tolist(), self.size[:count].tolist()
+        flips, walkings = self.flip[:count].tolist(), self.walking[:count].tolist()
+        collisions = self.collisions[:count].tolist()
+        if area is None:
+            awake = [True] * count
+        else:
+            awake = [x < area.right and x + width > area.left and y < area.bottom and y + height > area.top
+                     for (x, y), (width, height) in zip(positions, sizes)]
+        self.awake[:count] = awake
+
+        showing = [shown and woken for shown, woken in zip(self.showingHealth[:count].tolist(), awake)]
+        currentHealth = self.currentHealth[:count].tolist()
+        if any(showing):
+            targetHealth = self.targetHealth[:count].tolist()
+            for row in range(count):
+                if showing[row]:
+                    if currentHealth[row] < targetHealth[row]:
+                        currentHealth[row] += HEALTH_CHANGE_SPEED
+                    if currentHealth[row] > targetHealth[row]:
+                        currentHealth[row] -= HEALTH_CHANGE_SPEED
+            self.currentHealth[:count] = currentHealth
+
+        tileSize, typeIdAt, physicsTypes = tilemap.tileSize, tilemap.TypeIdAt, tilemap.physicsTypes
+        movement = [0] * count
+        wasWalking = [False] * count
+        attacking = []
+        turned = False
+        for row in range(count):
+            if awake[row] and walkings[row] > 0:
+                wasWalking[row] = True
+                x, y = positions[row]
+                aheadX = math.trunc(x) + sizes[row][0] // 2 + (-7 if flips[row] else 7)
+                groundAhead = physicsTypes[typeIdAt(int(aheadX // tileSize), int((y + 25) // tileSize))]
+                if groundAhead and not (collisions[row][COLLISION_RIGHT] or collisions[row][COLLISION_LEFT]):
+                    movement[row] = -0.15 if flips[row] else 0.15
+                else:
+                    flips[row] = not flips[row]
+                    turned = True
+                walkings[row] -= 1
+                if not walkings[row]:
+                    attacking.append(row)
+        if turned:
+            self.flip[:count] = flips
+        for row in attacking:
+            self.enemies[row].Attack((player.position[0] - positions[row][0], player.position[1] - positions[row][1]))
+        chances = gameplay.random(count).tolist()
+        starting = [row for row in range(count) if awake[row] and not wasWalking[row] and chances[row] < 0.005]
+        if starting:
+            for row, walking in zip(starting, gameplay.integers(30, 121, len(starting)).tolist()):
+                walkings[row] = walking
+        if starting or any(wasWalking):
+            self.walking[:count] = walkings
+
+        if abs(player.dashing):
+            for enemy in self.game.enemyBroadphase.Query(player.Bounds()):
+                enemy.DashHit()
+
+        deadRows = [dead or health == 0 for dead, health in zip(self.dead[:count].tolist(), currentHealth)]
+        self.dead[:count] = deadRows
+        died = [self.enemies[row] for row in range(count) if deadRows[row]]
+        for enemy in died:
+            enemy.Die()
+
+        moving = [row for row in range(count) if awake[row] and not deadRows[row]]
+        self.MoveEach(tilemap, moving, movement, positions, sizes, collisions)
+
+        # Steps the animations, the way Update does
+        actions, frames = self.action[:count].tolist(), self.frame[:count].tolist()
+        lengths = self.animationLengths.tolist()
+        run, idle = ACTIONS.index('run'), ACTIONS.index('idle')
+        for row in moving:
+            newAction = run if movement[row] else idle
+            if newAction != actions[row]:
+                actions[row], frames[row] = newAction, 0
+            else:
+                frames[row] = (frames[row] + 1) % lengths[actions[row]]
+        self.action[:count] = actions
+        self.frame[:count] = frames
+        return died
+
+    def MoveEach(self, tilemap, rows, movement, positions, sizes, collisions):
+        # Move for a few enemies, an enemy at a time. rows are the moving enemies' rows, movement is a list and
+        # positions, sizes and collisions are lists of the arrays' rows
+        count = len(self.enemies)
+        velocities = self.velocity[:count].tolist()
+        tileSize, typeIdAt, physicsTypes = tilemap.tileSize, tilemap.TypeIdAt, tilemap.physicsTypes
+        platform = tilemap.typeIds.get('platform', -1)
+
+        def Corners(x, y, width, height):
+            # Like Corners, for one enemy: its tile columns and rows, and the solid and wall flags of the four
+            # corner tiles, indexed column * 2 + row
+            columns = (int(x // tileSize), int((x + width - 1) // tileSize))
+            rows = (int(y // tileSize), int((y + height - 1) // tileSize))
+            solid, walls = [], []
+            for column in columns:
+                for row in rows:
+                    typeId = typeIdAt(column, row)
+                    solid.append(physicsTypes[typeId])
+                    walls.append(physicsTypes[typeId] and typeId != platform)
+            return columns, rows, solid, walls
+
+        for row in rows:
+            position, velocity = positions[row], velocities[row]
+            width, height = sizes[row]
+            collision = collisions[row] = [False] * 4
+            frameMovementX = movement[row] + velocity[0]
+            frameMovementY = velocity[1]
+
+            position[0] += frameMovementX * 2.5
+            left = math.trunc(position[0])
+            columns, tileRows, solid, walls = Corners(left, math.trunc(position[1]), width, height)
+            firstWall, secondWall = walls[0] or walls[1], walls[2] or walls[3]
+            x = left
+            if frameMovementX > 0 and (firstWall or secondWall):
+                x = (columns[0] if firstWall else columns[1]) * tileSize - width
+                collision[COLLISION_RIGHT] = True
+            elif frameMovementX < 0 and (firstWall or secondWall):
+                x = ((columns[1] if secondWall else columns[0]) + 1) * tileSize
+                collision[COLLISION_LEFT] = True
+            if solid[0] or solid[1] or solid[2] or solid[3]:
+                position[0] = float(x)
+
+            position[1] += frameMovementY
+            top = math.trunc(position[1])
+            columns, tileRows, solid, walls = Corners(math.trunc(position[0]), top, width, height)
+            firstFloor, secondFloor = solid[0] or solid[2], solid[1] or solid[3]
+            firstCeiling, secondCeiling = walls[0] or walls[2], walls[1] or walls[3]
+            y = top
+            if frameMovementY > 0 and (firstFloor or secondFloor):
+                y = (tileRows[0] if firstFloor else tileRows[1]) * tileSize - height
+                collision[COLLISION_DOWN] = True
+            elif frameMovementY < 0 and (firstCeiling or secondCeiling):
+                y = ((tileRows[1] if secondCeiling else tileRows[0]) + 1) * tileSize
+                collision[COLLISION_UP] = True
+            if solid[0] or solid[1] or solid[2] or solid[3]:
+                position[1] = float(y)
+
+            # Adding gravity, and resetting it after a collision
+            if collision[COLLISION_DOWN] or collision[COLLISION_UP]:
+                velocity[1] = 0.0
+            else:
+                velocity[1] = min(5.0, velocity[1] + 0.1)
+        self.position[:count] = positions
+        self.velocity[:count] = velocities
+        self.collisions[:count] = collisions
+
+    def FillBroadphase(self, broadphase):
+        # Puts every awake enemy's rectangle in the broadphase, after clearing it. The player can't reach the
+        # sleeping ones
+        broadphase.Clear()
+        count = len(self.enemies)
+        if count < self.batchFrom:
+            for enemy, awake, (x, y), (width, height) in zip(self.enemies, self.awake[:count].tolist(),
+                                                             self.position[:count].tolist(),
+                                                             self.size[:count].tolist()):
+                if awake:
+                    broadphase.Insert(enemy, pygame.Rect(math.trunc(x), math.trunc(y), width, height))
+            return
+        rows = numpy.nonzero(self.awake[:count])[0]
+        lefts, tops = numpy.trunc(self.position[rows]).T.tolist()
+        widths, heights = self.size[rows].T.tolist()
+        for row, left, top, width, height in zip(rows.tolist(), lefts, tops, widths, heights):
+            broadphase.Insert(self.enemies[row], pygame.Rect(left, top, width, height))
+
+    def Move(self, tilemap, movement, moving):
+        # The batched form of PhysicsEntity.Update: moves the enemies in the moving mask along x and then y,
+        # pushing them out of any solid tile they run into, and applies gravity. Enemies are never bigger than a
+        # tile and never move more than a few pixels a step, so each one can only overlap the tiles at its four
+        # corners and there's no need for the swept collision the player uses
+        count = len(moving)
+        position, velocity, size = self.position[:count], self.velocity[:count], self.size[:count]
+        collisions = self.collisions[:count]
+        collisions[moving] = False
+        tileSize = tilemap.tileSize
+        frameMovementX = movement + velocity[:, 0]
+        frameMovementY = velocity[:, 1].copy()
+
+        position[:, 0] += numpy.where(moving, frameMovementX * 2.5, 0)
+        rectangle, columns, rows, solid, walls = self.Corners(tilemap, position, size)
+        # Platforms can be walked through from the side. Of two walls, the enemy stops at the one it reaches first
+        firstWall, secondWall = walls[0][0] | walls[0][1], walls[1][0] | walls[1][1]
+        right = moving & (frameMovementX > 0) & (firstWall | secondWall)
+        left = moving & (frameMovementX < 0) & (firstWall | secondWall)
+        x = numpy.where(right, numpy.where(firstWall, columns[0], columns[1]) * tileSize - size[:, 0], rectangle[0])
+        x = numpy.where(left, (numpy.where(secondWall, columns[1], columns[0]) + 1) * tileSize, x)
+        collisions[:, COLLISION_RIGHT] |= right
+        collisions[:, COLLISION_LEFT] |= left
+        # Like PhysicsEntity, an enemy touching any solid tile is moved to its rectangle's whole pixel position
+        overlapping = moving & (solid[0][0] | solid[0][1] | solid[1][0] | solid[1][1])
+        position[:, 0] = numpy.where(overlapping, x, position[:, 0])
+
+        position[:, 1] += numpy.where(moving, frameMovementY, 0)
+        rectangle, columns, rows, solid, walls = self.Corners(tilemap, position, size)
+        # Enemies land on platforms but jump up through them
+        firstFloor, secondFloor = solid[0][0] | solid[1][0], solid[0][1] | solid[1][1]
+        firstCeiling, secondCeiling = walls[0][0] | walls[1][0], walls[0][1] | walls[1][1]
+        down = moving & (frameMovementY > 0) & (firstFloor | secondFloor)
+        up = moving & (frameMovementY < 0) & (firstCeiling | secondCeiling)
+        y = numpy.where(down, numpy.where(firstFloor, rows[0], rows[1]) * tileSize - size[:, 1], rectangle[1])
+        y = numpy.where(up, (numpy.where(secondCeiling, rows[1], rows[0]) + 1) * tileSize, y)
+        collisions[:, COLLISION_DOWN] |= down
+        collisions[:, COLLISION_UP] |= up
+        overlapping = moving & (solid[0][0] | solid[0][1] | solid[1][0] | solid[1][1])
+        position[:, 1] = numpy.where(overlapping, y, position[:, 1])
+
+        # Adding gravity, and resetting it after a collision
+        falling = numpy.minimum(5, velocity[:, 1] + 0.1)
+        landed = collisions[:, COLLISION_DOWN] | collisions[:, COLLISION_UP]
+        velocity[:, 1] = numpy.where(moving, numpy.where(landed, 0, falling), velocity[:, 1])
+
+    def Corners(self, tilemap, position, size):
+        # Returns the enemies' rectangle positions (truncated to whole pixels, like pygame.Rect), the tile columns
+        # and rows their rectangles cover, and which of those corner tiles are solid and which are walls (solid but
+        # not platforms), indexed [column][row]
+        tileSize = tilemap.tileSize
+        rectangle = (numpy.trunc(position[:, 0]), numpy.trunc(position[:, 1]))
+        columns = (rectangle[0] // tileSize, (rectangle[0] + size[:, 0] - 1) // tileSize)
+        rows = (rectangle[1] // tileSize, (rectangle[1] + size[:, 1] - 1) // tileSize)
+        # All four corners are looked up at once, indexed [column][row] after the reshape
+        tileX = numpy.concatenate((columns[0], columns[0], columns[1], columns[1]))
+        tileY = numpy.concatenate((rows[0], rows[1], rows[0], rows[1]))
+        solid, walls = self.Tiles(tilemap, tileX, tileY)
+        solid = solid.reshape(2, 2, -1)
+        walls = walls.reshape(2, 2, -1)
+        return rectangle, columns, rows, solid, walls
+
+    def Tiles(self, tilemap, tileX, tileY):
+        # Returns two masks for the tiles at the given tile coordinates: solid, and solid but not a platform
+        typeIds = tilemap.TypeIdsAt(tileX.astype(numpy.int64), tileY.astype(numpy.int64))
+        solid = numpy.frombuffer(tilemap.physicsTypes, dtype=numpy.uint8)[typeIds].astype(bool)
+        return solid, solid & (typeIds != tilemap.typeIds.get('platform', -1))
+
+    def Solid(self, tilemap, x, y):
+        # Batched SolidCheck, for positions in pixels
+        return self.Tiles(tilemap, x // tilemap.tileSize, y // tilemap.tileSize)[0]
+
+
+# main
+ACTIONS = ('idle', 'run')
+COLLISION_UP, COLLISION_DOWN, COLLISION_RIGHT, COLLISION_LEFT = range(4)
+HEALTH_CHANGE_SPEED = 0.5
+STARTING_CAPACITY = 32
+BATCH_FROM = 24     # Fewest enemies Update steps as arrays, see Benchmarks/EnemyStep.py
+# Field -> (columns, or 0 for a single value, dtype)
+FIELDS = {
+    'position': (2, numpy.float64),
+    'previousPosition': (2, numpy.float64),
+    'velocity': (2, numpy.float64),
+    'size': (2, numpy.float64),
+    'collisions': (4, bool),
+    'flip': (0, bool),
+    'walking': (0, numpy.int32),
+    'targetHealth': (0, numpy.float64),
+    'currentHealth': (0, numpy.float64),
+    'showingHealth': (0, bool),
+    'dead': (0, bool),
+    'awake': (0, bool),
+    'action': (0, numpy.int64),
+    'frame': (0, numpy.int64),
+}
@@ -1,18 +1,30 @@
 import pygame
 
+from Scripts.Utilities import Animation
+
+from Scripts.Tilemap import ONE_WAY_TILES
+
 
 # Class for all objects that follow physics
 class PhysicsEntity:
+    # Entities are made by the dozen, slots keep them small and quick to create. Subclasses that add attributes
+    # list them in their own __slots__ or get a __dict__ for them
+    __slots__ = ('game', 'entityType', 'position', 'previousPosition', 'size', 'velocity', 'collisions', 'action',
+                 'animation', 'animationOffset', 'flip', 'lastMovement', 'hitPoints', 'targetHealth', 'dead', 'bounds')
+
     # Initialising all the data for the class
     def __init__(self, game, entityType, position, size, hp=100):
         self.game = game
         self.entityType = entityType
         self.position = list(position)
+        self.previousPosition = list(position)  # Position at the previous step, for interpolating between steps
         self.size = size
         self.velocity = [0, 0]
         self.collisions = {'up': False, 'down': False, 'right': False, 'left': False}
+        self.bounds = pygame.Rect(0, 0, 0, 0)   # Moved in place by Bounds
 
         self.action = ''
+        self.animation = Animation(game.assets[entityType + '_idle'])
         self.animationOffset = (-3, -3)
         self.flip = False
         self.SetAction('idle')
@@ -27,52 +39,56 @@ class PhysicsEntity:
     def Rectangle(self, offset=(0,0)):
         return pygame.Rect(self.position[0] - offset[0], self.position[1] - offset[1], self.size[0], self.size[1])
 
+    def Bounds(self):
+        # The same rectangle as Rectangle(), but one Rect moved in place every call instead of a new one. It is out of
+        # date once the entity moves, so use it straight away and don't keep it
+        self.bounds.update(self.position[0], self.position[1], self.size[0], self.size[1])
+        return self.bounds
+
+    def SavePosition(self):
+        self.previousPosition[0] = self.position[0]
+        self.previousPosition[1] = self.position[1]
+
+    def InterpolatedOffset(self, offset, interpolation):
+        # Returns the render offset that draws the entity interpolation of the way from its previous position to its
+        # current one, so Render doesn't need to know about interpolation
+        return (offset[0] + (self.position[0] - self.previousPosition[0]) * (1 - interpolation),
+                offset[1] + (self.position[1] - self.previousPosition[1]) * (1 - interpolation))
+
     def SetAction(self, action):
         if action != self.action:
             self.action = action
-            self.animation = self.game.assets[self.entityType + '_' + self.action].Copy()
+            self.animation.Play(self.game.assets[self.entityType + '_' + self.action])
 
     def Update(self, tilemap, movement=(0, 0)):
-        self.collisions = {'up': False, 'down': False, 'right': False, 'left': False}
+        # Resets the collisions in place rather than allocating a new dictionary every frame
+        self.collisions['up'] = self.collisions['down'] = self.collisions['right'] = self.collisions['left'] = False
         # Calculates the current frames movement by taking the movement array
         # and adding it to the velocity of the player
-        frameMovement = [movement[0] + self.velocity[0], movement[1] + self.velocity[1]]
-
-        # Updates the movement of entity after calculating the frames movement as well as setup collisions
-        self.position[0] += frameMovement[0] * 2.5
-        entityRectangle = self.Rectangle()
-        rectangles, tileTypes = tilemap.PhysicsRectsAround(self.position)
-        for i in range(len(rectangles)):
-            if entityRectangle.colliderect(rectangles[i]):
-                if frameMovement[0] > 0 and tileTypes[i] != 'platform':  # If the entity is moving right
-                    entityRectangle.right = rectangles[i].left  # Snap the right of the entity to the left of the block
-                    self.collisions['right'] = True
-                    if tileTypes[i] == 'level_transition' and self.entityType == 'ronin' and not len(self.game.enemies):
-                        self.game.changeLevel = True
-                if frameMovement[0] < 0 and tileTypes[i] != 'platform':  # If the entity is moving left
-                    entityRectangle.left = rectangles[i].right  # Snap the left of the entity to the right of the block
-                    self.collisions['left'] = True
-                    if tileTypes[i] == 'level_transition' and self.entityType == 'ronin' and not len(self.game.enemies):
-                        self.game.changeLevel = True
-                self.position[0] = entityRectangle.x  # Set the players position to the x position of block
-
-        self.position[1] += frameMovement[1]
-        entityRectangle = self.Rectangle()
-        for i in range(len(rectangles)):
-            if entityRectangle.colliderect(rectangles[i]):
-                if frameMovement[1] > 0:  # If the entity is moving down
-                    entityRectangle.bottom = rectangles[i].top  # Snap the bottom of the entity to the top of the block
-                    self.collisions['down'] = True
-                    if tileTypes[i] == 'healers' and self.entityType == 'ronin':
-                        self.Heal(0.1)
-                    if tileTypes[i] == 'level_transition' and self.entityType == 'ronin' and not len(self.game.enemies):
-                        self.game.changeLevel = True
-                if frameMovement[1] < 0 and tileTypes[i] != 'platform':  # If the entity is moving up
-                    entityRectangle.top = rectangles[i].bottom  # Snap the top of the entity to the bottom of the block
-                    self.collisions['up'] = True
-                    if tileTypes[i] == 'level_transition' and self.entityType == 'ronin' and not len(self.game.enemies):
-                        self.game.changeLevel = True
-                self.position[1] = entityRectangle.y  # Set the players position to the y position of block
+        frameMovementX = movement[0] + self.velocity[0]
+        frameMovementY = movement[1] + self.velocity[1]
+
+        # Moves along x and then along y, sweeping the entity's box so it stops at the first tile in its way however
+        # fast it is going (see Tilemap.Sweep). Entities walk through platforms from the side and jump up through
+        # them, but land on them
+        hit = tilemap.Sweep(self.position, self.size, (frameMovementX * 2.5, 0), ignore=ONE_WAY_TILES)
+        if hit:
+            time, normal, contact, tileTypes = hit
+            self.position[0] = contact[0]   # Snaps the entity against the side of the tile
+            self.collisions['right' if normal[0] < 0 else 'left'] = True
+            self.TouchTiles(tileTypes)
+        else:
+            self.position[0] += frameMovementX * 2.5
+
+        hit = tilemap.Sweep(self.position, self.size, (0, frameMovementY),
+                            ignore=ONE_WAY_TILES if frameMovementY < 0 else ())
+        if hit:
+            time, normal, contact, tileTypes = hit
+            self.position[1] = contact[1]   # Snaps the entity onto the top or against the bottom of the tile
+            self.collisions['down' if normal[1] < 0 else 'up'] = True
+            self.TouchTiles(tileTypes, landed=normal[1] < 0)
+        else:
+            self.position[1] += frameMovementY
 
         if movement[0] > 0:
             self.flip = False
@@ -89,6 +105,14 @@ class PhysicsEntity:
 
         self.animation.Update()
 
+    def TouchTiles(self, tileTypes, landed=False):
+        # Called with the types of the tiles the entity ran into
+        if self.entityType == 'ronin':
+            if landed and 'healers' in tileTypes:
+                self.Heal(0.1)
+            if 'level_transition' in tileTypes and not len(self.game.enemies):
+                self.game.changeLevel = True
+
     def GetDamage(self, amount):
         if self.targetHealth > 0:
             self.targetHealth -= amount
@@ -104,10 +128,12 @@ class PhysicsEntity:
         if self.targetHealth > self.hitPoints:
             self.targetHealth = self.hitPoints
 
+    def Sprite(self, offset=(0, 0)):
+        # The entity's current image and where it goes on the screen, for a RenderQueue
+        return (self.animation.Image(self.flip), (self.position[0] - offset[0] + self.animationOffset[0],
+                                                  self.position[1] - offset[1] + self.animationOffset[1]))
+
     def Render(self, surface, offset=(0, 0)):
-        surface.blit(pygame.transform.flip(self.animation.Image(), self.flip, False),
-                     (self.position[0] - offset[0] + self.animationOffset[0],
-                      self.position[1] - offset[1] + self.animationOffset[1])
-                     )
+        surface.blit(*self.Sprite(offset))
         # Renders the entity onto the current surface
         # surface.blit(self.game.assets['ronin'], (self.position[0] - offset[0], self.position[1] - offset[1]))
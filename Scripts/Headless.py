@@ -0,0 +1,160 @@
+import os
+import sys
+import json
+import hashlib
+import random
+import time
+import argparse
+
+# No window and no sound, even on machines that have them
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+from Main_Game import Game
+
+
+class ScriptedInput:
+    # Plays back a list of [step, 'press' or 'release', action] events, the actions being the ones in
+    # Main_Game.KEY_ACTIONS. Scripts can be saved as JSON and loaded with Load
+    def __init__(self, events):
+        self.events = {}
+        for step, kind, action in events:
+            self.events.setdefault(step, []).append((kind, action))
+
+    @staticmethod
+    def Load(path):
+        f = open(path, 'r')
+        events = json.load(f)
+        f.close()
+        return ScriptedInput(events)
+
+    def Events(self, step):
+        return self.events.get(step, ())
+
+
+class RandomInput:
+    # A bot for soak tests, it runs one way or the other for a while and jumps, dashes and attacks at random
+    def __init__(self, seed=0):
+        self.random = random.Random(seed)
+        self.direction = None
+
+    def Events(self, step):
+        events = []
+        if self.random.random() < 0.01:
+            if self.direction:
+                events.append(('release', self.direction))
+            self.direction = self.random.choice(('left', 'right', None))
+            if self.direction:
+                events.append(('press', self.direction))
+        for action, chance in (('jump', 0.01), ('dash', 0.003), ('attack', 0.02)):
+            if self.random.random() < chance:
+                events.append(('press', action))
+        return events
+
+
+def Simulate(game, inputs, steps, render=False):
+    # Steps the game as fast as possible, feeding it the input's events, and draws a frame after every step if
+    # render is set. Returns the number of steps run, which is less than steps if the game finished
+    game.running = True
+    for step in range(steps):
+        for kind, action in inputs.Events(step):
+            if kind == 'press':
+                game.Press(action)
+            else:
+                game.Release(action)
+        game.Step()
+        if render:
+            game.Render(game.display)
+        if not game.running:
+            return step + 1
+    return steps
+
+
+def Start(seed, level=0, script=None):
+    # Returns a new headless game seeded with seed on the given level, and its inputs: the script's, or a random
+    # bot's seeded with seed too
+    game = Game(None, headless=True, seed=seed)
+    if level:
+        game.level = level
+        game.LoadLevel(game.level)
+    return game, ScriptedInput.Load(script) if script else RandomInput(seed)
+
+
+def StateDigest(game):
+    # A hash of the state of the simulation: the level, the player, every enemy's row of the store and the
+    # projectiles. Two runs with the same seed and inputs have the same digest, a build that plays differently
+    # almost certainly doesn't. Effects aren't included, they don't change the game
+    digest = hashlib.sha256()
+    player = game.player
+    digest.update(repr((game.level, game.dead, game.scroll, player.position, player.velocity, player.targetHealth,
+                        player.flip, player.action, player.animation.frame, player.dashing, player.jumps,
+                        player.airtime, player.attacking)).encode())
+    store = game.enemyStore
+    for name in ('position', 'velocity', 'flip', 'walking', 'targetHealth', 'currentHealth', 'dead', 'action',
+                 'frame'):
+        digest.update(getattr(store, name)[:len(store.enemies)].tobytes())
+    digest.update(repr([(projectile.position, projectile.direction, projectile.timer)
+                        for projectile in game.projectiles]).encode())
+    return digest.hexdigest()
+
+
+# main
+RATE_RUNS = 5   # Most runs --min-rate times before failing
+
+if __name__ == '__main__':
+    # Run from the project root, e.g.: python -m Scripts.Headless --steps 100000 --level 1
+    parser = argparse.ArgumentParser(description='Runs the game without a window or sound')
+    parser.add_argument('--steps', type=int, default=10000)
+    parser.add_argument('--level', type=int, default=0)
+    parser.add_argument('--script', help='JSON list of [step, "press" or "release", action] events, '
+                                         'a random bot plays if not given')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the game and the random bot')
+    parser.add_argument('--check', action='store_true',
+                        help='plays the run a second time and checks it ends in the same state')
+    parser.add_argument('--clips', action='store_true', help='prints the memory used by each animation clip')
+    parser.add_argument('--render', action='store_true',
+                        help='draws a frame after every step and prints the draw calls made per layer')
+    parser.add_argument('--min-rate', type=float,
+                        help='fails if the best of up to {} timed runs steps slower than this many steps per second'
+                             .format(RATE_RUNS))
+    arguments = parser.parse_args()
+
+    game, inputs = Start(arguments.seed, arguments.level, arguments.script)
+
+    start = time.perf_counter()
+    steps = Simulate(game, inputs, arguments.steps, arguments.render)
+    seconds = time.perf_counter() - start
+    print('{} steps in {:.2f} s, {:.0f} steps per second'.format(steps, seconds, steps / seconds))
+    print('level {}, player at {} with {} health, {} enemies left{}'.format(
+        game.level, [round(value, 1) for value in game.player.position], game.player.targetHealth,
+        len(game.enemies), ', game finished' if game.gameFinish else ''))
+    for name in ('sparks', 'particles'):
+        print(name, ', '.join('{} {}'.format(stat, value) for stat, value in getattr(game, name).Stats().items()))
+    if arguments.render:
+        print('render', ', '.join('{} {}'.format(stat, value) for stat, value in game.renderQueue.Stats().items()))
+    print('state', StateDigest(game))
+    if arguments.clips:
+        for name, clip in game.clips.items():
+            print(name, ', '.join('{} {}'.format(stat, value) for stat, value in clip.Memory().items()))
+
+    if arguments.check:
+        replay, inputs = Start(arguments.seed, arguments.level, arguments.script)
+        Simulate(replay, inputs, arguments.steps)
+        if StateDigest(replay) != StateDigest(game):
+            print('the replay ended in a different state', StateDigest(replay))
+            sys.exit(1)
+        print('the replay ended in the same state')
+
+    if arguments.min_rate:
+        # One run on a busy machine can be much slower than the game is, so the run is timed again a few times
+        # and the best rate counts
+        rates = [steps / seconds]
+        while max(rates) < arguments.min_rate and len(rates) < RATE_RUNS:
+            timed, inputs = Start(arguments.seed, arguments.level, arguments.script)
+            start = time.perf_counter()
+            timedSteps = Simulate(timed, inputs, arguments.steps, arguments.render)
+            rates.append(timedSteps / (time.perf_counter() - start))
+        print('best of {} runs {:.0f} steps per second, at least {:.0f} wanted'.format(
+            len(rates), max(rates), arguments.min_rate))
+        if max(rates) < arguments.min_rate:
+            sys.exit(1)
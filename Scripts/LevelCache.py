@@ -0,0 +1,63 @@
+import os
+import threading
+
+from Scripts.Tilemap import Tilemap
+
+
+class LevelCache:
+    def __init__(self, game):
+        self.game = game
+        self.levels = {}    # Level number -> {'snapshot', 'spawners', 'baked'}
+        self.loading = {}   # Level number -> thread preloading it
+        self.lock = threading.Lock()
+
+    def Path(self, level):
+        return 'Data/Levels/' + str(level) + '.json'
+
+    def Read(self, level):
+        # Loads a level into a tilemap of its own and returns its cache entry, safe to run off the main thread
+        tilemap = Tilemap(self.game)
+        spawners = tilemap.LoadLevel(self.Path(level))
+        return {'snapshot': tilemap.Snapshot(), 'spawners': spawners, 'baked': False}
+
+    def Preload(self, level):
+        # Starts reading a level in the background, e.g. the next one while the current one is being played
+        with self.lock:
+            if level in self.levels or level in self.loading or not os.path.exists(self.Path(level)):
+                return
+            thread = threading.Thread(target=self.PreloadWorker, args=(level,), daemon=True)
+            self.loading[level] = thread
+        thread.start()
+
+    def PreloadWorker(self, level):
+        # A level that fails to read is left out of the cache, Load then reads it again and raises the error on the
+        # main thread
+        try:
+            entry = self.Read(level)
+            with self.lock:
+                self.levels[level] = entry
+        finally:
+            with self.lock:
+                del self.loading[level]
+
+    def Load(self, level, tilemap):
+        # Puts the level into the tilemap and returns a fresh copy of its spawners. Only the first load of a
+        # level touches the disk, after that the tilemap shares the cached state until something changes it
+        with self.lock:
+            thread = self.loading.get(level)
+        if thread:
+            thread.join()
+        if level not in self.levels:
+            self.levels[level] = self.Read(level)
+
+        entry = self.levels[level]
+        tilemap.Restore(entry['snapshot'])
+        if not entry['baked']:
+            # Chunks are baked on the main thread, and kept in the snapshot along with the merged collision
+            # geometry so respawns don't build either again
+            tilemap.BakeChunks()
+            tilemap.MergePhysics()
+            entry['snapshot'] = tilemap.Snapshot()
+            entry['baked'] = True
+        return [{'type': spawner['type'], 'variant': spawner['variant'], 'position': list(spawner['position'])}
+                for spawner in entry['spawners']]
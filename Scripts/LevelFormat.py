@@ -0,0 +1,193 @@
+import json
+import os
+import struct
+
+# A compiled level is the HEADER, then the type name table (a length byte followed by the name, for each
+# type id from 1 up), the tile type grid and the tile variant grid (width * height bytes each, row by row),
+# and finally the off-grid table and the spawner table (one RECORD per tile). The spawners are already
+# taken out of the grid and the off-grid table, so loading a compiled level doesn't need Tilemap.Extract
+HEADER = struct.Struct('<4sHHiiIIHII')  # magic, version, tile size, origin x/y, width, height, counts
+RECORD = struct.Struct('<BB6xdd')    # type id, variant, x, y in pixels
+MAGIC = b'DLVL'
+VERSION = 1
+
+# A paged level is the PAGED_HEADER, the type name table, the off-grid and spawner tables, a page table and then
+# the pages. The grid is cut into pageSize x pageSize pages lined up with multiples of pageSize in tile
+# coordinates, and the page table holds the file offset of each page's types and variants (pageSize * pageSize
+# bytes each, row by row), page row by page row, or 0 for a page with nothing in it
+PAGED_HEADER = struct.Struct('<4sHHHiiIIHII')   # magic, version, tile size, page size, origin x/y, width, height,
+                                                # counts
+PAGED_MAGIC = b'DPAG'
+PAGE_SIZE = 8
+
+SPAWNER_TILES = [('entities', 0), ('entities', 1)]
+
+
+def CompiledPath(jsonPath):
+    return os.path.splitext(jsonPath)[0] + '.lvl'
+
+
+def PagedPath(jsonPath):
+    return os.path.splitext(jsonPath)[0] + '.plvl'
+
+
+def IsCurrent(jsonPath, levelPath):
+    # A compiled level is out of date once the JSON it came from has been saved again
+    if not os.path.exists(levelPath) or os.path.getmtime(levelPath) < os.path.getmtime(jsonPath):
+        return False
+    f = open(levelPath, 'rb')
+    header = f.read(HEADER.size)
+    f.close()
+    return len(header) == HEADER.size and HEADER.unpack(header)[:2] == (MAGIC, VERSION)
+
+
+def ReadLevel(jsonPath, spawnerTiles=SPAWNER_TILES):
+    # Reads a JSON level into a dense grid, returns (tile size, type ids, origin x, origin y, width, height, tile
+    # types, tile variants, off-grid records, spawner records)
+    f = open(jsonPath, 'r')
+    map_data = json.load(f)
+    f.close()
+
+    typeIds = {}
+    for tile in list(map_data['tilemap'].values()) + map_data['offgrid']:
+        typeIds.setdefault(tile['type'], len(typeIds) + 1)
+
+    spawners = []
+    offGrid = []
+    for tile in map_data['offgrid']:
+        record = RECORD.pack(typeIds[tile['type']], tile['variant'], tile['position'][0], tile['position'][1])
+        if (tile['type'], tile['variant']) in spawnerTiles:
+            spawners.append(record)
+        else:
+            offGrid.append(record)
+
+    tiles = sorted(map_data['tilemap'].values(), key=lambda tile: (tile['position'][1], tile['position'][0]))
+    originX = min([tile['position'][0] for tile in tiles], default=0)
+    originY = min([tile['position'][1] for tile in tiles], default=0)
+    width = max([tile['position'][0] for tile in tiles], default=originX - 1) - originX + 1
+    height = max([tile['position'][1] for tile in tiles], default=originY - 1) - originY + 1
+    tileTypes = bytearray(width * height)
+    tileVariants = bytearray(width * height)
+    for tile in tiles:
+        if (tile['type'], tile['variant']) in spawnerTiles:
+            spawners.append(RECORD.pack(typeIds[tile['type']], tile['variant'],
+                                        tile['position'][0] * map_data['tile_size'],
+                                        tile['position'][1] * map_data['tile_size']))
+        else:
+            index = (tile['position'][1] - originY) * width + tile['position'][0] - originX
+            tileTypes[index] = typeIds[tile['type']]
+            tileVariants[index] = tile['variant']
+    return (map_data['tile_size'], typeIds, originX, originY, width, height, tileTypes, tileVariants,
+            offGrid, spawners)
+
+
+def WriteTypeNames(f, typeNames):
+    for tileType in typeNames:
+        name = tileType.encode()
+        f.write(bytes([len(name)]) + name)
+
+
+def Compile(jsonPath, levelPath=None, spawnerTiles=SPAWNER_TILES):
+    levelPath = levelPath or CompiledPath(jsonPath)
+    (tileSize, typeIds, originX, originY, width, height, tileTypes, tileVariants,
+     offGrid, spawners) = ReadLevel(jsonPath, spawnerTiles)
+
+    # The level is written to a temporary file that only replaces levelPath once it is complete, a write that
+    # fails part way never leaves a cut short level behind for IsCurrent to take as up to date
+    temporaryPath = levelPath + '.tmp'
+    f = open(temporaryPath, 'wb')
+    try:
+        f.write(HEADER.pack(MAGIC, VERSION, tileSize, originX, originY, width, height,
+                            len(typeIds), len(offGrid), len(spawners)))
+        WriteTypeNames(f, typeIds)
+        f.write(tileTypes)
+        f.write(tileVariants)
+        f.write(b''.join(offGrid))
+        f.write(b''.join(spawners))
+        f.close()
+        os.replace(temporaryPath, levelPath)
+    finally:
+        f.close()
+        if os.path.exists(temporaryPath):
+            os.remove(temporaryPath)
+    return levelPath
+
+
+def WritePaged(levelPath, tileSize, originX, originY, width, height, typeNames, ReadPage, offGrid=(), spawners=(),
+               pageSize=PAGE_SIZE):
+    # Writes a paged level one page at a time, so levels far bigger than memory can be generated. ReadPage(pageX,
+    # pageY) is called for every page (in page coordinates, pageX = tile x // pageSize) and returns its tile types
+    # and variants as pageSize * pageSize bytes each, or None if the page is empty
+    firstPageX, firstPageY = originX // pageSize, originY // pageSize
+    pagesWide = (originX + width - 1) // pageSize - firstPageX + 1 if width else 0
+    pagesHigh = (originY + height - 1) // pageSize - firstPageY + 1 if height else 0
+
+    f = open(levelPath, 'wb')
+    f.write(PAGED_HEADER.pack(PAGED_MAGIC, VERSION, tileSize, pageSize, originX, originY, width, height,
+                              len(typeNames), len(offGrid), len(spawners)))
+    WriteTypeNames(f, typeNames)
+    f.write(b''.join(offGrid))
+    f.write(b''.join(spawners))
+
+    # The page table is filled in once the pages have been written and their offsets are known
+    tablePosition = f.tell()
+    f.write(bytes(4 * pagesWide * pagesHigh))
+    offsets = []
+    for pageY in range(firstPageY, firstPageY + pagesHigh):
+        for pageX in range(firstPageX, firstPageX + pagesWide):
+            page = ReadPage(pageX, pageY)
+            if page is None or not any(page[0]):
+                offsets.append(0)
+            else:
+                offsets.append(f.tell())
+                f.write(page[0])
+                f.write(page[1])
+    f.seek(tablePosition)
+    f.write(struct.pack('<' + str(len(offsets)) + 'I', *offsets))
+    f.close()
+    return levelPath
+
+
+def CompilePaged(jsonPath, levelPath=None, spawnerTiles=SPAWNER_TILES, pageSize=PAGE_SIZE):
+    levelPath = levelPath or PagedPath(jsonPath)
+    (tileSize, typeIds, originX, originY, width, height, tileTypes, tileVariants,
+     offGrid, spawners) = ReadLevel(jsonPath, spawnerTiles)
+
+    def ReadPage(pageX, pageY):
+        types = bytearray(pageSize * pageSize)
+        variants = bytearray(pageSize * pageSize)
+        for row in range(pageSize):
+            y = pageY * pageSize + row - originY
+            startX = max(pageX * pageSize, originX)
+            endX = min((pageX + 1) * pageSize, originX + width)
+            if 0 <= y < height and startX < endX:
+                start = row * pageSize + startX - pageX * pageSize
+                types[start:start + endX - startX] = tileTypes[y * width + startX - originX:y * width + endX - originX]
+                variants[start:start + endX - startX] = tileVariants[y * width + startX - originX:
+                                                                     y * width + endX - originX]
+        return types, variants
+
+    return WritePaged(levelPath, tileSize, originX, originY, width, height, list(typeIds), ReadPage, offGrid, spawners,
+                      pageSize)
+
+
+def BuildLevel(jsonPath):
+    # Returns the path of an up to date compiled copy of the level, compiling it first if needed, or None if it
+    # can't be read or written (a read-only install, a full disk). The JSON itself can still be loaded then, see
+    # Tilemap.LoadLevel
+    levelPath = CompiledPath(jsonPath)
+    try:
+        if not IsCurrent(jsonPath, levelPath):
+            Compile(jsonPath, levelPath)
+    except OSError:
+        return None
+    return levelPath
+
+
+# main
+if __name__ == '__main__':
+    # Compiles every level, run from the project root with: python -m Scripts.LevelFormat
+    for name in sorted(os.listdir('Data/Levels')):
+        if name.endswith('.json'):
+            path = Compile('Data/Levels/' + name)
+            print(name, os.path.getsize('Data/Levels/' + name), 'bytes ->', path, os.path.getsize(path), 'bytes')
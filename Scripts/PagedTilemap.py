@@ -0,0 +1,229 @@
+import pygame
+import numpy
+from collections import OrderedDict
+
+from Scripts.Tilemap import Tilemap, NEIGHBOUR_OFFSETS, CHUNK_SIZE
+from Scripts.LevelFormat import PAGED_HEADER, PAGED_MAGIC, RECORD, VERSION
+
+
+class PagedTilemap(Tilemap):
+    # A read-only tilemap for levels too big to keep in memory. The level stays in a paged file (see
+    # Scripts/LevelFormat.py) and pages are only read in when something asks for a tile in them. At most maxPages
+    # pages and maxChunks baked chunk surfaces are kept, the least recently used ones are dropped first
+    def __init__(self, game, tileSize=32):
+        super().__init__(game, tileSize)
+        self.levelFile = None
+        self.pageTable = None   # Offset of every page in the file, 0 for an empty page
+        self.firstPageX = 0
+        self.firstPageY = 0
+        self.pagesWide = 0
+        self.pagesHigh = 0
+        self.pages = OrderedDict()  # (pageX, pageY) -> (types, variants), oldest first
+        self.chunks = OrderedDict()
+        self.maxPages = MAX_PAGES
+        self.maxChunks = MAX_CHUNKS
+        self.pageReads = 0  # Number of pages read from the file so far
+
+    def LoadPaged(self, path):
+        # Opens a level made by LevelFormat.WritePaged and returns its spawners. The file is kept open so pages
+        # can be read from it later on
+        self.Close()
+        self.levelFile = open(path, 'rb')
+        (magic, version, tileSize, pageSize, originX, originY, width, height,
+         typeCount, offGridCount, spawnerCount) = PAGED_HEADER.unpack(self.levelFile.read(PAGED_HEADER.size))
+        if magic != PAGED_MAGIC or version != VERSION:
+            raise ValueError(path + ' is not a paged level')
+        if pageSize != CHUNK_SIZE:
+            raise ValueError(path + ' has pages of ' + str(pageSize) + ' tiles, chunks are ' + str(CHUNK_SIZE))
+
+        self.Clear()
+        self.pages = OrderedDict()
+        self.chunks = OrderedDict()
+        self.tileSize = tileSize
+        self.originX, self.originY, self.width, self.height = originX, originY, width, height
+        for i in range(typeCount):
+            self.InternType(self.levelFile.read(self.levelFile.read(1)[0]).decode())
+
+        for typeId, variant, x, y in RECORD.iter_unpack(self.levelFile.read(offGridCount * RECORD.size)):
+            Tilemap.AddOffGrid(self, {'type': self.typeNames[typeId], 'variant': variant, 'position': [x, y]})
+        spawners = []
+        for typeId, variant, x, y in RECORD.iter_unpack(self.levelFile.read(spawnerCount * RECORD.size)):
+            spawners.append({'type': self.typeNames[typeId], 'variant': variant, 'position': [x, y]})
+
+        self.firstPageX, self.firstPageY = originX // pageSize, originY // pageSize
+        self.pagesWide = (originX + width - 1) // pageSize - self.firstPageX + 1 if width else 0
+        self.pagesHigh = (originY + height - 1) // pageSize - self.firstPageY + 1 if height else 0
+        self.pageTable = numpy.frombuffer(self.levelFile.read(4 * self.pagesWide * self.pagesHigh), dtype='<u4')
+        return spawners
+
+    def Close(self):
+        if self.levelFile:
+            self.levelFile.close()
+            self.levelFile = None
+
+    def Page(self, pageX, pageY):
+        # Returns the (types, variants) of a page, reading it from the file if it isn't resident, or None if the
+        # page is empty or outside the level
+        page = (pageX, pageY)
+        if page in self.pages:
+            self.pages.move_to_end(page)
+            return self.pages[page]
+
+        column, row = pageX - self.firstPageX, pageY - self.firstPageY
+        if not (0 <= column < self.pagesWide and 0 <= row < self.pagesHigh):
+            return None
+        tiles = None
+        offset = int(self.pageTable[row * self.pagesWide + column])
+        if offset:
+            self.levelFile.seek(offset)
+            data = self.levelFile.read(2 * CHUNK_SIZE * CHUNK_SIZE)
+            tiles = (data[:CHUNK_SIZE * CHUNK_SIZE], data[CHUNK_SIZE * CHUNK_SIZE:])
+            self.pageReads += 1
+        self.pages[page] = tiles
+        if len(self.pages) > self.maxPages:
+            self.pages.popitem(last=False)
+        return tiles
+
+    def TileAt(self, x, y):
+        # Returns the (type id, variant) of the tile at (x, y) in tile coordinates, type id 0 being empty
+        tiles = self.Page(x // CHUNK_SIZE, y // CHUNK_SIZE)
+        if tiles is None:
+            return 0, 0
+        index = (y % CHUNK_SIZE) * CHUNK_SIZE + x % CHUNK_SIZE
+        return tiles[0][index], tiles[1][index]
+
+    def GetTile(self, x, y):
+        typeId, variant = self.TileAt(x, y)
+        if typeId:
+            return self.typeNames[typeId], variant
+
+    def Tiles(self):
+        # Yields (x, y, type, variant) for every placed tile, reading the pages straight from the file without
+        # keeping them resident
+        for row in range(self.pagesHigh):
+            for column in range(self.pagesWide):
+                offset = int(self.pageTable[row * self.pagesWide + column])
+                if offset:
+                    self.levelFile.seek(offset)
+                    data = self.levelFile.read(2 * CHUNK_SIZE * CHUNK_SIZE)
+                    for index in range(CHUNK_SIZE * CHUNK_SIZE):
+                        if data[index]:
+                            yield ((self.firstPageX + column) * CHUNK_SIZE + index % CHUNK_SIZE,
+                                   (self.firstPageY + row) * CHUNK_SIZE + index // CHUNK_SIZE,
+                                   self.typeNames[data[index]], data[CHUNK_SIZE * CHUNK_SIZE + index])
+
+    def TilesAround(self, position):
+        tiles = []
+        tileX, tileY = int(position[0] // self.tileSize), int(position[1] // self.tileSize)
+        for offsetX, offsetY in NEIGHBOUR_OFFSETS:
+            typeId, variant = self.TileAt(tileX + offsetX, tileY + offsetY)
+            if typeId:
+                tiles.append((tileX + offsetX, tileY + offsetY, self.typeNames[typeId], variant))
+        return tiles
+
+    def TypeIdsAt(self, tileX, tileY):
+        return numpy.array([self.TileAt(x, y)[0] for x, y in zip(tileX.tolist(), tileY.tolist())], dtype=numpy.uint8)
+
+    def TypeIdAt(self, x, y):
+        return self.TileAt(x, y)[0]
+
+    def SolidTile(self, x, y):
+        typeId = self.TileAt(x, y)[0]
+        if self.physicsTypes[typeId]:
+            return self.typeNames[typeId]
+
+    def SolidCheck(self, position):
+        return self.SolidTile(int(position[0] // self.tileSize), int(position[1] // self.tileSize))
+
+    def PhysicsRectsAround(self, position, offset=(0, 0)):
+        # The level is never fully resident so there is no merged geometry, every solid tile gets its own
+        # rectangle. Nothing is cached either, so memory stays bound by the page limit
+        rectangles = []
+        tileTypes = []
+        tileX, tileY = int(position[0] // self.tileSize), int(position[1] // self.tileSize)
+        for offsetX, offsetY in NEIGHBOUR_OFFSETS:
+            tileType = self.SolidTile(tileX + offsetX, tileY + offsetY)
+            if tileType:
+                rectangles.append(pygame.Rect((tileX + offsetX) * self.tileSize - offset[0],
+                                              (tileY + offsetY) * self.tileSize - offset[1],
+                                              self.tileSize, self.tileSize))
+                tileTypes.append(tileType)
+        return rectangles, tileTypes
+
+    def PhysicsRectsBetween(self, left, top, right, bottom):
+        rectangles = []
+        tileTypes = []
+        for y in range(int(top // self.tileSize), int((bottom - 1) // self.tileSize) + 1):
+            for x in range(int(left // self.tileSize), int((right - 1) // self.tileSize) + 1):
+                tileType = self.SolidTile(x, y)
+                if tileType:
+                    rectangles.append(pygame.Rect(x * self.tileSize, y * self.tileSize, self.tileSize, self.tileSize))
+                    tileTypes.append(tileType)
+        return rectangles, tileTypes
+
+    def LinesOfSight(self, starts, ends):
+        return numpy.array([self.LineOfSight(start, end) for start, end in zip(starts, ends)], dtype=bool)
+
+    def BakeChunk(self, chunkX, chunkY):
+        # Chunks line up with pages, the tiles one row and column before them are included for the images that
+        # spill over into this chunk
+        chunkPixels = CHUNK_SIZE * self.tileSize
+        chunkLeft, chunkTop = chunkX * chunkPixels, chunkY * chunkPixels
+        surface = None
+
+        for tile in self.offGridBuckets.get((chunkX, chunkY), ()):
+            if surface is None:
+                surface = self.NewChunkSurface()
+            surface.blit(self.game.assets[tile['type']][tile['variant']],
+                         (tile['position'][0] - chunkLeft, tile['position'][1] - chunkTop))
+
+        for y in range(chunkY * CHUNK_SIZE - 1, (chunkY + 1) * CHUNK_SIZE):
+            for x in range(chunkX * CHUNK_SIZE - 1, (chunkX + 1) * CHUNK_SIZE):
+                typeId, variant = self.TileAt(x, y)
+                if typeId:
+                    if surface is None:
+                        surface = self.NewChunkSurface()
+                    surface.blit(self.game.assets[self.typeNames[typeId]][variant],
+                                 (x * self.tileSize - chunkLeft, y * self.tileSize - chunkTop))
+
+        self.chunks[(chunkX, chunkY)] = surface
+        self.dirtyChunks.discard((chunkX, chunkY))
+        if len(self.chunks) > self.maxChunks:
+            self.chunks.popitem(last=False)
+
+    def BakeChunks(self):
+        # Chunks are baked as they come on screen instead, there are far too many to bake up front
+        self.chunks = OrderedDict()
+
+    def VisibleChunks(self, size, offset=(0, 0)):
+        chunkPixels = CHUNK_SIZE * self.tileSize
+        chunks = []
+        for chunkX in range(offset[0] // chunkPixels, (offset[0] + size[0]) // chunkPixels + 1):
+            for chunkY in range(offset[1] // chunkPixels, (offset[1] + size[1]) // chunkPixels + 1):
+                chunk = (chunkX, chunkY)
+                if chunk in self.chunks and chunk not in self.dirtyChunks:
+                    self.chunks.move_to_end(chunk)
+                else:
+                    self.BakeChunk(chunkX, chunkY)
+                if self.chunks[chunk] is not None:
+                    chunks.append((self.chunks[chunk], (chunkX * chunkPixels - offset[0],
+                                                        chunkY * chunkPixels - offset[1])))
+        return chunks
+
+    def ReadOnly(self, *args, **kwargs):
+        # Raised before anything is changed, so a paged tilemap is never left half edited
+        raise TypeError('PagedTilemap is read-only, edit the level it was made from instead')
+
+    SetTile = RemoveTile = AddOffGrid = RemoveOffGrid = Grow = AutotileAt = autotile = ReadOnly
+    save = load = LoadLevel = LoadCompiled = Snapshot = Restore = ReadOnly
+
+    def Extract(self, idPairs, keep=False):
+        # Finding the tiles is fine, taking them out of the level isn't
+        if not keep:
+            self.ReadOnly()
+        return super().Extract(idPairs, keep=True)
+
+
+# main
+MAX_PAGES = 1024    # Each page is 2 * CHUNK_SIZE * CHUNK_SIZE bytes
+MAX_CHUNKS = 64     # Each baked chunk is a CHUNK_SIZE * tileSize square surface
@@ -1,25 +1,140 @@
-class Particle:
-    def __init__(self, game, particleType, position, velocity=[0, 0], frame=0):
+import numpy
+
+
+class Particles:
+    # Every live particle in arrays, a row per particle, so a step moves and animates all of them with a few NumPy
+    # operations and Render draws all of them with one Surface.blits call. Stats are for tuning the capacity the
+    # arrays start with
+    def __init__(self, game, capacity):
         self.game = game
-        self.particleType = particleType
-        self.position = list(position)
-        self.velocity = list(velocity)
-        self.animation = self.game.assets['particle_' + particleType].Copy()
-        self.animation.frame = frame
+        # A row per particle, in arrays made once and only grown when a burst doesn't fit (see Grow)
+        self.particles = numpy.zeros((capacity, PARTICLE_FIELDS))
+        self.frames = numpy.zeros(capacity, dtype=numpy.int64)
+        self.types = numpy.zeros(capacity, dtype=numpy.int64)
+        self.done = numpy.zeros(capacity, dtype=bool)
+        # Each particle's animation settings, copied from its type when it spawns so a step doesn't look them up:
+        # its length in frames, how far back the frame goes when it runs off the end (the whole length for looping
+        # animations, one frame for the others) and the frame it is done on (never for looping animations)
+        self.lengthOf = numpy.zeros(capacity, dtype=numpy.int64)
+        self.wrapBy = numpy.zeros(capacity, dtype=numpy.int64)
+        self.lastFrame = numpy.zeros(capacity, dtype=numpy.int64)
+        # Scratch space for Update, so stepping the particles doesn't allocate anything
+        self.finished = numpy.zeros(capacity, dtype=bool)
+        self.wrapped = numpy.zeros(capacity, dtype=bool)
+        self.rewind = numpy.zeros(capacity, dtype=numpy.int64)
+        self.count = 0
+        # The images of every particle type one after the other, with each type's animation settings by type id
+        self.typeIds = {}
+        self.images = []
+        self.imageOffsets = numpy.zeros((0, 2))   # Half of each image's size, particles are drawn centred
+        self.firstImages = numpy.zeros(0, dtype=numpy.int64)
+        self.imageDurations = numpy.zeros(0, dtype=numpy.int64)
+        self.lengths = numpy.zeros(0, dtype=numpy.int64)  # Frames in each animation
+        self.loops = numpy.zeros(0, dtype=bool)
+        # For tuning the capacity, see Stats
+        self.highWater = 0
+        self.spawned = 0
+        self.expired = 0
+        self.grown = 0
+
+    def TypeId(self, particleType):
+        if particleType not in self.typeIds:
+            animation = self.game.assets['particle_' + particleType]
+            self.typeIds[particleType] = len(self.typeIds)
+            self.firstImages = numpy.append(self.firstImages, len(self.images))
+            self.images.extend(animation.images)
+            self.imageOffsets = numpy.append(self.imageOffsets, [(image.get_width() // 2, image.get_height() // 2)
+                                                                 for image in animation.images], axis=0)
+            self.imageDurations = numpy.append(self.imageDurations, animation.imageDuration)
+            self.lengths = numpy.append(self.lengths, animation.length)
+            self.loops = numpy.append(self.loops, animation.loop)
+        return self.typeIds[particleType]
+
+    def Grow(self):
+        # Doubles every array, so a big burst only allocates a few times
+        for name in ROW_ARRAYS + SCRATCH_ARRAYS:
+            array = getattr(self, name)
+            setattr(self, name, numpy.concatenate((array, numpy.zeros_like(array))))
+        self.grown += 1
+
+    def Spawn(self, particleType, position, velocity=(0, 0), frame=0):
+        if self.count == len(self.particles):
+            self.Grow()
+        typeId = self.TypeId(particleType)
+        length = int(self.lengths[typeId])
+        row = self.count
+        self.particles[row] = (position[0], position[1], velocity[0], velocity[1])
+        self.frames[row] = frame
+        self.types[row] = typeId
+        self.done[row] = False
+        self.lengthOf[row] = length
+        if self.loops[typeId]:
+            self.wrapBy[row], self.lastFrame[row] = length, NEVER
+        else:
+            self.wrapBy[row], self.lastFrame[row] = 1, length - 1
+        self.count += 1
+        self.spawned += 1
+        self.highWater = max(self.highWater, self.count)
 
     def Update(self):
-        kill = False
-        if self.animation.done:
-            kill = True
+        # A particle goes once its animation was already done at the start of the step, like the particle objects
+        # the game used to have. Everything is worked out in place, in the arrays and the scratch arrays
+        count = self.count
+        if not count:
+            return
+        particles, frames, done = self.particles[:count], self.frames[:count], self.done[:count]
+        finished, wrapped, rewind = self.finished[:count], self.wrapped[:count], self.rewind[:count]
+        finished[:] = done
+        particles[:, PARTICLE_X] += particles[:, PARTICLE_VELOCITY_X]
+        particles[:, PARTICLE_Y] += particles[:, PARTICLE_VELOCITY_Y]
 
-        self.position[0] += self.velocity[0]
-        self.position[1] += self.velocity[1]
+        # The same frame stepping as Animation.Update: a frame that runs off the end goes back to the start of a
+        # looping animation and stays on the last frame of the others, which are then done
+        frames += 1
+        numpy.greater_equal(frames, self.lengthOf[:count], out=wrapped)
+        numpy.multiply(wrapped, self.wrapBy[:count], out=rewind)
+        frames -= rewind
+        numpy.greater_equal(frames, self.lastFrame[:count], out=wrapped)
+        done |= wrapped
 
-        self.animation.Update()
+        if finished.any():
+            # The last live particle is moved into each finished one's row. Going backwards, it has already been
+            # stepped and can't be finished itself
+            for row in numpy.flatnonzero(finished)[::-1].tolist():
+                last = self.count - 1
+                if row != last:
+                    for name in ROW_ARRAYS:
+                        array = getattr(self, name)
+                        array[row] = array[last]
+                self.count = last
+                self.expired += 1
 
-        return kill
+    def Sprites(self, offset=(0, 0)):
+        # (image, position) for every live particle, ready for Surface.blits or a RenderQueue
+        count = self.count
+        if not count:
+            return ()
+        images = self.firstImages[self.types[:count]] + self.frames[:count] // self.imageDurations[self.types[:count]]
+        corners = self.particles[:count, :2] - offset - self.imageOffsets[images]
+        return zip(map(self.images.__getitem__, images.tolist()), corners.tolist())
 
     def Render(self, surface, offset=(0, 0)):
-        image = self.animation.Image()
-        surface.blit(image, (self.position[0] - offset[0] - image.get_width() // 2,
-                             self.position[1] - offset[1] - image.get_height() // 2))
+        surface.blits(self.Sprites(offset), doreturn=False)
+
+    def Clear(self):
+        self.count = 0
+
+    def Stats(self):
+        return {'live': self.count, 'capacity': len(self.particles), 'highWater': self.highWater,
+                'spawned': self.spawned, 'expired': self.expired, 'grown': self.grown}
+
+    def __len__(self):
+        return self.count
+
+
+# main
+PARTICLE_X, PARTICLE_Y, PARTICLE_VELOCITY_X, PARTICLE_VELOCITY_Y = range(4)    # Columns of Particles.particles
+PARTICLE_FIELDS = 4
+ROW_ARRAYS = ('particles', 'frames', 'types', 'done', 'lengthOf', 'wrapBy', 'lastFrame')   # A row per particle
+SCRATCH_ARRAYS = ('finished', 'wrapped', 'rewind')
+NEVER = numpy.iinfo(numpy.int64).max    # The last frame of a looping animation
@@ -1,9 +1,5 @@
 import pygame
 import math
-import random
-from Scripts.Particles import Particle
-from Scripts.Sparks import Spark
-from Scripts.Utilities import LoadImage
 from Scripts.Entities import PhysicsEntity
 
 
@@ -26,7 +22,7 @@ class Player(PhysicsEntity):
         self.healthRatio = hp / self.healthBarLength
         self.healthChangeSpeed = 0.5
 
-        self.healthBarImage = LoadImage('UI/health_bar.png', colorkey=(255, 255, 255))
+        self.healthBarImage = self.game.assetsUI['health_bar']
         self.healthBarTopLeft = (54, 39)
         self.barMaxWidth = 152
         self.barHeight = 4
@@ -71,20 +67,20 @@ class Player(PhysicsEntity):
                 self.attacking = False
 
         # Working on the particle effect of the dash
+        cosmetic = self.game.random.cosmetic
         if abs(self.dashing) in {70, 50}:   # 70 represents the start of dash and 50 represents the end
             for i in range(0, 10):
                 if abs(self.dashing) == 70:
-                    angle = random.random() * math.pi * 2   # Generates a random angle in radians
-                    speed = random.random() * 0.5 + 0.5     # Generates a random speed
+                    angle = cosmetic.random() * math.pi * 2   # Generates a random angle in radians
+                    speed = cosmetic.random() * 0.5 + 0.5     # Generates a random speed
                     # Calculates the particles velocity
                     particleVelocity = [math.cos(angle) * speed, math.sin(angle) * speed]
-                    self.game.particles.append(Particle(self.game, 'base', self.Rectangle().center,
-                                                        velocity=particleVelocity, frame=random.randint(0, 7)))
+                    self.game.particles.Spawn('base', self.Rectangle().center, velocity=particleVelocity,
+                                              frame=cosmetic.randint(0, 7))
                 else:
-                    angle = random.random() * math.pi * 2
-                    speed = random.random() * 5
-                    self.game.sparks.append(Spark(self.Rectangle().center, angle, 2 + random.random(),
-                                                  colour=(242, 15, 52)))
+                    angle = cosmetic.random() * math.pi * 2
+                    speed = cosmetic.random() * 5
+                    self.game.sparks.Spawn(self.Rectangle().center, angle, 2 + cosmetic.random(), colour=(242, 15, 52))
 
         if self.dashing > 0:
             self.dashing = max(0, self.dashing - 1)
@@ -98,9 +94,9 @@ class Player(PhysicsEntity):
                 self.velocity[0] *= 0.1
                 self.dashDone = True
                 # Does particle for stream of dash
-                particleVelocity = [abs(self.dashing) / self.dashing * 2 * random.random(), 0]
-                self.game.particles.append(Particle(self.game, 'base', self.Rectangle().center,
-                                                    velocity=particleVelocity, frame=random.randint(0, 7)))
+                particleVelocity = [abs(self.dashing) / self.dashing * 2 * cosmetic.random(), 0]
+                self.game.particles.Spawn('base', self.Rectangle().center, velocity=particleVelocity,
+                                          frame=cosmetic.randint(0, 7))
 
         if self.velocity[0] > 0:
             self.velocity[0] = max(self.velocity[0] - 0.1, 0)
@@ -124,9 +120,8 @@ class Player(PhysicsEntity):
         else:
             self.attackType[0] = False
             self.attackType[1] = True
-        for enemy in self.game.enemies:
-            if attackHitbox.colliderect(enemy.Rectangle()):
-                self.hit = True
+        if self.game.enemyBroadphase.Query(attackHitbox):
+            self.hit = True
         return attackHitbox
 
     def Jump(self):
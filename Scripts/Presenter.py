@@ -0,0 +1,67 @@
+import pygame
+
+
+class Presenter:
+    # Scales a low resolution display surface up to fill the window. pygame.transform.scale makes a new window sized
+    # surface every call, which then has to be copied onto the window, so the Presenter scales straight into the
+    # window instead, or into a surface it keeps when the frame is shaken off to one side. Windows an exact multiple
+    # of the display take a faster path, see Layout. The buffers are only made again after Resize
+    def __init__(self, screen):
+        self.screen = screen
+        self.size = screen.get_size()
+        # Integer scales from this one up stretch each row once and copy it down, pygame already doubles quickly
+        self.rowScaleFrom = ROW_SCALE_FROM
+        self.layouts = {}   # Display size -> (scale, wide surface, row blits), see Layout
+        self.target = None  # Window sized surface for frames drawn at an offset
+
+    def Resize(self, screen=None):
+        # Call when the window changes size (VIDEORESIZE, or going fullscreen), the buffers for the old size are dropped
+        self.screen = screen if screen is not None else pygame.display.get_surface()
+        self.size = self.screen.get_size()
+        self.layouts = {}
+        self.target = None
+
+    def Scale(self, size):
+        # The whole number the display is scaled by to fill the window exactly, or None
+        width, height = self.screen.get_size()
+        if width % size[0] or height % size[1] or width // size[0] != height // size[1]:
+            return None
+        return width // size[0]
+
+    def Layout(self, source):
+        # When the window is scale times the display, every display row becomes scale identical window rows. The
+        # rows are stretched across into wide once, and one Surface.blits call copies each into its window rows
+        size = source.get_size()
+        if size not in self.layouts:
+            scale = self.Scale(size)
+            wide = rows = None
+            if scale is not None and scale >= self.rowScaleFrom:
+                wide = pygame.Surface((self.screen.get_width(), size[1]), 0, self.screen)
+                rows = [(wide, (0, y), (0, y // scale, wide.get_width(), 1)) for y in range(self.screen.get_height())]
+            self.layouts[size] = (scale, wide, rows)
+        return self.layouts[size]
+
+    def Present(self, source, offset=(0, 0)):
+        # Draws source scaled over the whole window, moved by offset
+        if self.screen.get_size() != self.size:     # Resized by a loop that doesn't pass its VIDEORESIZE events on
+            self.Resize(self.screen)
+        scale, wide, rows = self.Layout(source)
+        if scale == 1:
+            self.screen.blit(source, offset)
+            return
+        destination = self.screen
+        if int(offset[0]) or int(offset[1]):
+            if self.target is None:
+                self.target = pygame.Surface(self.screen.get_size(), 0, self.screen)
+            destination = self.target
+        if rows:
+            pygame.transform.scale(source, wide.get_size(), wide)
+            destination.blits(rows, doreturn=False)
+        else:
+            pygame.transform.scale(source, destination.get_size(), destination)
+        if destination is not self.screen:
+            self.screen.blit(destination, offset)
+
+
+# main
+ROW_SCALE_FROM = 3
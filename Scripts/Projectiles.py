@@ -0,0 +1,20 @@
+class Projectile:
+    # An enemy's shot. It flies along x by direction every step until its impact frame, worked out with a raycast
+    # when it is fired (see Enemy.ImpactFrame), or until it hits the player or dissipates
+    __slots__ = ('position', 'flip', 'direction', 'timer', 'impactFrame')
+
+    def __init__(self, position, flip, direction, impactFrame=None):
+        self.position = list(position)
+        self.flip = flip
+        self.direction = direction
+        self.timer = 0
+        self.impactFrame = impactFrame  # None if it dissipates before reaching a wall
+
+    def Update(self):
+        self.position[0] += self.direction
+        self.timer += 1
+
+
+# main
+PROJECTILE_LIFETIME = 200   # Frames before a projectile dissipates
+PROJECTILE_SPEED = 1.5      # Pixels a projectile flies each frame
@@ -0,0 +1,20 @@
+import random
+
+import numpy
+
+
+class RandomStreams:
+    # The game's random numbers, from one seed. Anything that changes the simulation draws from gameplay, a NumPy
+    # Generator, so that the same seed and inputs always play out the same way. Effects and screenshake draw from
+    # cosmetic, a random.Random, so adding a spark or drawing a frame more or less never changes the game
+    def __init__(self, seed=None):
+        self.Seed(seed)
+
+    def Seed(self, seed=None):
+        # A seed of None picks a new one, kept in self.seed so the run can be replayed
+        if seed is None:
+            seed = int(numpy.random.SeedSequence().generate_state(1)[0])
+        self.seed = seed
+        gameplay, cosmetic = numpy.random.SeedSequence(seed).spawn(2)
+        self.gameplay = numpy.random.default_rng(gameplay)
+        self.cosmetic = random.Random(int(cosmetic.generate_state(1)[0]))
@@ -0,0 +1,47 @@
+class RenderQueue:
+    # Collects a frame's blits by layer and draws each layer with a single Surface.blits call, instead of a
+    # Surface.blit call from Python for every sprite. Layers are drawn in the order they were given in, and only
+    # when Submit is called, so anything drawn straight onto the surface in between (health bars, sparks) goes
+    # over the layers submitted before it and under the ones queued after it
+    def __init__(self, layers):
+        self.layers = {layer: [] for layer in layers}   # Layer -> (surface, position) or (surface, position, area)
+        # For Stats, counted from the last Reset
+        self.frames = 0
+        self.commands = {layer: 0 for layer in layers}
+        self.calls = 0
+
+    def Begin(self):
+        # Starts a frame, dropping anything queued but never submitted
+        for commands in self.layers.values():
+            commands.clear()
+        self.frames += 1
+
+    def Add(self, layer, surface, position, area=None):
+        # Queues a blit of surface, or of its area (e.g. an image's region of an atlas page, see Atlas.Region)
+        self.layers[layer].append((surface, position) if area is None else (surface, position, area))
+
+    def Extend(self, layer, commands):
+        self.layers[layer].extend(commands)
+
+    def Submit(self, surface):
+        # Draws everything queued so far onto surface, a layer at a time
+        for layer, commands in self.layers.items():
+            if commands:
+                surface.blits(commands, doreturn=False)
+                self.commands[layer] += len(commands)
+                self.calls += 1
+                commands.clear()
+
+    def Reset(self):
+        self.frames = 0
+        self.calls = 0
+        for layer in self.commands:
+            self.commands[layer] = 0
+
+    def Stats(self):
+        # The draw commands in each layer and the Surface.blits calls, on average per frame since the last Reset
+        frames = max(self.frames, 1)
+        stats = {layer: round(commands / frames, 1) for layer, commands in self.commands.items()}
+        stats['blitsCalls'] = round(self.calls / frames, 1)
+        stats['frames'] = self.frames
+        return stats
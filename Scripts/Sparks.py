@@ -1,33 +1,127 @@
 import pygame
 import math
+import numpy
 
 
-class Spark:
-    def __init__(self, position, angle, speed, colour=(255, 255, 255)):
-        self.position = list(position)
-        self.angle = angle
-        self.speed = speed
-        self.colour = colour
+class Sparks:
+    # Every live spark in one array, a row per spark, so a step moves and slows all of them with a few NumPy
+    # operations. Render draws each spark's diamond once into a sprite, for its colour and its angle and speed rounded
+    # off, and then draws all of them with one blits. Stats are for tuning the capacity the arrays start with
+    def __init__(self, capacity):
+        self.sparks = numpy.zeros((capacity, SPARK_FIELDS))
+        self.colours = numpy.zeros((capacity, 3), dtype=numpy.uint8)
+        # Scratch space for Update, so stepping the sparks doesn't allocate anything
+        self.moved = numpy.zeros(capacity)
+        self.stopped = numpy.zeros(capacity, dtype=bool)
+        self.count = 0
+        self.sprites = {}       # The sprite for each key from Render
+        # For tuning the capacity, see Stats
+        self.highWater = 0
+        self.spawned = 0
+        self.expired = 0
+        self.grown = 0
+
+    def Grow(self):
+        # Doubles every array, so a big burst only allocates a few times
+        for name in ('sparks', 'colours', 'moved', 'stopped'):
+            array = getattr(self, name)
+            setattr(self, name, numpy.concatenate((array, numpy.zeros_like(array))))
+        self.grown += 1
+
+    def Spawn(self, position, angle, speed, colour=(255, 255, 255)):
+        if self.count == len(self.sparks):
+            self.Grow()
+        # A spark never turns, so the cosine and sine of its angle are worked out once here
+        self.sparks[self.count] = (position[0], position[1], math.cos(angle), math.sin(angle), speed)
+        self.colours[self.count] = colour
+        self.count += 1
+        self.spawned += 1
+        self.highWater = max(self.highWater, self.count)
 
     def Update(self):
-        self.position[0] += math.cos(self.angle) * self.speed
-        self.position[1] += math.sin(self.angle) * self.speed
+        # Everything is worked out in place, in the array and the scratch arrays
+        count = self.count
+        if not count:
+            return
+        sparks, moved, stopped = self.sparks[:count], self.moved[:count], self.stopped[:count]
+        speed = sparks[:, SPARK_SPEED]
+        numpy.multiply(sparks[:, SPARK_COS], speed, out=moved)
+        sparks[:, SPARK_X] += moved
+        numpy.multiply(sparks[:, SPARK_SIN], speed, out=moved)
+        sparks[:, SPARK_Y] += moved
+        speed -= 0.1
+        numpy.maximum(speed, 0, out=speed)
+
+        # The last live spark is moved into each stopped one's row. Going backwards, it has already been stepped
+        # and can't have stopped itself
+        numpy.less_equal(speed, 0, out=stopped)
+        if stopped.any():
+            for row in numpy.flatnonzero(stopped)[::-1].tolist():
+                last = self.count - 1
+                if row != last:
+                    self.sparks[row] = self.sparks[last]
+                    self.colours[row] = self.colours[last]
+                self.count = last
+                self.expired += 1
 
-        self.speed = max(0, self.speed - 0.1)
-        return not self.speed
+    def Sprite(self, key):
+        # Draws the diamond for a key from Render. It reaches 3 * speed forwards and backwards along the spark's angle
+        # and 0.5 * speed to the sides, turning a quarter turn swaps the cosine and sine around
+        colour, rest = divmod(key, SPARK_ANGLES * SPARK_SPEEDS)
+        angle, speed = divmod(rest, SPARK_SPEEDS)
+        colour = (colour >> 16, colour >> 8 & 255, colour & 255)
+        angle, speed = angle * math.pi / SPARK_ANGLES, speed / SPARK_SPEED_STEPS
+        cos, sin = math.cos(angle), math.sin(angle)
+        length, width = speed * 3, speed * 0.5
+        half = math.ceil(length) + 1    # Render works this out from the speed too
+        sprite = pygame.Surface((half * 2 + 1, half * 2 + 1))
+        background = (0, 0, 0) if colour != (0, 0, 0) else (255, 255, 255)
+        sprite.fill(background)
+        pygame.draw.polygon(sprite, colour, ((half + cos * length, half + sin * length),
+                                             (half - sin * width, half + cos * width),
+                                             (half - cos * length, half - sin * length),
+                                             (half + sin * width, half - cos * width)))
+        sprite.set_colorkey(background, pygame.RLEACCEL)
+        self.sprites[key] = sprite
 
     def Render(self, surface, offset=(0, 0)):
-        renderPoints = [
-            (self.position[0] + math.cos(self.angle) * self.speed * 3 - offset[0],
-             self.position[1] + math.sin(self.angle) * self.speed * 3 - offset[1]),
+        # Each spark gets a key for its colour and its angle and speed rounded off. The diamond looks the same turned
+        # half a turn, so angles only go up to pi
+        sparks = self.sparks[:self.count]
+        colours = self.colours[:self.count].astype(numpy.int64)
+        angles = numpy.arctan2(sparks[:, SPARK_SIN], sparks[:, SPARK_COS]) % math.pi
+        speeds = numpy.minimum(numpy.rint(sparks[:, SPARK_SPEED] * SPARK_SPEED_STEPS), SPARK_SPEEDS - 1)
+        keys = ((colours[:, 0] << 16 | colours[:, 1] << 8 | colours[:, 2]) * (SPARK_ANGLES * SPARK_SPEEDS) +
+                numpy.rint(angles * (SPARK_ANGLES / math.pi)).astype(numpy.int64) % SPARK_ANGLES * SPARK_SPEEDS +
+                speeds.astype(numpy.int64))
+        # Where each sprite's corner goes, the same half size as Sprite. The ones off the surface are skipped
+        half = numpy.ceil(speeds / SPARK_SPEED_STEPS * 3) + 1
+        x = numpy.rint(sparks[:, SPARK_X] - offset[0]) - half
+        y = numpy.rint(sparks[:, SPARK_Y] - offset[1]) - half
+        onScreen = ((x + half * 2 >= 0) & (x < surface.get_width()) & (y + half * 2 >= 0) & (y < surface.get_height()))
+        keys = keys[onScreen]
+        # Only the keys seen for the first time need a sprite drawing, then the blits are looked up in one go
+        sprites = self.sprites
+        for key in numpy.unique(keys).tolist():
+            if key not in sprites:
+                self.Sprite(key)
+        surface.blits(zip(map(sprites.__getitem__, keys.tolist()), zip(x[onScreen].tolist(), y[onScreen].tolist())),
+                      doreturn=False)
+
+    def Clear(self):
+        self.count = 0
+
+    def Stats(self):
+        return {'live': self.count, 'capacity': len(self.sparks), 'highWater': self.highWater,
+                'spawned': self.spawned, 'expired': self.expired, 'grown': self.grown}
 
-            (self.position[0] + math.cos(self.angle + math.pi * 0.5) * self.speed * 0.5 - offset[0],
-             self.position[1] + math.sin(self.angle + math.pi * 0.5) * self.speed * 0.5 - offset[1]),
+    def __len__(self):
+        return self.count
 
-            (self.position[0] + math.cos(self.angle + math.pi) * self.speed * 3 - offset[0],
-             self.position[1] + math.sin(self.angle + math.pi) * self.speed * 3 - offset[1]),
 
-            (self.position[0] + math.cos(self.angle + math.pi * 1.5) * self.speed * 0.5 - offset[0],
-             self.position[1] + math.sin(self.angle + math.pi * 1.5) * self.speed * 0.5 - offset[1])
-        ]
-        pygame.draw.polygon(surface, self.colour, renderPoints)
+# main
+SPARK_X, SPARK_Y, SPARK_COS, SPARK_SIN, SPARK_SPEED = range(5)    # Columns of Sparks.sparks
+SPARK_FIELDS = 5
+SPARK_ANGLES = 32           # Angles a spark's sprite is drawn at, over half a turn
+SPARK_SPEED_STEPS = 4       # Sprites a spark gets per unit of speed, it slows by 0.1 a step
+SPARK_SPEEDS = 40           # Sprites for speeds up to 10, faster sparks are drawn at that size
@@ -4,7 +4,8 @@ from Scripts.Utilities import LoadImage
 
 
 class ExtraOptions:
-    def __init__(self):
+    def __init__(self, presenter):
+        self.presenter = presenter
         self.menuImage = LoadImage('Menus/Extra Options.png')
         self.menuRectangle = self.menuImage.get_rect()
         self.menuRectangle.center = (640, 310)
@@ -29,6 +30,8 @@ class ExtraOptions:
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
                     pygame.quit()
+                if event.type == pygame.VIDEORESIZE:
+                    self.presenter.Resize()
                 if event.type == pygame.KEYDOWN:
                     if event.key == pygame.K_ESCAPE:
                         run = False
@@ -48,7 +51,7 @@ class ExtraOptions:
                         self.index = (self.index - 1) % len(self.menuOptions)
             self.cursorRectangle.y = self.cursorPosY + (self.index * 125)
             self.display.blit(self.cursorImage, self.cursorRectangle)
-            surface.blit(pygame.transform.scale(self.display, surface.get_size()), (0, 0))
+            self.presenter.Present(self.display)
             pygame.display.update()
 
 
@@ -63,7 +66,8 @@ class OptionsMenu(State):
 
         self.menuOptions = {0: "Resume", 1: "Options", 2: "Quit"}
         self.index = 0
-        self.options = ExtraOptions()
+        self.presenter = game.presenter
+        self.options = ExtraOptions(game.presenter)
 
         self.cursorImage = LoadImage('Menus/cursor_2.png')
         self.cursorImage = pygame.transform.scale_by(self.cursorImage, 4)
@@ -81,6 +85,8 @@ class OptionsMenu(State):
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
                     pygame.quit()
+                if event.type == pygame.VIDEORESIZE:
+                    self.presenter.Resize()
                 if event.type == pygame.KEYDOWN:
                     if event.key == pygame.K_ESCAPE:
                         run = False
@@ -98,5 +104,5 @@ class OptionsMenu(State):
                         self.index = (self.index - 1) % len(self.menuOptions)
             self.cursorRectangle.y = self.cursorPosY + (self.index * 150)
             self.display.blit(self.cursorImage, self.cursorRectangle)
-            surface.blit(pygame.transform.scale(self.display, surface.get_size()), (0, 0))
+            self.presenter.Present(self.display)
             pygame.display.update()
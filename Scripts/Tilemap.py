@@ -1,49 +1,515 @@
 import pygame
 import json
+import math
+import mmap
+import numpy
+
+from Scripts.LevelFormat import HEADER, RECORD, MAGIC, VERSION, SPAWNER_TILES, BuildLevel
 
 
 class Tilemap:
     def __init__(self, game, tileSize=32):
         self.game = game
         self.tileSize = tileSize
-        self.tilemap = {}
-        self.offGridTiles = ['props']
+        self.offGridTiles = []
+
+        # The on-grid tiles live in a dense grid stored row by row, starting at (originX, originY) in tile
+        # coordinates. Tile types are interned as small ints (0 is an empty cell) so that every lookup is
+        # plain integer indexing instead of building and hashing "x;y" strings
+        self.originX = 0
+        self.originY = 0
+        self.width = 0
+        self.height = 0
+        self.tileTypes = bytearray()
+        self.tileVariants = bytearray()
+
+        self.typeNames = [None]     # Type id -> type name, id 0 is reserved for empty cells
+        self.typeIds = {}   # Type name -> type id
+        self.physicsTypes = bytearray(256)  # Set to 1 for the type ids that are in PHYSICS_TILES
+        self.autotileTypes = bytearray(256)     # Set to 1 for the type ids that are in AUTOTILE_TYPES
+
+        # The level is pre-rendered into CHUNK_SIZE x CHUNK_SIZE tile surfaces so Render only has to blit the
+        # few chunks on screen. Chunks without anything in them are stored as None, and chunks whose tiles
+        # changed are rebuilt the next time they are rendered
+        self.chunks = {}
+        self.dirtyChunks = set()
+
+        # Spatial hash of the off-grid tiles, every tile is listed in the bucket of each chunk its image overlaps
+        self.offGridBuckets = {}
+
+        # Collision geometry, the solid tiles merged into as few rectangles as possible (see MergePhysics). It is
+        # built the first time it is asked for and kept until the tiles change
+        self.physicsRects = None    # Merged rectangles, None until they are built
+        self.physicsRectTypes = []  # Tile type of each merged rectangle
+        self.physicsBuckets = {}    # Chunk -> indices of the merged rectangles overlapping it
+        self.physicsCache = {}  # (x, y) of the centre tile -> result of PhysicsRectsAround for the 3x3 block
+
+        # Set while the arrays above are shared with a snapshot, they are copied before the first change
+        self.shared = False
+        # Set while the chunk and physics caches are shared with a snapshot, see UnshareCaches
+        self.sharedCaches = False
 
         # for i in range(0, 20):
-        #     self.tilemap[str(3 + i) + ";10"] = {'type': 'ground_tiles', 'variant': 2, 'position': (3 + i, 10)}
-        #     self.tilemap["10;" + str(5 + i)] = {'type': 'ground_tiles', 'variant': 5, 'position': (10, 5 + i)}
+        #     self.SetTile(3 + i, 10, 'ground_tiles', 2)
+        #     self.SetTile(10, 5 + i, 'ground_tiles', 5)
+
+    def InternType(self, tileType):
+        if tileType not in self.typeIds:
+            self.typeIds[tileType] = len(self.typeNames)
+            self.physicsTypes[len(self.typeNames)] = tileType in PHYSICS_TILES
+            self.autotileTypes[len(self.typeNames)] = tileType in AUTOTILE_TYPES
+            self.typeNames.append(tileType)
+        return self.typeIds[tileType]
+
+    def Clear(self):
+        self.typeNames = [None]
+        self.typeIds = {}
+        self.physicsTypes = bytearray(256)
+        self.autotileTypes = bytearray(256)
+        self.originX, self.originY, self.width, self.height = 0, 0, 0, 0
+        self.tileTypes = bytearray()
+        self.tileVariants = bytearray()
+        self.offGridTiles = []
+        self.chunks = {}
+        self.dirtyChunks = set()
+        self.offGridBuckets = {}
+        self.InvalidatePhysics()
+        self.shared = False
+        self.sharedCaches = False
+
+    def Snapshot(self):
+        # Returns the level state without copying it. The tilemap and the snapshot keep sharing the same
+        # arrays until the tilemap is changed, see Unshare
+        self.shared = True
+        self.sharedCaches = True
+        return {name: getattr(self, name) for name in SNAPSHOT_FIELDS}
+
+    def Restore(self, snapshot):
+        for name in SNAPSHOT_FIELDS:
+            setattr(self, name, snapshot[name])
+        self.dirtyChunks = set()
+        self.shared = True
+        self.sharedCaches = True
+
+    def Unshare(self):
+        # Copy on write, gives the tilemap its own copy of the state shared with a snapshot. Chunks stay shared
+        # until then, since they can only differ from the snapshot's once a tile has changed
+        if self.shared:
+            self.tileTypes = bytearray(self.tileTypes)
+            self.tileVariants = bytearray(self.tileVariants)
+            self.typeNames = list(self.typeNames)
+            self.typeIds = dict(self.typeIds)
+            self.physicsTypes = bytearray(self.physicsTypes)
+            self.autotileTypes = bytearray(self.autotileTypes)
+            self.offGridTiles = list(self.offGridTiles)
+            self.offGridBuckets = {chunk: list(tiles) for chunk, tiles in self.offGridBuckets.items()}
+            self.chunks = dict(self.chunks)
+            self.InvalidatePhysics()
+            self.shared = False
+            self.sharedCaches = False
+
+    def UnshareCaches(self):
+        # The chunks and the PhysicsRectsAround cache are filled in as they are asked for, which changes them even
+        # when no tile has. They get copies of their own before the first addition, the surfaces and rectangles in
+        # them are never changed so the copies can be shallow
+        if self.sharedCaches:
+            self.chunks = dict(self.chunks)
+            self.physicsCache = dict(self.physicsCache)
+            self.sharedCaches = False
+
+    def Grow(self, left, top, right, bottom):
+        # Resizes the grid so it covers the tile columns left..right and rows top..bottom (inclusive),
+        # keeping every tile that is already placed
+        if self.width:
+            left, top = min(left, self.originX), min(top, self.originY)
+            right, bottom = max(right, self.originX + self.width - 1), max(bottom, self.originY + self.height - 1)
+        width, height = right - left + 1, bottom - top + 1
+        tileTypes = bytearray(width * height)
+        tileVariants = bytearray(width * height)
+        for row in range(self.height):
+            start = (self.originY + row - top) * width + (self.originX - left)
+            tileTypes[start:start + self.width] = self.tileTypes[row * self.width:(row + 1) * self.width]
+            tileVariants[start:start + self.width] = self.tileVariants[row * self.width:(row + 1) * self.width]
+        self.originX, self.originY, self.width, self.height = left, top, width, height
+        self.tileTypes = tileTypes
+        self.tileVariants = tileVariants
+
+    def Index(self, x, y):
+        # Returns the position of tile (x, y) in the grid arrays, or -1 if it is outside the grid
+        x -= self.originX
+        y -= self.originY
+        if 0 <= x < self.width and 0 <= y < self.height:
+            return y * self.width + x
+        return -1
+
+    def GetTile(self, x, y):
+        index = self.Index(x, y)
+        if index >= 0 and self.tileTypes[index]:
+            return self.typeNames[self.tileTypes[index]], self.tileVariants[index]
+
+    def SetTile(self, x, y, tileType, variant):
+        self.Unshare()
+        index = self.Index(x, y)
+        if index < 0:
+            # Grows by a few extra tiles so painting along an edge in the editor doesn't resize every time
+            self.Grow(x - GROW_MARGIN, y - GROW_MARGIN, x + GROW_MARGIN, y + GROW_MARGIN)
+            index = self.Index(x, y)
+        typeId = self.InternType(tileType)
+        if self.tileTypes[index] != typeId or self.tileVariants[index] != variant:
+            self.tileTypes[index] = typeId
+            self.tileVariants[index] = variant
+            self.InvalidateTile(x, y)
+            self.InvalidatePhysics()
+
+    def RemoveTile(self, x, y):
+        index = self.Index(x, y)
+        if index >= 0 and self.tileTypes[index]:
+            self.Unshare()
+            self.tileTypes[index] = 0
+            self.tileVariants[index] = 0
+            self.InvalidateTile(x, y)
+            self.InvalidatePhysics()
+
+    def OffGridChunks(self, tile):
+        # Returns every chunk the image of the off-grid tile overlaps
+        chunkPixels = CHUNK_SIZE * self.tileSize
+        image = self.game.assets[tile['type']][tile['variant']]
+        return [(chunkX, chunkY)
+                for chunkX in range(int(tile['position'][0] // chunkPixels),
+                                    int((tile['position'][0] + image.get_width()) // chunkPixels) + 1)
+                for chunkY in range(int(tile['position'][1] // chunkPixels),
+                                    int((tile['position'][1] + image.get_height()) // chunkPixels) + 1)]
+
+    def AddOffGrid(self, tile):
+        self.Unshare()
+        self.offGridTiles.append(tile)
+        for chunk in self.OffGridChunks(tile):
+            self.offGridBuckets.setdefault(chunk, []).append(tile)
+            self.dirtyChunks.add(chunk)
+
+    def RemoveOffGrid(self, tile):
+        # Tiles are removed by identity, since two props of the same type can sit at the same position
+        self.Unshare()
+        self.offGridTiles = [other for other in self.offGridTiles if other is not tile]
+        for chunk in self.OffGridChunks(tile):
+            self.offGridBuckets[chunk] = [other for other in self.offGridBuckets[chunk] if other is not tile]
+            if not self.offGridBuckets[chunk]:
+                del self.offGridBuckets[chunk]
+            self.dirtyChunks.add(chunk)
+
+    def OffGridInRect(self, rectangle):
+        # Returns the off-grid tiles whose image overlaps the rectangle (in pixels), only looking in the
+        # buckets the rectangle covers
+        tiles = []
+        found = set()
+        chunkPixels = CHUNK_SIZE * self.tileSize
+        for chunkX in range(rectangle.left // chunkPixels, (rectangle.right - 1) // chunkPixels + 1):
+            for chunkY in range(rectangle.top // chunkPixels, (rectangle.bottom - 1) // chunkPixels + 1):
+                for tile in self.offGridBuckets.get((chunkX, chunkY), ()):
+                    if id(tile) not in found:
+                        found.add(id(tile))
+                        image = self.game.assets[tile['type']][tile['variant']]
+                        if rectangle.colliderect(pygame.Rect(tile['position'], image.get_size())):
+                            tiles.append(tile)
+        return tiles
+
+    def Tiles(self):
+        # Yields (x, y, type, variant) for every placed on-grid tile
+        for index, typeId in enumerate(self.tileTypes):
+            if typeId:
+                yield (index % self.width + self.originX, index // self.width + self.originY,
+                       self.typeNames[typeId], self.tileVariants[index])
 
     def TilesAround(self, position):
+        # Returns the (x, y, type, variant) of every tile in the 3x3 block around the position
         tiles = []
-        tileLocation = ((int(position[0] // self.tileSize)), (int(position[1] // self.tileSize)))
-        for offset in NEIGHBOUR_OFFSETS:
-            checkLocation = str(tileLocation[0] + offset[0]) + ';' + str(tileLocation[1] + offset[1])
-            if checkLocation in self.tilemap:
-                tiles.append(self.tilemap[checkLocation])
+        width, height, tileTypes = self.width, self.height, self.tileTypes
+        tileX = int(position[0] // self.tileSize) - self.originX
+        tileY = int(position[1] // self.tileSize) - self.originY
+        for offsetX, offsetY in NEIGHBOUR_OFFSETS:
+            x = tileX + offsetX
+            y = tileY + offsetY
+            if 0 <= x < width and 0 <= y < height:
+                typeId = tileTypes[y * width + x]
+                if typeId:
+                    tiles.append((x + self.originX, y + self.originY, self.typeNames[typeId],
+                                  self.tileVariants[y * width + x]))
         return tiles
 
     def SolidCheck(self, position):
         # Computes the location of the tile from current position
-        tileLocation = str(int(position[0] // self.tileSize)) + ';' + str(int(position[1] // self.tileSize))
-        # Checks if tile is in tilemap
-        if tileLocation in self.tilemap:
-            if self.tilemap[tileLocation]['type'] in PHYSICS_TILES:
-                return self.tilemap[tileLocation]
+        x = int(position[0] // self.tileSize) - self.originX
+        y = int(position[1] // self.tileSize) - self.originY
+        # Checks if tile is in tilemap and returns its type if it is solid
+        if 0 <= x < self.width and 0 <= y < self.height:
+            typeId = self.tileTypes[y * self.width + x]
+            if self.physicsTypes[typeId]:
+                return self.typeNames[typeId]
+
+    def TypeIdsAt(self, tileX, tileY):
+        # Batched lookup for arrays of tile coordinates, returns an array of their type ids (0 for empty tiles)
+        x = tileX - self.originX
+        y = tileY - self.originY
+        if not self.width or not self.height:
+            return numpy.zeros(numpy.shape(x), dtype=numpy.uint8)
+        inside = (x >= 0) & (x < self.width) & (y >= 0) & (y < self.height)
+        # Tiles outside the map read some tile inside it and are then zeroed, cheaper than indexing with the mask
+        index = (numpy.minimum(numpy.maximum(y, 0), self.height - 1) * self.width +
+                 numpy.minimum(numpy.maximum(x, 0), self.width - 1))
+        return numpy.frombuffer(self.tileTypes, dtype=numpy.uint8)[index] * inside
+
+    def TypeIdAt(self, x, y):
+        # The type id of the tile at (x, y) in tile coordinates, 0 for an empty tile or one outside the map
+        x -= self.originX
+        y -= self.originY
+        if 0 <= x < self.width and 0 <= y < self.height:
+            return self.tileTypes[y * self.width + x]
+        return 0
+
+    def SolidTile(self, x, y):
+        # Returns the type of the tile at (x, y) in tile coordinates if it is solid
+        index = self.Index(x, y)
+        if index >= 0 and self.physicsTypes[self.tileTypes[index]]:
+            return self.typeNames[self.tileTypes[index]]
+
+    def Raycast(self, position, direction, maxDistance):
+        # Walks the grid tile by tile along the ray (a DDA traversal) and returns (distance, (x, y), type) for the
+        # first solid tile it enters within maxDistance pixels, or None if there isn't one. The distance is
+        # measured in pixels from the position to where the ray enters the tile
+        length = math.hypot(direction[0], direction[1])
+        if not length:
+            return None
+        directionX, directionY = direction[0] / length, direction[1] / length
+        tileSize = self.tileSize
+        x, y = int(position[0] // tileSize), int(position[1] // tileSize)
+
+        # Distance along the ray to the next vertical and horizontal grid line, and between two of them
+        stepX = 1 if directionX > 0 else -1
+        stepY = 1 if directionY > 0 else -1
+        deltaX = tileSize / abs(directionX) if directionX else math.inf
+        deltaY = tileSize / abs(directionY) if directionY else math.inf
+        nextX = ((x + (directionX > 0)) * tileSize - position[0]) / directionX if directionX else math.inf
+        nextY = ((y + (directionY > 0)) * tileSize - position[1]) / directionY if directionY else math.inf
+
+        distance = 0
+        while distance <= maxDistance:
+            tileType = self.SolidTile(x, y)
+            if tileType:
+                return distance, (x, y), tileType
+            if nextX < nextY:
+                x += stepX
+                distance = nextX
+                nextX += deltaX
+            else:
+                y += stepY
+                distance = nextY
+                nextY += deltaY
+
+    def LineOfSight(self, start, end):
+        # Returns True if no solid tile lies between the two positions
+        return self.Raycast(start, (end[0] - start[0], end[1] - start[1]),
+                            math.hypot(end[0] - start[0], end[1] - start[1])) is None
+
+    def LinesOfSight(self, starts, ends):
+        # Batched LineOfSight, takes N x 2 sequences (or arrays) of positions and walks all the segments through
+        # the grid at once, one tile per step. Returns an array of N bools, True where nothing solid is in the way
+        starts = numpy.asarray(starts, dtype=numpy.float64).reshape(-1, 2)
+        ends = numpy.asarray(ends, dtype=numpy.float64).reshape(-1, 2)
+        clear = numpy.ones(len(starts), dtype=bool)
+        if not len(starts) or not self.width:
+            return clear
+        solid = numpy.frombuffer(self.physicsTypes, dtype=numpy.uint8)[
+            numpy.frombuffer(self.tileTypes, dtype=numpy.uint8)].reshape(self.height, self.width).astype(bool)
+
+        tile = numpy.floor_divide(starts, self.tileSize).astype(numpy.int64)
+        endTile = numpy.floor_divide(ends, self.tileSize).astype(numpy.int64)
+        delta = ends - starts
+        step = numpy.where(delta > 0, 1, -1)
+        with numpy.errstate(divide='ignore', invalid='ignore'):
+            deltaT = numpy.where(delta != 0, self.tileSize / numpy.abs(delta), numpy.inf)
+            nextT = numpy.where(delta != 0, ((tile + (delta > 0)) * self.tileSize - starts) / delta, numpy.inf)
+
+        # Every segment visits exactly |dx| + |dy| + 1 tiles, never stepping past the end tile on either axis
+        remaining = numpy.abs(endTile - tile)
+        active = numpy.ones(len(starts), dtype=bool)
+        for i in range(int(remaining.sum(axis=1).max()) + 1):
+            x = tile[:, 0] - self.originX
+            y = tile[:, 1] - self.originY
+            inside = active & (x >= 0) & (x < self.width) & (y >= 0) & (y < self.height)
+            blocked = numpy.zeros(len(starts), dtype=bool)
+            blocked[inside] = solid[y[inside], x[inside]]
+            clear &= ~blocked
+            active &= ~blocked & (remaining.sum(axis=1) > 0)
+
+            alongX = ((nextT[:, 0] < nextT[:, 1]) & (remaining[:, 0] > 0)) | (remaining[:, 1] == 0)
+            axis = numpy.where(alongX, 0, 1)
+            rows = numpy.nonzero(active)[0]
+            tile[rows, axis[rows]] += step[rows, axis[rows]]
+            nextT[rows, axis[rows]] += deltaT[rows, axis[rows]]
+            remaining[rows, axis[rows]] -= 1
+        return clear
 
     def PhysicsRectsAround(self, position, offset=(0, 0)):
-        rectangles = []
-        tile_types = []
-        for tile in self.TilesAround(position):
-            if tile['type'] in PHYSICS_TILES:
-                rectangles.append(pygame.Rect(tile['position'][0] * self.tileSize - offset[0],
-                                              tile['position'][1] * self.tileSize - offset[1],
-                                              self.tileSize, self.tileSize))
-                tile_types.append(tile['type'])
-        return rectangles, tile_types
+        # Returns the merged collision rectangles, and their types, overlapping the 3x3 block of tiles around the
+        # position. Each block is only worked out once, so the tuples and rectangles returned are shared and must
+        # not be changed
+        block = (int(position[0] // self.tileSize), int(position[1] // self.tileSize))
+        result = self.physicsCache.get(block)
+        if result is None:
+            self.UnshareCaches()
+            result = self.physicsCache[block] = self.BuildPhysicsRects(block)
+        if offset != (0, 0):
+            return [rectangle.move(-offset[0], -offset[1]) for rectangle in result[0]], list(result[1])
+        return result
+
+    def BuildPhysicsRects(self, block):
+        if self.physicsRects is None:
+            self.MergePhysics()
+        area = pygame.Rect((block[0] - 1) * self.tileSize, (block[1] - 1) * self.tileSize,
+                           3 * self.tileSize, 3 * self.tileSize)
+        found = set()
+        for chunkX in range((block[0] - 1) // CHUNK_SIZE, (block[0] + 1) // CHUNK_SIZE + 1):
+            for chunkY in range((block[1] - 1) // CHUNK_SIZE, (block[1] + 1) // CHUNK_SIZE + 1):
+                found.update(self.physicsBuckets.get((chunkX, chunkY), ()))
+        indices = [index for index in sorted(found) if area.colliderect(self.physicsRects[index])]
+        return (tuple(self.physicsRects[index] for index in indices),
+                tuple(self.physicsRectTypes[index] for index in indices))
+
+    def PhysicsRectsIn(self, area):
+        # Returns the merged collision rectangles, and their types, overlapping the area (a pygame.Rect)
+        return self.PhysicsRectsBetween(area.left, area.top, area.right, area.bottom)
+
+    def PhysicsRectsBetween(self, left, top, right, bottom):
+        # PhysicsRectsIn for the area between the whole numbers left and right and top and bottom, which can be
+        # floats. Small areas are answered from the PhysicsRectsAround cache, which can also hold rectangles just
+        # outside the area. Sweep calls this every step: floats and small tuples are reused by Python rather than
+        # allocated, unlike the ints a Rect's attributes are read as, so the cached answer allocates nothing
+        tileSize = self.tileSize
+        centreX, centreY = (left + right) // 2, (top + bottom) // 2
+        blockX, blockY = centreX // tileSize, centreY // tileSize
+        if ((blockX - 1) * tileSize <= left and right <= (blockX + 2) * tileSize and
+                (blockY - 1) * tileSize <= top and bottom <= (blockY + 2) * tileSize):
+            return self.PhysicsRectsAround((centreX, centreY))
+        if self.physicsRects is None:
+            self.MergePhysics()
+        area = pygame.Rect(left, top, right - left, bottom - top)
+        found = set()
+        chunkPixels = CHUNK_SIZE * self.tileSize
+        for chunkX in range(area.left // chunkPixels, (area.right - 1) // chunkPixels + 1):
+            for chunkY in range(area.top // chunkPixels, (area.bottom - 1) // chunkPixels + 1):
+                found.update(self.physicsBuckets.get((chunkX, chunkY), ()))
+        indices = [index for index in sorted(found) if area.colliderect(self.physicsRects[index])]
+        return ([self.physicsRects[index] for index in indices],
+                [self.physicsRectTypes[index] for index in indices])
+
+    def Sweep(self, position, size, movement, ignore=()):
+        # Swept AABB collision: moves a box of the given size from position (its top left) by movement and finds
+        # the first collision rectangles it runs into along the way, however far it moves. Returns None if the
+        # way is clear, or (time, normal, position, types): the fraction of the movement done when the box touches
+        # them, the side of them it touches (e.g. (0, -1) for their tops), where the box is then, and their types.
+        # Rectangles of the ignored types, and ones the box already overlaps, can be moved through
+        left, top = position
+        right, bottom = left + size[0], top + size[1]
+        moveX, moveY = movement
+        if not moveX and not moveY:
+            return None
+        # The area the box sweeps through, out to whole pixels. x // 1 floors a float and keeps it a float
+        rectangles, tileTypes = self.PhysicsRectsBetween(
+            (left + moveX if moveX < 0 else left) // 1, (top + moveY if moveY < 0 else top) // 1,
+            -(-(right + moveX if moveX > 0 else right) // 1), -(-(bottom + moveY if moveY > 0 else bottom) // 1))
+
+        hit = None
+        for index in range(len(rectangles)):     # Cheaper to set up than a zip, which is four objects
+            tileType = tileTypes[index]
+            if tileType in ignore:
+                continue
+            rectangle = rectangles[index]
+            # When the box starts and stops overlapping the rectangle along each axis, as fractions of the movement
+            if moveX > 0:
+                entryX, exitX = (rectangle.left - right) / moveX, (rectangle.right - left) / moveX
+            elif moveX < 0:
+                entryX, exitX = (rectangle.right - left) / moveX, (rectangle.left - right) / moveX
+            elif left < rectangle.right and rectangle.left < right:
+                entryX, exitX = -math.inf, math.inf
+            else:
+                continue
+            if moveY > 0:
+                entryY, exitY = (rectangle.top - bottom) / moveY, (rectangle.bottom - top) / moveY
+            elif moveY < 0:
+                entryY, exitY = (rectangle.bottom - top) / moveY, (rectangle.top - bottom) / moveY
+            elif top < rectangle.bottom and rectangle.top < bottom:
+                entryY, exitY = -math.inf, math.inf
+            else:
+                continue
+            entry = max(entryX, entryY)
+            # Touching the rectangle only at the very end of the movement isn't a collision yet
+            if entry < 0 or entry >= 1 or entry >= min(exitX, exitY):
+                continue
+
+            if entryX >= entryY:
+                normal = (-1 if moveX > 0 else 1, 0)
+                contact = (rectangle.left - size[0] if moveX > 0 else rectangle.right, top + moveY * entry)
+            else:
+                normal = (0, -1 if moveY > 0 else 1)
+                contact = (left + moveX * entry, rectangle.top - size[1] if moveY > 0 else rectangle.bottom)
+            if hit is None or entry < hit[0]:
+                hit = (entry, normal, contact, [tileType])
+            elif entry == hit[0] and normal == hit[1]:
+                hit[3].append(tileType)
+        return hit
+
+    def MergePhysics(self):
+        # Greedily merges the solid tiles into rectangles: every run of same-type tiles along a row is grown down
+        # for as long as the rows below hold the same run. Platforms are only merged along rows, since entities
+        # land on the top of each platform tile and a stack of them has to keep its inner edges
+        self.physicsRects = []
+        self.physicsRectTypes = []
+        self.physicsBuckets = {}
+        width, height, tileTypes, tileSize = self.width, self.height, self.tileTypes, self.tileSize
+        merged = bytearray(width * height)
+        for y in range(height):
+            x = 0
+            while x < width:
+                index = y * width + x
+                typeId = tileTypes[index]
+                if merged[index] or not self.physicsTypes[typeId]:
+                    x += 1
+                    continue
+                end = x + 1
+                while end < width and tileTypes[index + end - x] == typeId and not merged[index + end - x]:
+                    end += 1
+                run = bytes([typeId]) * (end - x)
+                free = bytes(end - x)
+                bottom = y + 1
+                if self.typeNames[typeId] not in ROW_MERGED_TILES:
+                    while (bottom < height and tileTypes[bottom * width + x:bottom * width + end] == run
+                           and merged[bottom * width + x:bottom * width + end] == free):
+                        bottom += 1
+                for row in range(y, bottom):
+                    merged[row * width + x:row * width + end] = b'\x01' * (end - x)
+
+                rectangleIndex = len(self.physicsRects)
+                self.physicsRects.append(pygame.Rect((x + self.originX) * tileSize, (y + self.originY) * tileSize,
+                                                     (end - x) * tileSize, (bottom - y) * tileSize))
+                self.physicsRectTypes.append(self.typeNames[typeId])
+                for chunkX in range((x + self.originX) // CHUNK_SIZE, (end - 1 + self.originX) // CHUNK_SIZE + 1):
+                    for chunkY in range((y + self.originY) // CHUNK_SIZE,
+                                        (bottom - 1 + self.originY) // CHUNK_SIZE + 1):
+                        self.physicsBuckets.setdefault((chunkX, chunkY), []).append(rectangleIndex)
+                x = end
+
+    def InvalidatePhysics(self):
+        self.physicsRects = None
+        self.physicsRectTypes = []
+        self.physicsBuckets = {}
+        self.physicsCache = {}
 
     def save(self, path):
+        tilemap = {}
+        for x, y, tileType, variant in self.Tiles():
+            tilemap[str(x) + ';' + str(y)] = {'type': tileType, 'variant': variant, 'position': [x, y]}
         f = open(path, 'w')
-        json.dump({'tilemap': self.tilemap, 'tile_size': self.tileSize, 'offgrid': self.offGridTiles}, f)
+        json.dump({'tilemap': tilemap, 'tile_size': self.tileSize, 'offgrid': self.offGridTiles}, f)
         f.close()
 
     def load(self, path):
@@ -51,22 +517,100 @@ class Tilemap:
         map_data = json.load(f)
         f.close()
 
-        self.tilemap = map_data['tilemap']
+        self.Clear()
         self.tileSize = map_data['tile_size']
-        self.offGridTiles = map_data['offgrid']
+        for tile in map_data['offgrid']:
+            self.AddOffGrid(tile)
+
+        tiles = list(map_data['tilemap'].values())
+        if tiles:
+            self.Grow(min(tile['position'][0] for tile in tiles), min(tile['position'][1] for tile in tiles),
+                      max(tile['position'][0] for tile in tiles), max(tile['position'][1] for tile in tiles))
+        for tile in tiles:
+            index = self.Index(tile['position'][0], tile['position'][1])
+            self.tileTypes[index] = self.InternType(tile['type'])
+            self.tileVariants[index] = tile['variant']
+
+    def LoadLevel(self, jsonPath):
+        # Loads a JSON level from its compiled copy (see LevelFormat.BuildLevel) and returns its spawners. When no
+        # compiled copy can be written the JSON is loaded instead, slower but the same level and spawners
+        levelPath = BuildLevel(jsonPath)
+        if levelPath is None:
+            self.load(jsonPath)
+            return self.Extract(SPAWNER_TILES)
+        return self.LoadCompiled(levelPath)
+
+    def LoadCompiled(self, path):
+        # Loads a level made by Scripts/LevelFormat.py and returns its spawners. The grids are views straight
+        # into the memory-mapped file, mapped copy-on-write so that edits never reach the file on disk
+        f = open(path, 'rb')
+        levelFile = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+        f.close()
+        view = memoryview(levelFile)
+
+        (magic, version, tileSize, originX, originY, width, height,
+         typeCount, offGridCount, spawnerCount) = HEADER.unpack_from(view)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(path + ' is not a compiled level')
+
+        self.Clear()
+        self.tileSize = tileSize
+        position = HEADER.size
+        for i in range(typeCount):
+            self.InternType(bytes(view[position + 1:position + 1 + view[position]]).decode())
+            position += 1 + view[position]
+
+        self.originX, self.originY, self.width, self.height = originX, originY, width, height
+        self.tileTypes = view[position:position + width * height]
+        position += width * height
+        self.tileVariants = view[position:position + width * height]
+        position += width * height
+
+        for typeId, variant, x, y in RECORD.iter_unpack(view[position:position + offGridCount * RECORD.size]):
+            self.AddOffGrid({'type': self.typeNames[typeId], 'variant': variant, 'position': [x, y]})
+        position += offGridCount * RECORD.size
+
+        spawners = []
+        for typeId, variant, x, y in RECORD.iter_unpack(view[position:position + spawnerCount * RECORD.size]):
+            spawners.append({'type': self.typeNames[typeId], 'variant': variant, 'position': [x, y]})
+        return spawners
 
     def autotile(self):
-        for loc in self.tilemap:
-            tile = self.tilemap[loc]
-            neighbors = set()
-            for shift in [(1, 0), (-1, 0), (0, -1), (0, 1)]:
-                check_loc = str(tile['position'][0] + shift[0]) + ';' + str(tile['position'][1] + shift[1])
-                if check_loc in self.tilemap:
-                    if self.tilemap[check_loc]['type'] == tile['type']:
-                        neighbors.add(shift)
-            neighbors = tuple(sorted(neighbors))
-            if (tile['type'] in AUTOTILE_TYPES) and (neighbors in AUTOTILE_MAP):
-                tile['variant'] = AUTOTILE_MAP[neighbors]
+        # Works out the neighbour mask of every tile in the grid at once, bit by bit (see AUTOTILE_BITS), and
+        # looks the new variants up in AUTOTILE_VARIANTS
+        self.Unshare()
+        if not self.width:
+            return
+        tileTypes = numpy.frombuffer(self.tileTypes, dtype=numpy.uint8).reshape(self.height, self.width)
+        tileVariants = numpy.frombuffer(self.tileVariants, dtype=numpy.uint8).reshape(self.height, self.width)
+        padded = numpy.pad(tileTypes, 1)
+        masks = numpy.zeros(tileTypes.shape, dtype=numpy.uint8)
+        for (shiftX, shiftY), bit in AUTOTILE_BITS.items():
+            neighbours = padded[1 + shiftY:1 + shiftY + self.height, 1 + shiftX:1 + shiftX + self.width]
+            masks |= (neighbours == tileTypes) * numpy.uint8(bit)
+
+        variants = numpy.frombuffer(AUTOTILE_VARIANTS, dtype=numpy.uint8)[masks]
+        autotiled = numpy.frombuffer(self.autotileTypes, dtype=numpy.uint8)[tileTypes].astype(bool)
+        changed = autotiled & (variants != NO_VARIANT) & (variants != tileVariants)
+        tileVariants[changed] = variants[changed]
+        for y, x in zip(*numpy.nonzero(changed)):
+            self.InvalidateTile(int(x) + self.originX, int(y) + self.originY)
+
+    def AutotileAt(self, x, y):
+        # Autotiles one tile and its four neighbours, so the editor can keep the map autotiled while painting
+        self.Unshare()
+        for shiftX, shiftY in ((0, 0),) + tuple(AUTOTILE_BITS):
+            index = self.Index(x + shiftX, y + shiftY)
+            if index < 0 or not self.autotileTypes[self.tileTypes[index]]:
+                continue
+            mask = 0
+            for (neighbourX, neighbourY), bit in AUTOTILE_BITS.items():
+                neighbour = self.Index(x + shiftX + neighbourX, y + shiftY + neighbourY)
+                if neighbour >= 0 and self.tileTypes[neighbour] == self.tileTypes[index]:
+                    mask |= bit
+            if AUTOTILE_VARIANTS[mask] != NO_VARIANT and self.tileVariants[index] != AUTOTILE_VARIANTS[mask]:
+                self.tileVariants[index] = AUTOTILE_VARIANTS[mask]
+                self.InvalidateTile(x + shiftX, y + shiftY)
 
     def Extract(self, idPairs, keep=False):
         matches = []
@@ -74,33 +618,91 @@ class Tilemap:
             if(tile['type'], tile['variant']) in idPairs:
                 matches.append(tile.copy())
                 if not keep:
-                    self.offGridTiles.remove(tile)
+                    self.RemoveOffGrid(tile)
 
-        for loc in self.tilemap.copy():
-            tile = self.tilemap[loc]
-            if (tile['type'], tile['variant']) in idPairs:
-                matches.append(tile.copy())
-                matches[-1]['position'] = matches[-1]['position'].copy()
-                matches[-1]['position'][0] *= self.tileSize
-                matches[-1]['position'][1] *= self.tileSize
+        for x, y, tileType, variant in list(self.Tiles()):
+            if (tileType, variant) in idPairs:
+                matches.append({'type': tileType, 'variant': variant,
+                                'position': [x * self.tileSize, y * self.tileSize]})
                 if not keep:
-                    del self.tilemap[loc]
+                    self.RemoveTile(x, y)
 
         return matches
 
+    def InvalidateTile(self, x, y):
+        # Tile images can spill over the right and bottom edge of their cell, so the chunks next to the
+        # tile are rebuilt as well
+        self.dirtyChunks.update({(x // CHUNK_SIZE, y // CHUNK_SIZE), ((x + 1) // CHUNK_SIZE, y // CHUNK_SIZE),
+                                 (x // CHUNK_SIZE, (y + 1) // CHUNK_SIZE),
+                                 ((x + 1) // CHUNK_SIZE, (y + 1) // CHUNK_SIZE)})
+
+    def BakeChunk(self, chunkX, chunkY):
+        chunkPixels = CHUNK_SIZE * self.tileSize
+        chunkLeft, chunkTop = chunkX * chunkPixels, chunkY * chunkPixels
+        surface = None
+
+        for tile in self.offGridBuckets.get((chunkX, chunkY), ()):
+            if surface is None:
+                surface = self.NewChunkSurface()
+            surface.blit(self.game.assets[tile['type']][tile['variant']],
+                         (tile['position'][0] - chunkLeft, tile['position'][1] - chunkTop))
+
+        # Starts one tile early so the images spilling over from the chunks to the left and above are included
+        startX = max(chunkX * CHUNK_SIZE - 1, self.originX)
+        endX = min((chunkX + 1) * CHUNK_SIZE, self.originX + self.width)
+        startY = max(chunkY * CHUNK_SIZE - 1, self.originY)
+        endY = min((chunkY + 1) * CHUNK_SIZE, self.originY + self.height)
+        for y in range(startY, endY):
+            rowStart = (y - self.originY) * self.width - self.originX
+            for x in range(startX, endX):
+                typeId = self.tileTypes[rowStart + x]
+                if typeId:
+                    if surface is None:
+                        surface = self.NewChunkSurface()
+                    surface.blit(self.game.assets[self.typeNames[typeId]][self.tileVariants[rowStart + x]],
+                                 (x * self.tileSize - chunkLeft, y * self.tileSize - chunkTop))
+
+        self.UnshareCaches()
+        self.chunks[(chunkX, chunkY)] = surface
+        self.dirtyChunks.discard((chunkX, chunkY))
+
+    def NewChunkSurface(self):
+        # Some tiles are drawn in solid black, so the empty parts of a chunk use a colour no tile contains
+        surface = pygame.Surface((CHUNK_SIZE * self.tileSize, CHUNK_SIZE * self.tileSize))
+        surface.fill(CHUNK_COLORKEY)
+        surface.set_colorkey(CHUNK_COLORKEY, pygame.RLEACCEL)
+        return surface
+
+    def BakeChunks(self):
+        # Pre-renders every chunk of the level, called once the level has been loaded
+        self.chunks = {}
+        self.dirtyChunks = set()
+        if self.width:
+            for chunkX in range(self.originX // CHUNK_SIZE, (self.originX + self.width) // CHUNK_SIZE + 1):
+                for chunkY in range(self.originY // CHUNK_SIZE, (self.originY + self.height) // CHUNK_SIZE + 1):
+                    self.BakeChunk(chunkX, chunkY)
+        for chunk in self.offGridBuckets:
+            if chunk not in self.chunks:
+                self.BakeChunk(*chunk)
+
+    def VisibleChunks(self, size, offset=(0, 0)):
+        # Returns (chunk surface, position) for every chunk that overlaps a screen of the given size, baking the
+        # ones that aren't baked yet
+        chunkPixels = CHUNK_SIZE * self.tileSize
+        chunks = []
+        for chunkX in range(offset[0] // chunkPixels, (offset[0] + size[0]) // chunkPixels + 1):
+            for chunkY in range(offset[1] // chunkPixels, (offset[1] + size[1]) // chunkPixels + 1):
+                chunk = (chunkX, chunkY)
+                if chunk in self.dirtyChunks or chunk not in self.chunks:
+                    self.BakeChunk(chunkX, chunkY)
+                if self.chunks[chunk] is not None:
+                    chunks.append((self.chunks[chunk], (chunkX * chunkPixels - offset[0],
+                                                        chunkY * chunkPixels - offset[1])))
+        return chunks
+
     def Render(self, surface, offset=(0, 0)):
-        for tile in self.offGridTiles:
-            surface.blit(self.game.assets[tile["type"]][tile["variant"]],
-                         (tile["position"][0] - offset[0], tile["position"][1] - offset[1]))
-        # Range of (Top left pixel, Top right pixel)
-        for x in range(offset[0] // self.tileSize, (offset[0] + surface.get_width()) // self.tileSize + 1):
-            for y in range(offset[1] // self.tileSize, (offset[1] + surface.get_height()) // self.tileSize + 1):
-                loc = str(x) + ';' + str(y)
-                if loc in self.tilemap:
-                    tile = self.tilemap[loc]
-                    surface.blit(self.game.assets[tile['type']][tile['variant']],
-                                 (tile["position"][0] * self.tileSize - offset[0],
-                                  tile["position"][1] * self.tileSize - offset[1]))
+        # Only the chunks that overlap the screen are drawn, each with a single blit
+        surface.blits(self.VisibleChunks(surface.get_size(), offset), doreturn=False)
         # rectangles, x = self.PhysicsRectsAround(self.game.player.position, (int(self.game.scroll[0]), int(self.game.scroll[1])))
         # for rectangle in rectangles:
         #     pygame.draw.rect(self.game.display, (0, 255, 0), rectangle)
@@ -118,7 +720,22 @@ AUTOTILE_MAP = {
     tuple(sorted([(1, 0), (0, -1), (0, 1)])): 7,
     tuple(sorted([(1, 0), (-1, 0), (0, 1), (0, -1)])): 8,
 }
+# Each neighbour of the same type sets one bit of a tile's neighbour mask, AUTOTILE_VARIANTS maps every mask
+# to the variant from AUTOTILE_MAP, or to NO_VARIANT when the tile should be left as it is
+AUTOTILE_BITS = {(1, 0): 1, (-1, 0): 2, (0, -1): 4, (0, 1): 8}
+NO_VARIANT = 255
+AUTOTILE_VARIANTS = bytearray([NO_VARIANT] * 16)
+for neighbours, autotileVariant in AUTOTILE_MAP.items():
+    AUTOTILE_VARIANTS[sum(AUTOTILE_BITS[shift] for shift in neighbours)] = autotileVariant
 
 NEIGHBOUR_OFFSETS = [(-1, 0), (-1, -1), (0, -1), (1, -1), (1, 0), (0, 0), (-1, 1), (0, 1), (1, 1)]
 PHYSICS_TILES = {'ground_tiles', 'wall_tiles', 'platform', 'healers', 'level_transition'}
+ROW_MERGED_TILES = {'platform'}     # Physics tiles that MergePhysics never merges vertically
+ONE_WAY_TILES = {'platform'}    # Physics tiles that entities only collide with when landing on them
 AUTOTILE_TYPES = {'ground_tiles', 'wall_tiles', 'healers'}
+GROW_MARGIN = 8     # Extra tiles added around the grid whenever SetTile has to grow it
+CHUNK_SIZE = 8  # Width and height of a pre-rendered chunk in tiles
+CHUNK_COLORKEY = (255, 0, 255)
+SNAPSHOT_FIELDS = ('tileSize', 'originX', 'originY', 'width', 'height', 'tileTypes', 'tileVariants', 'typeNames',
+                   'typeIds', 'physicsTypes', 'autotileTypes', 'offGridTiles', 'offGridBuckets', 'chunks',
+                   'physicsRects', 'physicsRectTypes', 'physicsBuckets', 'physicsCache')
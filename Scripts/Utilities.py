@@ -1,42 +1,100 @@
 import pygame
 import os
+import sys
 
 pygame.init()
 
+class AnimationClip:
+    # The frames and timing of an animation, loaded once and shared by everything playing it through an Animation.
+    # Clips never change once they are made
+    __slots__ = ('images', 'flippedImages', 'imageDuration', 'loop', 'length', 'frameIndex')
+
+    def __init__(self, images, imageDuration=5, loop=True, flippedImages=None):
+        Set = object.__setattr__
+        Set(self, 'images', tuple(images))  # These are all the images in the animation sprite
+        # The images mirrored left to right, made once here unless they're given (see Scripts/Atlas.py) so nothing
+        # has to flip a surface every frame
+        Set(self, 'flippedImages', tuple(flippedImages if flippedImages is not None else
+                                         [Mirror(image) for image in images]))
+        Set(self, 'imageDuration', imageDuration)   # How long each frame is supposed to last
+        Set(self, 'loop', loop)     # Do we want to loop through the animation
+        Set(self, 'length', imageDuration * len(self.images))   # Game frames in one play through
+        Set(self, 'frameIndex', tuple(frame // imageDuration for frame in range(self.length)))  # Frame -> image
+
+    def __setattr__(self, name, value):
+        raise AttributeError('animation clips are shared, they can not be changed')
+
+    def Memory(self):
+        # Bytes used by the clip's pixels, its mirrored pixels and its frame index table
+        pixels = sum(image.get_width() * image.get_height() * image.get_bytesize() for image in self.images)
+        flippedPixels = sum(image.get_width() * image.get_height() * image.get_bytesize()
+                            for image in self.flippedImages)
+        return {'frames': len(self.images), 'pixels': pixels, 'flippedPixels': flippedPixels,
+                'table': sys.getsizeof(self.frameIndex)}
+
+
 class Animation:
-    def __init__(self, images, imageDuration=5, loop=True):
-        self.images = images    # These are all the images in the animation sprite
-        self.imageDuration = imageDuration  # How long each frame is supposed to last
-        self.loop = loop    # Do we want to loop through the animation
+    # Where something is in playing an AnimationClip. It only holds the clip, the frame and whether a clip that
+    # doesn't loop is done, so entities and particles can switch clips with Play without making anything
+    __slots__ = ('clip', 'done', 'frame')
+
+    def __init__(self, clip, frame=0):
+        self.clip = clip
         self.done = False   # Is the animation done?
-        self.frame = 0  # This is the current frame of the GAME not the animation
+        self.frame = frame  # This is the current frame of the GAME not the animation
 
-    def Copy(self):
-        return Animation(self.images, self.imageDuration, self.loop)  # Returns an exact copy of the same object(BYREF)
+    def Play(self, clip, frame=0):
+        # Starts playing clip from frame
+        self.clip = clip
+        self.done = False
+        self.frame = frame
 
-    def Image(self):
-        return self.images[int(self.frame / self.imageDuration)]
+    def Image(self, flip=False):
+        clip = self.clip
+        return (clip.flippedImages if flip else clip.images)[clip.frameIndex[self.frame]]
 
     def IsDone(self):
         return self.done
 
     def Update(self):
-        if self.loop:
-            self.frame = (self.frame + 1) % (self.imageDuration * len(self.images))    # Loops around the frames
+        clip = self.clip
+        if clip.loop:
+            self.frame = (self.frame + 1) % clip.length    # Loops around the frames
+        elif self.frame + 1 >= clip.length - 1:
+            self.frame = clip.length - 1
+            self.done = True
         else:
-            self.frame = min(self.frame + 1, (self.imageDuration * len(self.images)) - 1)
-            if self.frame >= (self.imageDuration * len(self.images)) - 1:
-                self.done = True
+            self.frame += 1
+
+
+class SilentSound:
+    # Stands in for a pygame.mixer.Sound when the game runs headless, without the mixer
+    def play(self, *args, **kwargs):
+        pass
+
+    def stop(self):
+        pass
+
+    def set_volume(self, volume):
+        pass
 
 
 # Function for loading an image from files
 def LoadImage(path, colorkey=(0, 0, 0)):
-    image = pygame.image.load(BASE_IMAGE_PATH + path).convert()
+    image = pygame.image.load(BASE_IMAGE_PATH + path)
+    # Images can only be converted to the screen's format once there is a screen, headless games never open one
+    if pygame.display.get_surface():
+        image = image.convert()
     # Set color key removes the black background from a surface
     image.set_colorkey(colorkey)
     return image
 
 
+def Mirror(image):
+    # The image flipped left to right, for things facing left
+    return pygame.transform.flip(image, True, False)
+
+
 def LoadImages(path):
     images = []
     for image_name in sorted(os.listdir(BASE_IMAGE_PATH + path)):